@@ -19,6 +19,7 @@ document.addEventListener('DOMContentLoaded', function() {
             // Show corresponding content
             const tabId = this.getAttribute('data-tab');
             document.getElementById(tabId).classList.add('active');
+            loadLogTab(tabId);
         });
     });
     
@@ -31,22 +32,6 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
-    // Search functionality
-    logSearch.addEventListener('input', function() {
-        const searchTerm = this.value.toLowerCase();
-        const activeTab = document.querySelector('.log-tab-content.active');
-        const tableRows = activeTab.querySelectorAll('tbody tr');
-        
-        tableRows.forEach(row => {
-            const rowText = row.textContent.toLowerCase();
-            if (rowText.includes(searchTerm)) {
-                row.style.display = '';
-            } else {
-                row.style.display = 'none';
-            }
-        });
-    });
-    
     // Set default dates for custom range
     const today = new Date();
     const yesterday = new Date(today);
@@ -55,12 +40,202 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('startDate').valueAsDate = yesterday;
     document.getElementById('endDate').valueAsDate = today;
     
-    // Simulate loading data
-    setTimeout(() => {
-        document.querySelector('.admin-container').classList.add('loaded');
-    }, 500);
+    // Load-more buttons fetch the next page of their tab
+    tabContents.forEach(content => {
+        const button = content.querySelector('.log-load-more');
+        if (button) {
+            button.addEventListener('click', () => loadLogTab(content.id, true));
+        }
+    });
+    
+    // Only the visible tab is fetched up front
+    const activeTab = document.querySelector('.log-tab-content.active');
+    if (activeTab) {
+        loadLogTab(activeTab.id);
+    }
+    
+    document.querySelector('.admin-container').classList.add('loaded');
 });
 
+// Per-tab state: next_cursor of the last page and whether the tab was fetched
+const logTabState = {};
+
+function currentLogFilters() {
+    const dateRange = document.getElementById('dateRange').value;
+    const params = new URLSearchParams({
+        date_range: dateRange,
+        search: document.getElementById('logSearch').value
+    });
+    if (dateRange === 'custom') {
+        params.append('start_date', document.getElementById('startDate').value);
+        params.append('end_date', document.getElementById('endDate').value);
+    }
+    return params;
+}
+
+function textCell(text) {
+    const td = document.createElement('td');
+    td.textContent = text === null || text === undefined || text === '' ? '' : String(text);
+    return td;
+}
+
+function badgeCell(text, kind) {
+    const td = document.createElement('td');
+    const badge = document.createElement('span');
+    badge.className = 'status-badge ' + kind;
+    badge.textContent = text;
+    td.appendChild(badge);
+    return td;
+}
+
+function userCell(name, email) {
+    const td = document.createElement('td');
+    const cell = document.createElement('div');
+    cell.className = 'user-cell';
+    const avatar = document.createElement('div');
+    avatar.className = 'avatar';
+    avatar.textContent = name.slice(0, 2).toUpperCase();
+    const info = document.createElement('div');
+    info.className = 'user-info';
+    const nameEl = document.createElement('div');
+    nameEl.className = 'name';
+    nameEl.textContent = name;
+    info.appendChild(nameEl);
+    if (email) {
+        const emailEl = document.createElement('div');
+        emailEl.className = 'email';
+        emailEl.textContent = email;
+        info.appendChild(emailEl);
+    }
+    cell.appendChild(avatar);
+    cell.appendChild(info);
+    td.appendChild(cell);
+    return td;
+}
+
+function truncate(text, length) {
+    text = text || '';
+    return text.length > length ? text.slice(0, length - 1) + '…' : text;
+}
+
+function titleCase(text) {
+    return (text || '').replace(/_/g, ' ').replace(/\b\w/g, c => c.toUpperCase());
+}
+
+// Row builders, one per tab, matching the table headers in logs.html
+const logRowBuilders = {
+    'login-history': row => [
+        userCell(row.username, row.username + '@deped.gov.ph'),
+        textCell(row.success ? 'Login' : 'Failed Login'),
+        textCell(row.time_display),
+        textCell(row.ip_address),
+        textCell(row.location || 'Unknown'),
+        textCell(truncate(row.user_agent, 30)),
+        row.success ? badgeCell('Success', 'success') : badgeCell('Failed', 'error')
+    ],
+    'activity-logs': row => [
+        userCell(row.user || 'System'),
+        textCell(titleCase(row.action_type)),
+        textCell(titleCase(row.resource_type)),
+        textCell(truncate(row.description, 50)),
+        textCell(row.time_display),
+        textCell(row.ip_address || 'N/A')
+    ],
+    'audit-logs': row => [
+        textCell(row.time_display),
+        userCell(row.user || 'System'),
+        textCell(titleCase(row.action_type)),
+        textCell(titleCase(row.resource_type) + (row.resource_id ? ': ' + row.resource_id : '')),
+        textCell(truncate(row.description, 80)),
+        textCell(row.ip_address || 'N/A')
+    ],
+    'failed-logins': row => [
+        textCell(row.time_display),
+        textCell(row.username),
+        textCell(row.ip_address),
+        textCell(row.location || 'Unknown'),
+        textCell(row.failure_reason || 'Authentication failed'),
+        row.is_suspicious ? badgeCell('High', 'error') : badgeCell('Normal', 'warning')
+    ]
+};
+
+function showTabMessage(tbody, message) {
+    const columns = tbody.closest('table').querySelectorAll('thead th').length;
+    const tr = document.createElement('tr');
+    tr.className = 'log-placeholder';
+    const td = textCell(message);
+    td.colSpan = columns;
+    td.className = 'text-center';
+    tr.appendChild(td);
+    tbody.appendChild(tr);
+}
+
+// Fetch the first page of a tab (once), or the next page when `more` is set
+async function loadLogTab(tabId, more = false) {
+    const content = document.getElementById(tabId);
+    const buildRow = logRowBuilders[tabId];
+    if (!content || !buildRow) {
+        return;
+    }
+    const state = logTabState[tabId] || (logTabState[tabId] = {loaded: false, cursor: null, busy: false});
+    if (state.busy || (state.loaded && !more)) {
+        return;
+    }
+    state.busy = true;
+    
+    const tbody = content.querySelector('[data-log-rows]');
+    const button = content.querySelector('.log-load-more');
+    const params = currentLogFilters();
+    if (more && state.cursor) {
+        params.append('cursor', state.cursor);
+    }
+    
+    try {
+        const response = await fetch('/api/admin/logs/' + tabId.replace('-', '_') + '/?' + params.toString(), {
+            credentials: 'same-origin'
+        });
+        const data = await response.json();
+        if (!more) {
+            tbody.innerHTML = '';
+        }
+        tbody.querySelectorAll('.log-placeholder').forEach(row => row.remove());
+        if (!data.success) {
+            showTabMessage(tbody, data.error || 'Failed to load logs.');
+            return;
+        }
+        data.rows.forEach(row => {
+            const tr = document.createElement('tr');
+            buildRow(row).forEach(td => tr.appendChild(td));
+            tbody.appendChild(tr);
+        });
+        if (!tbody.children.length) {
+            showTabMessage(tbody, 'No logs found for the selected period.');
+        }
+        state.loaded = true;
+        state.cursor = data.next_cursor;
+        if (button) {
+            button.style.display = data.has_more ? '' : 'none';
+        }
+    } catch (error) {
+        console.error('Error loading logs:', error);
+        if (!more) {
+            tbody.innerHTML = '';
+            showTabMessage(tbody, 'Failed to load logs.');
+        }
+    } finally {
+        state.busy = false;
+    }
+}
+
+// Drop loaded pages (filters changed) and refetch the visible tab
+function resetLogTabs() {
+    Object.keys(logTabState).forEach(tabId => delete logTabState[tabId]);
+    const activeTab = document.querySelector('.log-tab-content.active');
+    if (activeTab) {
+        loadLogTab(activeTab.id);
+    }
+}
+
 // Export functionality
 function exportCurrentTab(format) {
     if (format !== 'csv') {
@@ -159,6 +334,6 @@ document.addEventListener('DOMContentLoaded', function() {
     let searchTimeout;
     searchInput.addEventListener('input', function() {
         clearTimeout(searchTimeout);
-        searchTimeout = setTimeout(reloadLogsData, 1000); // Wait 1 second after user stops typing
+        searchTimeout = setTimeout(resetLogTabs, 500); // Wait until the user stops typing
     });
 });
\ No newline at end of file
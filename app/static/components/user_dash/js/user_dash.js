@@ -338,7 +338,7 @@ function performSearch(query, resultsContainer) {
   showSearchLoading(resultsContainer);
 
   // Fetch form sections data for searching
-  fetch("/api/form/sections/")
+  fetchWithETag("/api/form/sections/")
     .then((response) => response.json())
     .then((data) => {
       const searchResults = searchInFormData(query.toLowerCase(), data);
@@ -599,15 +599,16 @@ function navigateToSubSection(category, subSectionName) {
     window.dashboardUIManager &&
     typeof window.dashboardUIManager.showCategoryDetails === "function"
   ) {
-    window.dashboardUIManager.showCategoryDetails(category.category_id);
-
-    setTimeout(() => {
+    // The category's questions may still be loading; wait for them before opening the sub-section
+    Promise.resolve(
+      window.dashboardUIManager.showCategoryDetails(category.category_id)
+    ).then(() => {
       if (
         typeof window.dashboardUIManager.showSubSectionDetails === "function"
       ) {
         window.dashboardUIManager.showSubSectionDetails(subSectionName);
       }
-    }, 300);
+    });
   }
 }
 
@@ -1317,7 +1318,7 @@ function loadDashboardData() {
         // Stats API error
         return null;
       }),
-    fetch("/api/dashboard/categories/")
+    fetchWithETag("/api/dashboard/categories/")
       .then((res) => {
         if (!res.ok) throw new Error(`Categories API failed: ${res.status}`);
         return res.json();
@@ -1830,7 +1831,7 @@ function loadFormData() {
   }
 
   // Load form data from real API endpoint
-  fetch("/api/form/sections/", {
+  fetchWithETag("/api/form/sections/", {
     method: "GET",
     headers: {
       "Content-Type": "application/json",
@@ -8,6 +8,7 @@ class FormDataManager {
         this.hasUnsavedData = false;
         this.completedSections = new Set(); // Track completed sections to avoid duplicate notifications
         this.autoRestoreEnabled = false; // Flag to control auto-restoration
+        this.answerVersions = new Map(); // question_id -> answer version last read from the server
         this.init();
     }
 
@@ -227,6 +228,11 @@ class FormDataManager {
                 Object.keys(response.answers).forEach(questionId => {
                     const data = response.answers[questionId];
                     
+                    // Remember the server version so our next save is a compare-and-set
+                    if (data && data.version !== undefined && data.version !== null) {
+                        this.answerVersions.set(questionId.toString(), data.version);
+                    }
+                    
                     // Skip concatenated data (already processed above)
                     const isConcatenatedData = data && data.value && data.value.includes(':') && /^\d+:/.test(data.value);
                     
@@ -1612,6 +1618,10 @@ class FormDataManager {
                 answer: answer,
                 user_id: user_id
             };
+            const knownVersion = this.answerVersions.get(questionId.toString());
+            if (knownVersion !== undefined) {
+                formData.version = knownVersion;
+            }
 
             // Try to submit to database first (DATABASE PRIORITY)
             try {
@@ -1623,9 +1633,17 @@ class FormDataManager {
                     body: JSON.stringify(formData)
                 });
 
+                if (response.status === 409) {
+                    // Someone else saved this answer after we loaded it - do not overwrite silently
+                    const result = await response.json();
+                    this.handleAnswerConflicts(result.conflicts || []);
+                    return { success: false, conflict: true, conflicts: result.conflicts || [] };
+                }
+
                 if (response.ok) {
                     const result = await response.json();
                     if (result.success) {
+                        this.rememberAnswerVersions(result.versions);
                         console.log(`Successfully saved to database: ${questionId}`);
                         // Mark as saved to database and remove from local storage
                         const storageKey = subQuestionId ? subQuestionId.toString() : questionId.toString();
@@ -1689,6 +1707,7 @@ class FormDataManager {
             // Send each answer individually to database
             let successCount = 0;
             let errorCount = 0;
+            let conflictCount = 0;
             let invalidQuestionIds = [];
             
             // Get user information from localStorage
@@ -1713,13 +1732,19 @@ class FormDataManager {
                         body: JSON.stringify({
                             question_id: answer.question_id,
                             answer: answer.answer,
-                            user_id: user_id
+                            user_id: user_id,
+                            version: this.answerVersions.get(answer.question_id.toString())
                         })
                     });
 
-                    if (response.ok) {
+                    if (response.status === 409) {
+                        const result = await response.json();
+                        this.handleAnswerConflicts(result.conflicts || []);
+                        conflictCount++;
+                    } else if (response.ok) {
                         const result = await response.json();
                         if (result.success) {
+                            this.rememberAnswerVersions(result.versions);
                             successCount++;
                             this.markAsSavedToDatabase(answer.question_id.toString());
                         } else {
@@ -1748,7 +1773,7 @@ class FormDataManager {
             }
             
             if (successCount > 0) {
-                this.showNotification(`${successCount} answers saved to database successfully${errorCount > 0 ? `, ${errorCount} failed` : ''}`, 'success');
+                this.showNotification(`${successCount} answers saved to database successfully${errorCount > 0 ? `, ${errorCount} failed` : ''}${conflictCount > 0 ? `, ${conflictCount} changed by someone else` : ''}`, 'success');
                 // Clear all locally saved answers after successful database save
                 this.clearAllLocalSavedAnswers();
                 return true;
@@ -1762,6 +1787,28 @@ class FormDataManager {
         }
     }
 
+    // Track answer versions returned by the server after a successful save
+    rememberAnswerVersions(versions) {
+        if (!versions) return;
+        Object.keys(versions).forEach(questionId => {
+            this.answerVersions.set(questionId.toString(), versions[questionId]);
+        });
+    }
+
+    // Another user saved these answers first: adopt the server value and keep ours out of the DB
+    handleAnswerConflicts(conflicts) {
+        conflicts.forEach(conflict => {
+            const questionId = conflict.question_id.toString();
+            if (conflict.current_version !== null && conflict.current_version !== undefined) {
+                this.answerVersions.set(questionId, conflict.current_version);
+            }
+            this.markAsUnsaved(questionId);
+        });
+        if (conflicts.length > 0) {
+            this.showNotification(`${conflicts.length} answer(s) were changed by another user. Reload the form to review them before saving again.`, 'warning');
+        }
+    }
+
     // Batch submit all form data
     async batchSubmitFormData() {
         try {
@@ -1,5 +1,39 @@
 // user_dash_api.js - FastAPI integration for user dashboard
 
+// Conditional GET: url -> { etag, body } of the last 200 response that carried an ETag
+const etagResponseCache = new Map();
+
+// Drop-in fetch() for GET endpoints that send ETags (form sections, answers, categories).
+// Sends If-None-Match and turns a 304 into the cached body, so callers always see a 200.
+async function fetchWithETag(url, init = {}) {
+    const method = (init.method || 'GET').toUpperCase();
+    if (method !== 'GET') {
+        return fetch(url, init);
+    }
+
+    const cached = etagResponseCache.get(url);
+    const headers = new Headers(init.headers || {});
+    if (cached) {
+        headers.set('If-None-Match', cached.etag);
+    }
+
+    const response = await fetch(url, { ...init, headers });
+    if (response.status === 304 && cached) {
+        return new Response(cached.body, {
+            status: 200,
+            headers: { 'Content-Type': 'application/json', 'ETag': cached.etag }
+        });
+    }
+
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+        etagResponseCache.set(url, { etag, body: await response.clone().text() });
+    }
+    return response;
+}
+
+window.fetchWithETag = fetchWithETag;
+
 class UserDashboardAPI {
     constructor() {
         this.baseURL = ''; // Use relative URLs to Django
@@ -19,7 +53,7 @@ class UserDashboardAPI {
         let success = false;
         
         try {
-            const response = await fetch(`${this.baseURL}${endpoint}`, {
+            const response = await fetchWithETag(`${this.baseURL}${endpoint}`, {
                 headers: this.getHeaders(),
                 credentials: 'include', // Include cookies for Django session
                 ...options
@@ -67,11 +101,54 @@ class UserDashboardAPI {
         return await this.apiCall('/api/form/sections/');
     }
 
+    // Get category list with progress only (questions are loaded per category)
+    async getFormSectionSummary() {
+        return await this.apiCall('/api/form/sections/summary/');
+    }
+
+    // Get one category's questions and answers
+    async getFormSection(categoryId) {
+        return await this.apiCall(`/api/form/sections/${categoryId}/`);
+    }
+
     // Get saved answers from database
     async getSavedAnswers() {
         return await this.apiCall('/api/form/answers/');
     }
 
+    // Upload an offline-filled XLSX/CSV of answers; resolves with the import task info
+    async importOfflineAnswers(file) {
+        const body = new FormData();
+        body.append('file', file);
+        try {
+            const response = await fetch(`${this.baseURL}/api/form/import/`, {
+                method: 'POST',
+                credentials: 'include',
+                body: body // browser sets the multipart boundary
+            });
+            return await response.json();
+        } catch (error) {
+            return { success: false, error: error.message };
+        }
+    }
+
+    // Poll an offline import until it finishes; onProgress receives each status payload
+    async waitForOfflineImport(taskId, onProgress = null, intervalMs = 1000) {
+        while (true) {
+            const status = await this.apiCall(`/api/form/import/${taskId}/`);
+            if (!status) {
+                return { success: false, error: 'Could not read import status' };
+            }
+            if (onProgress) {
+                onProgress(status);
+            }
+            if (['SUCCESS', 'FAILURE', 'REVOKED'].includes(status.state)) {
+                return status;
+            }
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+
     // Submit form answer (supports both regular questions and sub-questions)
     // This method now delegates to the enhanced FormDataManager for better offline/online handling
     async submitFormAnswer(questionId, answer, subQuestionId = null) {
@@ -431,10 +508,10 @@ class DashboardUIManager {
                 const categoryId = this.formState.currentCategory.category_id || this.formState.currentCategory.category_name;
                 
                 // Force navigation to category
-                this.showCategoryDetails(categoryId);
+                const categoryShown = this.showCategoryDetails(categoryId);
                 
                 // Step 2: Wait for category to load, then navigate to subsection
-                setTimeout(() => {
+                categoryShown.then(() => setTimeout(() => {
                     if (this.formState.currentSubSection) {
                         // Force navigation to subsection
                         this.showSubSectionDetails(this.formState.currentSubSection);
@@ -459,7 +536,7 @@ class DashboardUIManager {
                             }
                         }, 300); // Increased delay for subsection loading
                     }
-                }, 200); // Increased delay for category loading
+                }, 200)); // Increased delay for category loading
             }
         } catch (error) {
             // Error during form state restoration
@@ -733,7 +810,9 @@ class DashboardUIManager {
         this.loadingStates.formSections = true;
         
         try {
-            const sections = await this.api.getFormSections();
+            // First paint only needs the category list; questions come with showCategoryDetails()
+            const summary = await this.api.getFormSectionSummary();
+            const sections = summary ? summary.categories : await this.api.getFormSections();
             this.updateCache('formSections', sections);
             this.formSections = sections;
             
@@ -936,12 +1015,43 @@ class DashboardUIManager {
         // No need to duplicate the call here
     }
 
-    showCategoryDetails(categoryId) {
+    // Load a category's questions into formSections unless already there; resolves with the category
+    async ensureCategoryLoaded(category) {
+        if (Array.isArray(category.questions)) {
+            return category;
+        }
+        if (!category.loading) {
+            category.loading = this.api.getFormSection(category.category_id).then(section => {
+                if (section) {
+                    Object.assign(category, section);
+                }
+                return category;
+            }).finally(() => {
+                delete category.loading;
+            });
+        }
+        return category.loading;
+    }
+
+    // Warm the category the server suggested next, when the browser is idle
+    prefetchCategory(prefetch) {
+        if (!prefetch || !this.formSections) return;
+        const next = this.formSections.find(c => c.category_id == prefetch.category_id);
+        if (!next || Array.isArray(next.questions)) return;
+        const load = () => this.ensureCategoryLoaded(next);
+        if (window.requestIdleCallback) {
+            window.requestIdleCallback(load, { timeout: 2000 });
+        } else {
+            setTimeout(load, 200);
+        }
+    }
+
+    async showCategoryDetails(categoryId) {
         const container = document.querySelector('.form-container');
         if (!container) return;
 
         // Find the category data by ID or name
-        const category = this.formSections.find(c => 
+        let category = this.formSections.find(c => 
             c.category_id == categoryId || 
             c.category_name === categoryId || 
             c.name === categoryId
@@ -951,6 +1061,25 @@ class DashboardUIManager {
             return;
         }
 
+        if (!Array.isArray(category.questions)) {
+            container.innerHTML = `
+                <div class="loading-message">
+                    <i class="fas fa-spinner fa-spin"></i>
+                    <p>Loading ${category.category_name}...</p>
+                </div>
+            `;
+            category = await this.ensureCategoryLoaded(category);
+            if (!Array.isArray(category.questions)) {
+                container.innerHTML = `
+                    <div class="loading-message">
+                        <i class="fas fa-exclamation-triangle"></i>
+                        <p>Failed to load form data. Please refresh the page or try again.</p>
+                    </div>
+                `;
+                return;
+            }
+        }
+
         this.currentCategory = category;
         this.currentSubSection = null;
         this.currentTopic = null;
@@ -993,6 +1122,8 @@ class DashboardUIManager {
 
         // Add sub-section click event listeners
         this.attachSubSectionEventListeners();
+
+        this.prefetchCategory(category.prefetch);
     }
 
     renderSubSectionsList(groupedQuestions) {
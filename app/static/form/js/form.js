@@ -214,7 +214,6 @@ class FormCoordinator {
       const payload = {
         category_id: categoryId,
         name: topicName,
-        display_order: 1,
         questions: preparedQuestions,
         can_skip: topicCanSkip,
       };
@@ -250,7 +249,6 @@ class FormCoordinator {
       question_text: q.question_text || "",
       answer_type: q.answer_type || "text",
       is_required: q.is_required || false,
-      display_order: q.display_order || 1,
       choices: (q.choices || []).filter((c) => c && c.trim()),
       answer_description: q.answer_description || "",
       sub_questions: [],
@@ -28,17 +28,11 @@ class QuestionManager {
   addNewQuestion() {
     this.syncQuestionsFromDOM();
     
-    const usedOrders = this.currentTopic.questions.map(
-      (q) => q.displayOrder || q.display_order
-    );
-    let nextOrder = 1;
-    while (usedOrders.includes(nextOrder)) nextOrder++;
-    
+    // No display_order: the server appends new questions after the last one
     const newQuestion = {
       question_text: "",
       answer_type: "number", // default to 'number'
       is_required: true,
-      display_order: nextOrder,
       choices: [],
       answer_description: "",
     };
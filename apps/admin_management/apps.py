@@ -5,3 +5,7 @@ class AdminConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.admin_management'
     verbose_name = 'Admin Management'
+
+    def ready(self):
+        # Connects the AdminUser signals that invalidate cached access scopes
+        from . import scope  # noqa: F401
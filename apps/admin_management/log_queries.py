@@ -0,0 +1,201 @@
+"""
+Logs page queries
+Each tab of the logs page is one LogTab: a base filter, search columns and a row
+serializer over AuditLog or LoginAttempt. Tabs are read a page at a time with keyset
+pagination on (timestamp, id), so no tab runs COUNT(*) or OFFSET scans, and the
+summary figures come from the log rollups (apps.utils.log_rollups), cached briefly.
+"""
+
+import base64
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import dateformat, timezone
+
+from apps.core.models import AdminUser, AuditLog, LoginAttempt
+from apps.utils.log_rollups import LogRollups
+
+from .log_search import search_q
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+EDUCATIONAL_RESOURCES = ['question', 'answer', 'form', 'category', 'topic']
+ADMIN_RESOURCES = ['admin_user', 'admin_permission', 'users_school']
+SYSTEM_RESOURCES = ['school', 'region', 'division', 'district', 'report', 'data_import']
+HIGH_SEVERITIES = ['high', 'critical']
+
+# Failed attempts from one IP within the window that raise a security alert
+SUSPICIOUS_IP_ATTEMPTS = 3
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def date_window(params):
+    """(start, end) for the page's date_range/start_date/end_date parameters"""
+    date_range = params.get('date_range', 'month')
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    now = timezone.now()
+    if date_range == 'today':
+        return now.replace(hour=0, minute=0, second=0, microsecond=0), now
+    if date_range == 'yesterday':
+        yesterday = now - timedelta(days=1)
+        return (yesterday.replace(hour=0, minute=0, second=0, microsecond=0),
+                yesterday.replace(hour=23, minute=59, second=59, microsecond=999999))
+    if date_range == 'week':
+        return now - timedelta(days=7), now
+    if date_range == 'custom' and start_date and end_date:
+        return (timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d')),
+                timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)))
+    return now - timedelta(days=30), now
+
+
+def _display_time(value):
+    return dateformat.format(timezone.localtime(value), 'M d, Y H:i')
+
+
+def login_row(attempt):
+    return {
+        'id': attempt.id,
+        'username': attempt.username,
+        'success': attempt.success,
+        'timestamp': attempt.timestamp.isoformat(),
+        'time_display': _display_time(attempt.timestamp),
+        'ip_address': attempt.ip_address,
+        'location': attempt.location,
+        'user_agent': attempt.user_agent,
+        'failure_reason': attempt.failure_reason,
+        'is_suspicious': attempt.is_suspicious,
+    }
+
+
+def audit_row(log):
+    return {
+        'id': log.id,
+        'user': log.user.username if log.user else None,
+        'action_type': log.action_type,
+        'resource_type': log.resource_type,
+        'resource_id': log.resource_id,
+        'description': log.description,
+        'severity': log.severity,
+        'success': log.success,
+        'ip_address': log.ip_address,
+        'timestamp': log.timestamp.isoformat(),
+        'time_display': _display_time(log.timestamp),
+    }
+
+
+class LogTab:
+    """One tab of the logs page"""
+
+    __slots__ = ('model', 'where', 'search_fields', 'related', 'serialize')
+
+    def __init__(self, model, where, search_fields, serialize, related=()):
+        # search_fields: icontains columns for when full-text search is unavailable
+        self.model = model
+        self.where = where
+        self.search_fields = search_fields
+        self.serialize = serialize
+        self.related = related
+
+    def queryset(self, start, end, search=''):
+        queryset = self.model.objects.filter(self.where, timestamp__range=(start, end))
+        if search:
+            queryset = queryset.filter(search_q(self.model, search, self.search_fields))
+        if self.related:
+            queryset = queryset.select_related(*self.related)
+        return queryset.order_by('-timestamp', '-id')
+
+    def page(self, queryset, cursor=None, limit=PAGE_SIZE):
+        """(rows, next_cursor) for the page after `cursor`; next_cursor is None on the last page"""
+        if cursor:
+            timestamp, last_id = decode_cursor(cursor)
+            queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=last_id))
+        items = list(queryset[:limit + 1])
+        next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+        return [self.serialize(item) for item in items[:limit]], next_cursor
+
+
+_AUDIT_SEARCH = ('user__username', 'action_type', 'description')
+
+LOG_TABS = {
+    'login_history': LogTab(LoginAttempt, Q(), ('username', 'ip_address', 'location'), login_row),
+    'activity_logs': LogTab(AuditLog, Q(), _AUDIT_SEARCH + ('resource_type',), audit_row, ('user',)),
+    'audit_logs': LogTab(AuditLog, Q(severity__in=HIGH_SEVERITIES), _AUDIT_SEARCH, audit_row, ('user',)),
+    'failed_logins': LogTab(LoginAttempt, Q(success=False), ('username', 'ip_address', 'failure_reason'), login_row),
+    'educational_logs': LogTab(AuditLog, Q(resource_type__in=EDUCATIONAL_RESOURCES), _AUDIT_SEARCH, audit_row, ('user',)),
+    'admin_logs': LogTab(AuditLog, Q(resource_type__in=ADMIN_RESOURCES), _AUDIT_SEARCH, audit_row, ('user',)),
+    'system_logs': LogTab(AuditLog, Q(resource_type__in=SYSTEM_RESOURCES), _AUDIT_SEARCH, audit_row, ('user',)),
+}
+
+
+def encode_cursor(item):
+    raw = f'{item.timestamp.isoformat()}|{item.id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, last_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(last_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from e
+
+
+def log_summary(params):
+    """
+    Figures shown above the tabs for the page's date window, cached for
+    LOGS_SUMMARY_CACHE_SECONDS (keyed by the window parameters, not the search).
+    """
+    key = 'logs_summary:{}:{}:{}'.format(
+        params.get('date_range', 'month'), params.get('start_date') or '', params.get('end_date') or ''
+    )
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
+
+    start, end = date_window(params)
+    # Pre-aggregated counts: the cost no longer grows with the number of log rows
+    audit = LogRollups.counts('audit_log', start, end, ('action', 'resource_type', 'severity'))
+    logins = LogRollups.counts('login', start, end, ('ip_address', 'success'))
+
+    by_action, by_resource, high_severity = Counter(), Counter(), 0
+    for (action, resource_type, severity), n in audit.items():
+        by_action[action] += n
+        by_resource[resource_type] += n
+        if severity in HIGH_SEVERITIES:
+            high_severity += n
+
+    failed_by_ip = Counter()
+    for (ip_address, success), n in logins.items():
+        if not success:
+            failed_by_ip[ip_address] += n
+    suspicious_ips = [(ip, n) for ip, n in failed_by_ip.most_common(20) if n >= SUSPICIOUS_IP_ATTEMPTS]
+
+    summary = {
+        'total_users': AdminUser.objects.filter(admin_level='school').count(),
+        'activity_summary': {f'{action}_actions': by_action[action] for action in ('create', 'update', 'delete')},
+        'security_alerts': [
+            {
+                'type': 'critical',
+                'title': 'Multiple Failed Login Attempts',
+                'details': f"IP: {ip_address} has {attempts} failed attempts",
+                'time': 'Recent',
+            }
+            for ip_address, attempts in suspicious_ips
+        ],
+        'successful_logins': sum(n for (ip_address, success), n in logins.items() if success),
+        'failed_login_count': sum(failed_by_ip.values()),
+        'audit_log_count': high_severity,
+        'educational_log_count': sum(by_resource[name] for name in EDUCATIONAL_RESOURCES),
+        'admin_log_count': sum(by_resource[name] for name in ADMIN_RESOURCES),
+        'system_log_count': sum(by_resource[name] for name in SYSTEM_RESOURCES),
+    }
+    cache.set(key, summary, getattr(settings, 'LOGS_SUMMARY_CACHE_SECONDS', 30))
+    return summary
@@ -0,0 +1,171 @@
+"""
+Log search
+Text search over AuditLog, LoginAttempt and AdminActivityLog uses MySQL FULLTEXT
+indexes built with the ngram parser (migration 0024), so substrings inside words still
+match without scanning the table. IP-looking terms use a prefix match on the indexed
+ip_address column and usernames are resolved to ids first. Other databases, or
+LOG_SEARCH_FULLTEXT = False, or tables without the index (e.g. before migration 0024)
+fall back to the former icontains filters. AuditTrail has no
+text columns (only JSON old/new values), so it is not searchable here.
+"""
+
+import logging
+import re
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q
+from django.db.models.lookups import GreaterThan
+
+from apps.core.models import AdminActivityLog, AdminUser, AuditLog, LoginAttempt
+
+logger = logging.getLogger(__name__)
+
+r = redis.Redis(
+    host=getattr(settings, 'REDIS_HOST', 'localhost'),
+    port=getattr(settings, 'REDIS_PORT', 6379),
+    db=getattr(settings, 'REDIS_DB', 0)
+)
+
+# Must match the FULLTEXT index column lists exactly (MATCH requires it)
+FULLTEXT_COLUMNS = {
+    AuditLog: ('description', 'action_type', 'resource_type'),
+    LoginAttempt: ('username', 'location', 'failure_reason'),
+    AdminActivityLog: ('action', 'resource_type', 'resource_id'),
+}
+
+# How each model's rows are tied to a user account, for username matches
+USER_COLUMNS = {
+    AuditLog: ('user_id', get_user_model()),
+    AdminActivityLog: ('admin_user_id', AdminUser),
+}
+
+# Usernames a term may expand to before the username part of a search is dropped
+MAX_USER_MATCHES = 50
+
+IP_PATTERN = re.compile(r'^[0-9a-fA-F]*[.:][0-9a-fA-F.:]*$')
+TOKEN_PATTERN = re.compile(r'[^\s"+\-<>()~*@]+')
+
+
+class Match(Func):
+    """MATCH (columns) AGAINST (query IN BOOLEAN MODE): relevance > 0 for matching rows"""
+
+    output_field = FloatField()
+
+    def __init__(self, *columns, query):
+        super().__init__(*[F(column) for column in columns])
+        self.query = query
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(
+            compiler, connection, template='MATCH (%(expressions)s) AGAINST (%%s IN BOOLEAN MODE)', **extra_context
+        )
+        return sql, (*params, self.query)
+
+
+FULLTEXT_TABLES_KEY = 'log_search:fulltext_tables'
+FULLTEXT_TABLES_TTL = 300
+
+
+def fulltext_tables():
+    """
+    Tables that currently have a FULLTEXT index, shared through Redis for a few minutes
+    so every worker sees the same answer (read from information_schema without Redis)
+    """
+    try:
+        cached = r.get(FULLTEXT_TABLES_KEY)
+        if cached is not None:
+            return [table for table in cached.decode().split(',') if table]
+    except redis.RedisError as e:
+        logger.warning(f"FULLTEXT table list unavailable from Redis: {e}")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT DISTINCT TABLE_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND INDEX_TYPE = 'FULLTEXT'"
+        )
+        tables = [row[0] for row in cursor.fetchall()]
+    try:
+        r.setex(FULLTEXT_TABLES_KEY, FULLTEXT_TABLES_TTL, ','.join(tables))
+    except redis.RedisError:
+        pass
+    return tables
+
+
+def fulltext_enabled(model):
+    return (
+        model in FULLTEXT_COLUMNS
+        and connection.vendor == 'mysql'
+        and getattr(settings, 'LOG_SEARCH_FULLTEXT', True)
+        and model._meta.db_table in fulltext_tables()
+    )
+
+
+def boolean_query(term):
+    """
+    Every word of `term` as a required phrase ('+"word"'), or None when a word is shorter
+    than the ngram token size and the index cannot answer it.
+    """
+    words = TOKEN_PATTERN.findall(term)
+    min_length = getattr(settings, 'LOG_SEARCH_NGRAM_SIZE', 2)
+    if not words or any(len(word) < min_length for word in words):
+        return None
+    return ' '.join(f'+"{word}"' for word in words)
+
+
+def _user_ids(model, term):
+    column, user_model = USER_COLUMNS[model]
+    ids = list(
+        user_model.objects.filter(username__istartswith=term)
+        .values_list('pk', flat=True)[:MAX_USER_MATCHES + 1]
+    )
+    return column, ids if len(ids) <= MAX_USER_MATCHES else []
+
+
+def search_q(model, term, fallback_fields):
+    """
+    Predicate for rows of `model` matching `term`. `fallback_fields` are the icontains
+    columns used when full-text search is unavailable.
+    """
+    term = term.strip()
+    if not term:
+        return Q()
+    if IP_PATTERN.match(term):
+        return Q(ip_address__startswith=term)
+    query = boolean_query(term) if fulltext_enabled(model) else None
+    if query is None:
+        match = Q()
+        for field in fallback_fields:
+            match |= Q(**{f'{field}__icontains': term})
+        return match
+
+    # "MATCH(...) > 0" rather than a bare boolean expression: Django would compare that
+    # to TRUE (= 1) on MySQL, and the relevance score is rarely exactly 1
+    match = Q(GreaterThan(Match(*FULLTEXT_COLUMNS[model], query=query), 0))
+    if model in USER_COLUMNS:
+        column, ids = _user_ids(model, term)
+        if ids:
+            match |= Q(**{f'{column}__in': ids})
+    return match
+
+
+def ranked(queryset, term):
+    """Matching rows ordered by relevance, then newest first (icontains fallback: newest first)"""
+    model = queryset.model
+    query = boolean_query(term) if fulltext_enabled(model) else None
+    if query is None or IP_PATTERN.match(term.strip()):
+        return queryset.order_by('-timestamp')
+    return queryset.annotate(relevance=Match(*FULLTEXT_COLUMNS[model], query=query)).order_by('-relevance', '-timestamp')
+
+
+def activity_row(log):
+    return {
+        'id': log.log_id,
+        'admin_user': log.admin_user.username,
+        'action': log.action,
+        'resource_type': log.resource_type,
+        'resource_id': log.resource_id,
+        'ip_address': log.ip_address,
+        'timestamp': log.timestamp.isoformat(),
+    }
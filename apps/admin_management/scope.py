@@ -0,0 +1,237 @@
+"""
+Compact admin access scope
+An admin's reach is fully described by their level, the four hierarchy ids of their
+assignment and their permission flags, so that is all AccessScope holds (permissions
+as a bitmask). It is cached per admin in Redis, dropped whenever the AdminUser row is
+saved or deleted, and turned into one WHERE predicate (a column comparison, at most one
+join) instead of materialized IN (...) lists of every reachable division/district/school.
+"""
+
+import json
+import logging
+
+import redis
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+
+from apps.core.models import AdminUser, District, Division, Region, School
+
+logger = logging.getLogger(__name__)
+
+r = redis.Redis(
+    host=getattr(settings, 'REDIS_HOST', 'localhost'),
+    port=getattr(settings, 'REDIS_PORT', 6379),
+    db=getattr(settings, 'REDIS_DB', 0)
+)
+
+SCOPE_KEY_PREFIX = 'admin_scope:'
+
+PERMISSION_BITS = {
+    'can_create_users': 1,
+    'can_manage_users': 2,
+    'can_set_deadlines': 4,
+    'can_approve_submissions': 8,
+    'can_view_system_logs': 16,
+}
+
+LEVELS = ('region', 'division', 'district', 'school')
+
+SCOPE_NAMES = {
+    'central': 'nationwide',
+    'region': 'regional',
+    'division': 'divisional',
+    'district': 'district',
+    'school': 'school',
+}
+
+# Column holding each hierarchy level for the geography models; other models are
+# assumed to carry region_id/division_id/district_id/school_id like AdminUser
+HIERARCHY_FIELDS = {
+    Region: {'region': 'id'},
+    Division: {'region': 'region_id', 'division': 'id'},
+    District: {'region': 'division__region_id', 'division': 'division_id', 'district': 'id'},
+    School: {'region': 'region_id', 'division': 'division_id', 'district': 'district_id', 'school': 'id'},
+}
+DEFAULT_FIELDS = {level: f'{level}_id' for level in LEVELS}
+
+
+class AccessScope:
+    """What one admin may see and do; small enough to cache and pass around freely"""
+
+    __slots__ = ('admin_id', 'username', 'admin_level', 'region_id', 'division_id',
+                 'district_id', 'school_id', 'permission_bits', 'coverage')
+
+    def __init__(self, admin_id, username, admin_level, region_id=None, division_id=None,
+                 district_id=None, school_id=None, permission_bits=0, coverage=''):
+        self.admin_id = admin_id
+        self.username = username
+        self.admin_level = admin_level
+        self.region_id = region_id
+        self.division_id = division_id
+        self.district_id = district_id
+        self.school_id = school_id
+        self.permission_bits = permission_bits
+        self.coverage = coverage
+
+    @classmethod
+    def from_admin(cls, admin):
+        bits = 0
+        for name, bit in PERMISSION_BITS.items():
+            if getattr(admin, name, False):
+                bits |= bit
+        return cls(
+            admin_id=admin.admin_id,
+            username=admin.username,
+            admin_level=admin.admin_level,
+            region_id=admin.region_id,
+            division_id=admin.division_id,
+            district_id=admin.district_id,
+            school_id=admin.school_id,
+            permission_bits=bits,
+            coverage=cls._coverage(admin),
+        )
+
+    @staticmethod
+    def _coverage(admin):
+        if admin.admin_level == 'central':
+            return 'All regions, divisions, districts, and schools'
+        if admin.admin_level == 'school':
+            return f'School: {admin.school.school_name}' if admin.school else 'No school assigned'
+        area = getattr(admin, admin.admin_level, None)
+        label = admin.admin_level.capitalize()
+        return f'{label}: {area.name}' if area else f'No {admin.admin_level} assigned'
+
+    def to_cache(self):
+        return json.dumps([getattr(self, name) for name in self.__slots__])
+
+    @classmethod
+    def from_cache(cls, payload):
+        return cls(*json.loads(payload))
+
+    # --- permissions ---
+
+    def has_permission(self, permission):
+        """`manage_users` or `can_manage_users`; names without a flag are granted to any active admin"""
+        name = permission if permission.startswith('can_') else f'can_{permission}'
+        bit = PERMISSION_BITS.get(name)
+        return bit is None or bool(self.permission_bits & bit)
+
+    @property
+    def permissions(self):
+        return {name: bool(self.permission_bits & bit) for name, bit in PERMISSION_BITS.items()}
+
+    # --- geography ---
+
+    @property
+    def is_nationwide(self):
+        return self.admin_level == 'central'
+
+    def contains(self, region_id=None, division_id=None, district_id=None, school_id=None):
+        """Same rule as AdminUser.can_access_area, without loading the admin"""
+        if self.is_nationwide:
+            return True
+        if self.admin_level not in LEVELS:
+            return False
+        requested = {'region': region_id, 'division': division_id, 'district': district_id, 'school': school_id}
+        return getattr(self, f'{self.admin_level}_id') == requested[self.admin_level]
+
+    def q(self, model=None, prefix=''):
+        """
+        Predicate limiting `model` rows (or rows related through `prefix`, e.g. 'admin_user__')
+        to this scope. Nationwide admins get an empty Q; an admin without an assignment
+        at their level matches nothing.
+        """
+        if self.is_nationwide:
+            return Q()
+        fields = HIERARCHY_FIELDS.get(model, DEFAULT_FIELDS)
+        level = self.admin_level
+        if level not in fields:
+            # The model sits above the admin's level (e.g. a school admin and Districts):
+            # match the admin's own ancestor at the model's level
+            level = [name for name in LEVELS if name in fields][-1]
+        value = getattr(self, f'{level}_id', None)
+        if value is None:
+            return Q(pk__in=[])
+        return Q(**{f'{prefix}{fields[level]}': value})
+
+    def filter(self, queryset, prefix=''):
+        return queryset.filter(self.q(queryset.model, prefix))
+
+    def hierarchy(self):
+        return {f'{level}_id': getattr(self, f'{level}_id') for level in LEVELS}
+
+    def as_dict(self):
+        """Template/JSON shape of the former get_user_access_scope result (no id lists)"""
+        data = {
+            'admin_level': self.admin_level,
+            'admin_id': self.admin_id,
+            'username': self.username,
+            'permissions': self.permissions,
+            'scope': SCOPE_NAMES.get(self.admin_level, 'none'),
+            'coverage': self.coverage,
+        }
+        data.update(self.hierarchy())
+        return data
+
+
+class AccessScopeCache:
+    """Per-admin AccessScope cache (Redis, then the admin_user row)"""
+
+    @staticmethod
+    def timeout():
+        return getattr(settings, 'ADMIN_SCOPE_CACHE_SECONDS', 900)
+
+    @staticmethod
+    def get(admin_id):
+        """AccessScope of an active admin, or None"""
+        if not admin_id:
+            return None
+        found, scope = AccessScopeCache.peek(admin_id)
+        if found:
+            return scope
+        admin = (
+            AdminUser.objects.select_related('region', 'division', 'district', 'school')
+            .filter(admin_id=admin_id).first()
+        )
+        return AccessScopeCache.store(admin_id, admin)
+
+    @staticmethod
+    def peek(admin_id):
+        """(found, scope) from Redis only; found is False on a miss or Redis error"""
+        try:
+            payload = r.get(f'{SCOPE_KEY_PREFIX}{admin_id}')
+        except redis.RedisError as e:
+            logger.warning(f"Admin scope cache unavailable: {e}")
+            return False, None
+        if payload is None:
+            return False, None
+        return True, (AccessScope.from_cache(payload) if payload != b'-' else None)
+
+    @staticmethod
+    def store(admin_id, admin):
+        """Cache the scope of an already loaded AdminUser (None/inactive caches a miss)"""
+        scope = AccessScope.from_admin(admin) if admin is not None and admin.status == 'active' else None
+        try:
+            # Unknown/inactive admins are cached too ('-'), so probing ids stays cheap
+            r.set(f'{SCOPE_KEY_PREFIX}{admin_id}', scope.to_cache() if scope else '-',
+                  ex=AccessScopeCache.timeout())
+        except redis.RedisError:
+            pass
+        return scope
+
+    @staticmethod
+    def invalidate(admin_id):
+        try:
+            r.delete(f'{SCOPE_KEY_PREFIX}{admin_id}')
+        except redis.RedisError as e:
+            logger.warning(f"Could not invalidate admin scope {admin_id}: {e}")
+
+
+def _invalidate_admin_scope(sender, instance, **kwargs):
+    AccessScopeCache.invalidate(instance.admin_id)
+
+
+# Assignment, status and permission flags all live on the AdminUser row
+post_save.connect(_invalidate_admin_scope, sender=AdminUser, dispatch_uid='admin_scope_save')
+post_delete.connect(_invalidate_admin_scope, sender=AdminUser, dispatch_uid='admin_scope_delete')
@@ -10,6 +10,9 @@ from django.db import transaction
 import re
 import json
 from apps.core.models import AdminUser, AdminActivityLog, AdminUserPermission, FormDeadline, UserCreationRequest
+from .scope import AccessScopeCache
+from apps.core.identity import get_identity
+from apps.utils.audit_writer import AuditWriter
 
 
 class AdminUserManager:
@@ -64,74 +67,15 @@ class AdminUserManager:
     
     @staticmethod
     def get_user_access_scope(admin_id):
-        """Get comprehensive access scope for an admin user"""
-        try:
-            admin = AdminUser.objects.select_related('region', 'division', 'district', 'school').get(
-                admin_id=admin_id, status='active'
-            )
-        except AdminUser.DoesNotExist:
+        """
+        Access scope of an admin as a dict for templates and JSON: level, hierarchy ids,
+        permissions and coverage (cached; see apps.admin_management.scope). Querysets should
+        be limited with AccessScope.q()/filter() rather than lists of reachable ids.
+        """
+        scope = AccessScopeCache.get(admin_id)
+        if scope is None:
             return {'scope': 'none', 'error': 'Admin user not found'}
-        
-        scope_data = {
-            'admin_level': admin.admin_level,
-            'admin_id': admin.admin_id,
-            'username': admin.username,
-            'permissions': {
-                'can_create_users': admin.can_create_users,
-                'can_manage_users': admin.can_manage_users,
-                'can_set_deadlines': admin.can_set_deadlines,
-                'can_approve_submissions': admin.can_approve_submissions,
-                'can_view_system_logs': admin.can_view_system_logs,
-            }
-        }
-        
-        if admin.admin_level == 'central':
-            scope_data.update({
-                'scope': 'nationwide',
-                'coverage': 'All regions, divisions, districts, and schools',
-                'region_ids': 'all',
-                'division_ids': 'all',
-                'district_ids': 'all',
-                'school_ids': 'all'
-            })
-        elif admin.admin_level == 'region':
-            scope_data.update({
-                'scope': 'regional',
-                'coverage': f'Region: {admin.region.name}' if admin.region else 'No region assigned',
-                'region_id': admin.region_id,
-                'accessible_divisions': list(admin.region.division_set.values_list('id', flat=True)) if admin.region else [],
-                'accessible_districts': list(admin.region.district_set.values_list('id', flat=True)) if admin.region else [],
-                'accessible_schools': list(admin.region.school_set.values_list('id', flat=True)) if admin.region else []
-            })
-        elif admin.admin_level == 'division':
-            scope_data.update({
-                'scope': 'divisional',
-                'coverage': f'Division: {admin.division.name}' if admin.division else 'No division assigned',
-                'region_id': admin.region_id,
-                'division_id': admin.division_id,
-                'accessible_districts': list(admin.division.district_set.values_list('id', flat=True)) if admin.division else [],
-                'accessible_schools': list(admin.division.school_set.values_list('id', flat=True)) if admin.division else []
-            })
-        elif admin.admin_level == 'district':
-            scope_data.update({
-                'scope': 'district',
-                'coverage': f'District: {admin.district.name}' if admin.district else 'No district assigned',
-                'region_id': admin.region_id,
-                'division_id': admin.division_id,
-                'district_id': admin.district_id,
-                'accessible_schools': list(admin.district.school_set.values_list('id', flat=True)) if admin.district else []
-            })
-        elif admin.admin_level == 'school':
-            scope_data.update({
-                'scope': 'school',
-                'coverage': f'School: {admin.school.school_name}' if admin.school else 'No school assigned',
-                'region_id': admin.region_id,
-                'division_id': admin.division_id,
-                'district_id': admin.district_id,
-                'school_id': admin.school_id
-            })
-        
-        return scope_data
+        return scope.as_dict()
     
     @staticmethod
     @transaction.atomic
@@ -230,8 +174,10 @@ class AdminUserManager:
     @staticmethod
     def can_access_user(admin_id, target_user_id):
         """Check if an admin can access/manage another admin user"""
+        admin = AccessScopeCache.get(admin_id)
+        if admin is None:
+            return False
         try:
-            admin = AdminUser.objects.get(admin_id=admin_id, status='active')
             target_user = AdminUser.objects.get(admin_id=target_user_id)
         except AdminUser.DoesNotExist:
             return False
@@ -333,9 +279,8 @@ class PermissionChecker:
         Check if admin has permission to perform action on resource
         resource_location: dict with region_id, division_id, district_id, school_id
         """
-        try:
-            admin = AdminUser.objects.get(admin_id=admin_id, status='active')
-        except AdminUser.DoesNotExist:
+        scope = AccessScopeCache.get(admin_id)
+        if scope is None:
             return False, "Admin user not found"
         
         # Check basic permission flags
@@ -347,30 +292,29 @@ class PermissionChecker:
         }
         
         required_permission = permission_map.get(resource_type)
-        if required_permission and not getattr(admin, required_permission, False):
+        if required_permission and not scope.has_permission(required_permission):
             return False, f"Missing {required_permission} permission"
         
         # Check geographic scope
         if resource_location:
-            if not admin.can_access_area(**resource_location):
+            if not scope.contains(**resource_location):
                 return False, "Resource outside admin's geographic scope"
         
         return True, "Access granted"
     
     @staticmethod
     def get_accessible_areas(admin_id):
-        """Get all areas this admin can access"""
-        scope_data = AdminUserManager.get_user_access_scope(admin_id)
-        
-        if scope_data.get('scope') == 'none':
+        """
+        Areas this admin can access, as the admin's level plus hierarchy ids (None for
+        nationwide). Use AccessScope.q(Model) to turn it into a queryset filter.
+        """
+        scope = AccessScopeCache.get(admin_id)
+        if scope is None:
             return {}
         
-        return {
-            'regions': scope_data.get('region_ids', []),
-            'divisions': scope_data.get('accessible_divisions', []),
-            'districts': scope_data.get('accessible_districts', []),
-            'schools': scope_data.get('accessible_schools', [])
-        }
+        areas = {'admin_level': scope.admin_level, 'nationwide': scope.is_nationwide}
+        areas.update(scope.hierarchy())
+        return areas
 
 
 class AuditLogger:
@@ -378,8 +322,9 @@ class AuditLogger:
     
     @staticmethod
     def log_activity(admin_id, action, resource_type, resource_id=None, details=None, ip_address=None, user_agent=None):
-        """Log admin activity with comprehensive details"""
-        return AdminActivityLog.objects.create(
+        """Log admin activity with comprehensive details (queued, see AuditWriter)"""
+        AuditWriter.submit(
+            AdminActivityLog,
             admin_user_id=admin_id,
             action=action,
             resource_type=resource_type,
@@ -391,27 +336,31 @@ class AuditLogger:
     
     @staticmethod
     def get_activity_summary(admin_id, days=30):
-        """Get activity summary for an admin user"""
+        """Get activity summary for an admin user (from the log rollups)"""
         from datetime import timedelta
-        from django.db.models import Count
+        from apps.utils.log_rollups import LogRollups
         
-        cutoff_date = timezone.now() - timedelta(days=days)
-        
-        activities = AdminActivityLog.objects.filter(
-            admin_user_id=admin_id,
-            timestamp__gte=cutoff_date
-        ).values('action').annotate(count=Count('action')).order_by('-count')
+        now = timezone.now()
+        activities = LogRollups.counts('admin_activity', now - timedelta(days=days), now, ('action',), actor_id=admin_id)
         
         return {
-            'total_activities': AdminActivityLog.objects.filter(
-                admin_user_id=admin_id, 
-                timestamp__gte=cutoff_date
-            ).count(),
-            'activity_breakdown': list(activities),
+            'total_activities': sum(activities.values()),
+            'activity_breakdown': [
+                {'action': action, 'count': count} for (action,), count in activities.most_common()
+            ],
             'period_days': days
         }
 
 
+PERMISSION_DENIED_MESSAGES = {
+    'create_users': "User creation permission required",
+    'manage_users': "User management permission required",
+    'set_deadlines': "Deadline setting permission required",
+    'approve_submissions': "Submission approval permission required",
+    'view_system_logs': "System log viewing permission required",
+}
+
+
 # Decorators for permission checking
 def require_admin_permission(permission_type, resource_type=None):
     """Decorator to check admin permissions before executing a function"""
@@ -426,27 +375,20 @@ def require_admin_permission(permission_type, resource_type=None):
                 request.session['admin_username'] = 'admin'
                 return func(request, *args, **kwargs)
             
-            admin_id = request.session.get('admin_id')
-            if not admin_id:
+            identity = get_identity(request)
+            if not identity.admin_id:
                 raise PermissionDenied("Admin authentication required")
             
-            # Get admin user and check permissions
-            try:
-                admin = AdminUser.objects.get(admin_id=admin_id, status='active')
-            except AdminUser.DoesNotExist:
+            # Request-scoped, cached scope: no admin_user query per call
+            scope = identity.scope
+            if scope is None:
                 raise PermissionDenied("Admin user not found or inactive")
             
             # Check specific permission
-            if permission_type == 'create_users' and not admin.can_create_users:
-                raise PermissionDenied("User creation permission required")
-            elif permission_type == 'manage_users' and not admin.can_manage_users:
-                raise PermissionDenied("User management permission required")
-            elif permission_type == 'set_deadlines' and not admin.can_set_deadlines:
-                raise PermissionDenied("Deadline setting permission required")
-            elif permission_type == 'approve_submissions' and not admin.can_approve_submissions:
-                raise PermissionDenied("Submission approval permission required")
-            elif permission_type == 'view_system_logs' and not admin.can_view_system_logs:
-                raise PermissionDenied("System log viewing permission required")
+            if not scope.has_permission(permission_type):
+                raise PermissionDenied(PERMISSION_DENIED_MESSAGES.get(
+                    permission_type, "Permission required"
+                ))
             
             return func(request, *args, **kwargs)
         return wrapper
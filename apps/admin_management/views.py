@@ -4,16 +4,15 @@ Replaces the basic admin views with comprehensive permission checking
 """
 
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST, require_http_methods
 from django.db import transaction
 from django.db.models import Q, Count
 from django.utils import timezone
 from django.core.paginator import Paginator
+from django.utils.functional import SimpleLazyObject
 import json
-import bcrypt
-import csv
 import io
 
 from apps.core.models import (
@@ -27,6 +26,22 @@ from .utils import (
     require_admin_permission, log_admin_activity
 )
 from apps.utils.enhanced_logging import EnhancedSystemLogger
+from apps.core.fragments import fragment_context
+from apps.core.login_pipeline import PasswordHasher
+from apps.core.session_registry import SessionRegistry
+from apps.core.identity import get_identity
+from apps.utils.audit_writer import AuditWriter
+from .log_queries import (
+    LOG_TABS, MAX_PAGE_SIZE, PAGE_SIZE, InvalidCursor, audit_row, date_window, log_summary, login_row
+)
+from .log_search import activity_row, ranked, search_q
+from .log_export import EXPORT_COLUMNS, export_rows, gzip_stream
+
+# Admin levels whose activity logs a region/division admin may read
+SUBORDINATE_LEVELS = {
+    'region': ['division', 'district', 'school'],
+    'division': ['district', 'school'],
+}
 
 
 def get_admin_context(request):
@@ -76,14 +91,7 @@ def get_admin_context(request):
                 'coverage': 'All regions, divisions, districts, and schools (Development Mode)',
             }
         
-        admin_scope = AdminUserManager.get_user_access_scope(admin_id)
-        return {
-            'admin_scope': admin_scope,
-            'admin_id': admin_id,
-            'admin_level': admin_scope.get('admin_level'),
-            'permissions': admin_scope.get('permissions', {}),
-            'coverage': admin_scope.get('coverage', ''),
-        }
+        return get_identity(request).admin_context()
     except Exception:
         return None
 
@@ -123,12 +131,15 @@ def admin_page(request):
         'recent_activities': recent_activities,
         'pending_approvals': pending_approvals,
         'upcoming_deadlines': upcoming_deadlines,
-        'dashboard_stats': {
+        # Counted only if a rendered (non-cached) part of the page reads them
+        'dashboard_stats': SimpleLazyObject(lambda: {
             'total_users': AdminUser.objects.filter(status='active').count(),
             'pending_requests': UserCreationRequest.objects.filter(status='pending').count(),
             'active_sessions': AdminSession.objects.filter(is_active=True).count(),
-        }
+        })
     })
+    # Vary-on values for the page's cached fragments
+    context.update(fragment_context(admin_scope=admin_scope))
     
     return render(request, 'admin/admin.html', context)
 
@@ -296,463 +307,120 @@ def role_page(request):
 
 @require_admin_permission('view_system_logs')
 def logs_page(request):
-    """System logs and audit trail page with real database data"""
+    """
+    System logs and audit trail page. Only the summary figures are rendered here; the
+    rows of each tab are fetched from api_logs_tab when the tab is first shown.
+    """
     context = get_admin_context(request)
     if not context:
         return redirect('/auth/login/')
     
-    # Get date range filters
-    date_range = request.GET.get('date_range', 'month')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    search_query = request.GET.get('search', '')
-    
-    # Calculate date range
-    from datetime import datetime, timedelta
-    from django.utils import timezone
-    
-    now = timezone.now()
-    if date_range == 'today':
-        start_dt = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_dt = now
-    elif date_range == 'yesterday':
-        yesterday = now - timedelta(days=1)
-        start_dt = yesterday.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_dt = yesterday.replace(hour=23, minute=59, second=59, microsecond=999999)
-    elif date_range == 'week':
-        start_dt = now - timedelta(days=7)
-        end_dt = now
-    elif date_range == 'month':
-        start_dt = now - timedelta(days=30)
-        end_dt = now
-    elif date_range == 'custom' and start_date and end_date:
-        start_dt = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
-        end_dt = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59))
-    else:
-        start_dt = now - timedelta(days=30)
-        end_dt = now
-    
-    # Get admin scope for filtering
-    admin_scope = context['admin_scope']
-    
-    # Get login history data
-    login_history = LoginAttempt.objects.filter(
-        timestamp__range=(start_dt, end_dt)
-    ).select_related().order_by('-timestamp')
-    
-    if search_query:
-        login_history = login_history.filter(
-            Q(username__icontains=search_query) |
-            Q(ip_address__icontains=search_query) |
-            Q(location__icontains=search_query)
-        )
-    
-    # Get activity logs
-    activity_logs = AuditLog.objects.filter(
-        timestamp__range=(start_dt, end_dt)
-    ).select_related('user').order_by('-timestamp')
-    
-    if search_query:
-        activity_logs = activity_logs.filter(
-            Q(user__username__icontains=search_query) |
-            Q(action_type__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(resource_type__icontains=search_query)
-        )
-    
-    # Get audit logs (high-level security events)
-    audit_logs = AuditLog.objects.filter(
-        timestamp__range=(start_dt, end_dt),
-        severity__in=['high', 'critical']
-    ).select_related('user').order_by('-timestamp')
-    
-    if search_query:
-        audit_logs = audit_logs.filter(
-            Q(user__username__icontains=search_query) |
-            Q(action_type__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-    
-    # Get failed login attempts
-    failed_logins = LoginAttempt.objects.filter(
-        timestamp__range=(start_dt, end_dt),
-        success=False
-    ).order_by('-timestamp')
-    
-    if search_query:
-        failed_logins = failed_logins.filter(
-            Q(username__icontains=search_query) |
-            Q(ip_address__icontains=search_query) |
-            Q(failure_reason__icontains=search_query)
-        )
-    
-    # Get educational data logs (questions, forms, answers)
-    educational_logs = AuditLog.objects.filter(
-        timestamp__range=(start_dt, end_dt),
-        resource_type__in=['question', 'answer', 'form', 'category', 'topic']
-    ).select_related('user').order_by('-timestamp')
-    
-    if search_query:
-        educational_logs = educational_logs.filter(
-            Q(user__username__icontains=search_query) |
-            Q(action_type__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-    
-    # Get administrative logs (admin users, permissions)
-    admin_logs = AuditLog.objects.filter(
-        timestamp__range=(start_dt, end_dt),
-        resource_type__in=['admin_user', 'admin_permission', 'users_school']
-    ).select_related('user').order_by('-timestamp')
-    
-    if search_query:
-        admin_logs = admin_logs.filter(
-            Q(user__username__icontains=search_query) |
-            Q(action_type__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+    try:
+        summary = log_summary(request.GET)
+    except ValueError:
+        # Malformed custom dates: fall back to the default window
+        summary = log_summary({})
     
-    # Get system operation logs
-    system_logs = AuditLog.objects.filter(
-        timestamp__range=(start_dt, end_dt),
-        resource_type__in=['school', 'region', 'division', 'district', 'report', 'data_import']
-    ).select_related('user').order_by('-timestamp')
+    context.update(summary)
+    context.update({
+        'date_range': request.GET.get('date_range', 'month'),
+        'start_date': request.GET.get('start_date'),
+        'end_date': request.GET.get('end_date'),
+        'search_query': request.GET.get('search', ''),
+    })
     
-    if search_query:
-        system_logs = system_logs.filter(
-            Q(user__username__icontains=search_query) |
-            Q(action_type__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+    return render(request, 'admin/logs.html', context)
+
+
+@require_admin_permission('view_system_logs')
+@require_GET
+def api_logs_tab(request, tab):
+    """One page of a logs tab, newest first; pass back next_cursor to get the following page"""
+    log_tab = LOG_TABS.get(tab)
+    if log_tab is None:
+        return JsonResponse({'success': False, 'error': f'Unknown log tab: {tab}'}, status=404)
     
-    # Get statistics
-    total_users = AdminUser.objects.filter(admin_level='school').count()
-    successful_logins = LoginAttempt.objects.filter(
-        timestamp__range=(start_dt, end_dt),
-        success=True
-    ).count()
+    try:
+        limit = min(max(int(request.GET.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        start_dt, end_dt = date_window(request.GET)
+        queryset = log_tab.queryset(start_dt, end_dt, request.GET.get('search', '').strip())
+        rows, next_cursor = log_tab.page(queryset, request.GET.get('cursor'), limit)
+    except (InvalidCursor, ValueError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     
-    failed_login_count = failed_logins.count()
+    return JsonResponse({
+        'success': True,
+        'tab': tab,
+        'rows': rows,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
+
+
+@require_admin_permission('view_system_logs')
+@require_GET
+def api_logs_search(request):
+    """
+    Ranked log search within the page's date window: best matches first, per source
+    (?sources=audit_logs,login_attempts,admin_activity, default all).
+    """
+    term = request.GET.get('q', '').strip()
+    if not term:
+        return JsonResponse({'success': False, 'error': 'Search term is required'}, status=400)
     
-    # Activity summary
-    activity_summary = {
-        'create_actions': AuditLog.objects.filter(
-            timestamp__range=(start_dt, end_dt),
-            action_type='create'
-        ).count(),
-        'update_actions': AuditLog.objects.filter(
-            timestamp__range=(start_dt, end_dt),
-            action_type='update'
-        ).count(),
-        'delete_actions': AuditLog.objects.filter(
-            timestamp__range=(start_dt, end_dt),
-            action_type='delete'
-        ).count(),
+    try:
+        limit = min(max(int(request.GET.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        start_dt, end_dt = date_window(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    sources = {
+        'audit_logs': (AuditLog.objects.select_related('user'), ('user__username', 'action_type', 'description', 'resource_type'), audit_row),
+        'login_attempts': (LoginAttempt.objects.all(), ('username', 'ip_address', 'location', 'failure_reason'), login_row),
+        'admin_activity': (AdminActivityLog.objects.select_related('admin_user'), ('admin_user__username', 'action', 'resource_type'), activity_row),
     }
+    requested = [name for name in request.GET.get('sources', ','.join(sources)).split(',') if name in sources]
     
-    # Security alerts from recent failed logins
-    security_alerts = []
-    
-    # Check for multiple failed attempts from same IP
-    from django.db.models import Count
-    suspicious_ips = failed_logins.values('ip_address').annotate(
-        attempt_count=Count('id')
-    ).filter(attempt_count__gte=3)
-    
-    for ip_data in suspicious_ips:
-        security_alerts.append({
-            'type': 'critical',
-            'title': 'Multiple Failed Login Attempts',
-            'details': f"IP: {ip_data['ip_address']} has {ip_data['attempt_count']} failed attempts",
-            'time': 'Recent'
-        })
-    
-    # Pagination for each tab
-    from django.core.paginator import Paginator
-    
-    login_paginator = Paginator(login_history, 25)
-    activity_paginator = Paginator(activity_logs, 25)
-    audit_paginator = Paginator(audit_logs, 25)
-    failed_paginator = Paginator(failed_logins, 25)
-    educational_paginator = Paginator(educational_logs, 25)
-    admin_paginator = Paginator(admin_logs, 25)
-    system_paginator = Paginator(system_logs, 25)
-    
-    page_number = request.GET.get('page', 1)
-    login_page = login_paginator.get_page(page_number)
-    activity_page = activity_paginator.get_page(page_number)
-    audit_page = audit_paginator.get_page(page_number)
-    failed_page = failed_paginator.get_page(page_number)
-    educational_page = educational_paginator.get_page(page_number)
-    admin_page = admin_paginator.get_page(page_number)
-    system_page = system_paginator.get_page(page_number)
+    results = {}
+    for name in requested:
+        queryset, fallback_fields, serialize = sources[name]
+        queryset = queryset.filter(search_q(queryset.model, term, fallback_fields), timestamp__range=(start_dt, end_dt))
+        results[name] = [serialize(item) for item in ranked(queryset, term)[:limit]]
     
-    context.update({
-        'login_history': login_page,
-        'activity_logs': activity_page,
-        'audit_logs': audit_page,
-        'failed_logins': failed_page,
-        'educational_logs': educational_page,
-        'admin_logs': admin_page,
-        'system_logs': system_page,
-        'total_users': total_users,
-        'successful_logins': successful_logins,
-        'failed_login_count': failed_login_count,
-        'activity_summary': activity_summary,
-        'security_alerts': security_alerts,
-        'date_range': date_range,
-        'start_date': start_date,
-        'end_date': end_date,
-        'search_query': search_query,
-        # Additional statistics
-        'educational_log_count': educational_logs.count(),
-        'admin_log_count': admin_logs.count(),
-        'system_log_count': system_logs.count(),
-    })
-    
-    return render(request, 'admin/logs.html', context)
+    return JsonResponse({'success': True, 'query': term, 'results': results})
 
 
 @require_admin_permission('view_system_logs')
 def export_logs_csv(request):
-    """Export logs to CSV format"""
+    """
+    Export one logs tab as CSV, streamed while it is read (see log_export).
+    ?compress=gzip sends it gzip-compressed as a .csv.gz download.
+    """
     context = get_admin_context(request)
     if not context:
         return JsonResponse({'error': 'Unauthorized'}, status=401)
     
     log_type = request.GET.get('type', 'login_history')
     date_range = request.GET.get('date_range', 'month')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    search_query = request.GET.get('search', '')
+    if log_type not in EXPORT_COLUMNS:
+        return JsonResponse({'error': f'Unknown log type: {log_type}'}, status=400)
     
-    # Calculate date range (same logic as logs_page)
-    from datetime import datetime, timedelta
-    from django.utils import timezone
-    
-    now = timezone.now()
-    if date_range == 'today':
-        start_dt = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_dt = now
-    elif date_range == 'yesterday':
-        yesterday = now - timedelta(days=1)
-        start_dt = yesterday.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_dt = yesterday.replace(hour=23, minute=59, second=59, microsecond=999999)
-    elif date_range == 'week':
-        start_dt = now - timedelta(days=7)
-        end_dt = now
-    elif date_range == 'month':
-        start_dt = now - timedelta(days=30)
-        end_dt = now
-    elif date_range == 'custom' and start_date and end_date:
-        start_dt = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
-        end_dt = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59))
+    try:
+        start_dt, end_dt = date_window(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid date range'}, status=400)
+    
+    rows = export_rows(log_type, start_dt, end_dt, request.GET.get('search', '').strip())
+    filename = f'{log_type}_{date_range}.csv'
+    if request.GET.get('compress') == 'gzip':
+        response = StreamingHttpResponse(gzip_stream(rows), content_type='application/gzip')
+        filename += '.gz'
     else:
-        start_dt = now - timedelta(days=30)
-        end_dt = now
-    
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{log_type}_{date_range}.csv"'
-    
-    writer = csv.writer(response)
-    
-    if log_type == 'login_history':
-        # Export login history
-        writer.writerow(['Username', 'Success', 'Timestamp', 'IP Address', 'Location', 'User Agent', 'Failure Reason'])
-        
-        login_history = LoginAttempt.objects.filter(
-            timestamp__range=(start_dt, end_dt)
-        ).order_by('-timestamp')
-        
-        if search_query:
-            login_history = login_history.filter(
-                Q(username__icontains=search_query) |
-                Q(ip_address__icontains=search_query) |
-                Q(location__icontains=search_query)
-            )
-        
-        for attempt in login_history:
-            writer.writerow([
-                attempt.username,
-                'Success' if attempt.success else 'Failed',
-                attempt.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                attempt.ip_address,
-                attempt.location or 'Unknown',
-                attempt.user_agent[:100] + '...' if len(attempt.user_agent) > 100 else attempt.user_agent,
-                attempt.failure_reason or ''
-            ])
-    
-    elif log_type == 'activity_logs':
-        # Export activity logs
-        writer.writerow(['User', 'Action Type', 'Resource Type', 'Resource ID', 'Description', 'Timestamp', 'IP Address', 'Success'])
-        
-        activity_logs = AuditLog.objects.filter(
-            timestamp__range=(start_dt, end_dt)
-        ).select_related('user').order_by('-timestamp')
-        
-        if search_query:
-            activity_logs = activity_logs.filter(
-                Q(user__username__icontains=search_query) |
-                Q(action_type__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(resource_type__icontains=search_query)
-            )
-        
-        for log in activity_logs:
-            writer.writerow([
-                log.user.username if log.user else 'System',
-                log.action_type,
-                log.resource_type,
-                log.resource_id or '',
-                log.description[:200] + '...' if len(log.description) > 200 else log.description,
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or '',
-                'Success' if log.success else 'Failed'
-            ])
-    
-    elif log_type == 'audit_logs':
-        # Export audit logs (high-level security events)
-        writer.writerow(['User', 'Action Type', 'Resource Type', 'Description', 'Severity', 'Timestamp', 'IP Address', 'Metadata'])
-        
-        audit_logs = AuditLog.objects.filter(
-            timestamp__range=(start_dt, end_dt),
-            severity__in=['high', 'critical']
-        ).select_related('user').order_by('-timestamp')
-        
-        if search_query:
-            audit_logs = audit_logs.filter(
-                Q(user__username__icontains=search_query) |
-                Q(action_type__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
-        
-        for log in audit_logs:
-            writer.writerow([
-                log.user.username if log.user else 'System',
-                log.action_type,
-                log.resource_type,
-                log.description[:200] + '...' if len(log.description) > 200 else log.description,
-                log.severity,
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or '',
-                json.dumps(log.metadata) if log.metadata else ''
-            ])
-    
-    elif log_type == 'failed_logins':
-        # Export failed login attempts
-        writer.writerow(['Username', 'Timestamp', 'IP Address', 'Location', 'Failure Reason', 'User Agent', 'Is Suspicious'])
-        
-        failed_logins = LoginAttempt.objects.filter(
-            timestamp__range=(start_dt, end_dt),
-            success=False
-        ).order_by('-timestamp')
-        
-        if search_query:
-            failed_logins = failed_logins.filter(
-                Q(username__icontains=search_query) |
-                Q(ip_address__icontains=search_query) |
-                Q(failure_reason__icontains=search_query)
-            )
-        
-        for attempt in failed_logins:
-            writer.writerow([
-                attempt.username,
-                attempt.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                attempt.ip_address,
-                attempt.location or 'Unknown',
-                attempt.failure_reason or 'Unknown',
-                attempt.user_agent[:100] + '...' if len(attempt.user_agent) > 100 else attempt.user_agent,
-                'Yes' if attempt.is_suspicious else 'No'
-            ])
-    
-    elif log_type == 'educational_logs':
-        # Export educational data logs
-        writer.writerow(['User', 'Action Type', 'Resource Type', 'Resource ID', 'Description', 'Timestamp', 'IP Address', 'Severity', 'Metadata'])
-        
-        educational_logs = AuditLog.objects.filter(
-            timestamp__range=(start_dt, end_dt),
-            resource_type__in=['question', 'answer', 'form', 'category', 'topic']
-        ).select_related('user').order_by('-timestamp')
-        
-        if search_query:
-            educational_logs = educational_logs.filter(
-                Q(user__username__icontains=search_query) |
-                Q(action_type__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
-        
-        for log in educational_logs:
-            writer.writerow([
-                log.user.username if log.user else 'System',
-                log.action_type,
-                log.resource_type,
-                log.resource_id or '',
-                log.description[:200] + '...' if len(log.description) > 200 else log.description,
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or '',
-                log.severity,
-                json.dumps(log.metadata) if log.metadata else ''
-            ])
-    
-    elif log_type == 'admin_logs':
-        # Export administrative logs
-        writer.writerow(['User', 'Action Type', 'Resource Type', 'Resource ID', 'Description', 'Timestamp', 'IP Address', 'Severity', 'Metadata'])
-        
-        admin_logs = AuditLog.objects.filter(
-            timestamp__range=(start_dt, end_dt),
-            resource_type__in=['admin_user', 'admin_permission', 'users_school']
-        ).select_related('user').order_by('-timestamp')
-        
-        if search_query:
-            admin_logs = admin_logs.filter(
-                Q(user__username__icontains=search_query) |
-                Q(action_type__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
-        
-        for log in admin_logs:
-            writer.writerow([
-                log.user.username if log.user else 'System',
-                log.action_type,
-                log.resource_type,
-                log.resource_id or '',
-                log.description[:200] + '...' if len(log.description) > 200 else log.description,
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or '',
-                log.severity,
-                json.dumps(log.metadata) if log.metadata else ''
-            ])
-    
-    elif log_type == 'system_logs':
-        # Export system operation logs
-        writer.writerow(['User', 'Action Type', 'Resource Type', 'Resource ID', 'Description', 'Timestamp', 'IP Address', 'Success', 'Metadata'])
-        
-        system_logs = AuditLog.objects.filter(
-            timestamp__range=(start_dt, end_dt),
-            resource_type__in=['school', 'region', 'division', 'district', 'report', 'data_import']
-        ).select_related('user').order_by('-timestamp')
-        
-        if search_query:
-            system_logs = system_logs.filter(
-                Q(user__username__icontains=search_query) |
-                Q(action_type__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
-        
-        for log in system_logs:
-            writer.writerow([
-                log.user.username if log.user else 'System',
-                log.action_type,
-                log.resource_type,
-                log.resource_id or '',
-                log.description[:200] + '...' if len(log.description) > 200 else log.description,
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or '',
-                'Success' if log.success else 'Failed',
-                json.dumps(log.metadata) if log.metadata else ''
-            ])
-    
+        response = StreamingHttpResponse(rows, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Keep proxies (nginx) from buffering the whole export before relaying it
+    response['X-Accel-Buffering'] = 'no'
+    response['Cache-Control'] = 'no-store'
     return response
 
 
@@ -763,7 +431,7 @@ def settings_page(request):
         return redirect('/auth/login/')
     
     # Get admin's current settings
-    admin_user = AdminUser.objects.get(admin_id=context['admin_id'])
+    admin_user = get_identity(request).require_admin()
     
     # Get active sessions
     active_sessions = AdminSession.objects.filter(
@@ -824,7 +492,7 @@ def api_create_admin_user(request):
                 with transaction.atomic():
                     # Hash password
                     password = data.get('password', 'TempPassword123!')
-                    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                    password_hash = PasswordHasher.hash(password)
                     
                     # Set default permissions based on admin level
                     permissions = AdminUserManager._get_default_permissions(data.get('admin_level'))
@@ -1187,15 +855,11 @@ def api_admin_users(request):
         # Get users within admin's scope
         users_query = AdminUser.objects.filter(status='active')
         
-        # Apply geographic filtering
-        if admin_scope['admin_level'] == 'region':
-            users_query = users_query.filter(region_id=admin_scope.get('region_id'))
-        elif admin_scope['admin_level'] == 'division':
-            users_query = users_query.filter(division_id=admin_scope.get('division_id'))
-        elif admin_scope['admin_level'] == 'district':
-            users_query = users_query.filter(district_id=admin_scope.get('district_id'))
-        elif admin_scope['admin_level'] == 'school':
-            users_query = users_query.filter(school_id=admin_scope.get('school_id'))
+        # Apply geographic filtering (one predicate on the admin's hierarchy id)
+        scope = get_identity(request).scope
+        if scope is None:
+            return JsonResponse({'success': False, 'error': 'Admin user not found'}, status=403)
+        users_query = scope.filter(users_query)
         
         users_data = []
         for user in users_query.select_related('region', 'division', 'district', 'school'):
@@ -1468,24 +1132,13 @@ def api_activity_logs(request):
     logs_query = AdminActivityLog.objects.all()
     
     if admin_scope['admin_level'] != 'central':
-        # Filter logs for non-central admins
-        accessible_admin_ids = [admin_id]
-        
-        # Add subordinate admin IDs
-        if admin_scope['admin_level'] == 'region':
-            subordinates = AdminUser.objects.filter(
-                region_id=admin_scope.get('region_id'),
-                admin_level__in=['division', 'district', 'school']
-            ).values_list('admin_id', flat=True)
-            accessible_admin_ids.extend(subordinates)
-        elif admin_scope['admin_level'] == 'division':
-            subordinates = AdminUser.objects.filter(
-                division_id=admin_scope.get('division_id'),
-                admin_level__in=['district', 'school']
-            ).values_list('admin_id', flat=True)
-            accessible_admin_ids.extend(subordinates)
-        
-        logs_query = logs_query.filter(admin_user_id__in=accessible_admin_ids)
+        # Own logs, plus those of subordinate admins (region/division) via one joined predicate
+        own_logs = Q(admin_user_id=admin_id)
+        subordinate_levels = SUBORDINATE_LEVELS.get(admin_scope['admin_level'])
+        scope = get_identity(request).scope
+        if subordinate_levels and scope is not None:
+            own_logs |= scope.q(AdminUser, prefix='admin_user__') & Q(admin_user__admin_level__in=subordinate_levels)
+        logs_query = logs_query.filter(own_logs)
     
     # Pagination
     page = int(request.GET.get('page', 1))
@@ -1521,6 +1174,13 @@ def api_activity_logs(request):
     })
 
 
+@require_admin_permission('view_system_logs')
+@require_GET
+def api_audit_writer_metrics(request):
+    """Audit writer queue depth, drops and spills (for the worker process that answers)"""
+    return JsonResponse({'success': True, 'metrics': AuditWriter.metrics()})
+
+
 @require_admin_permission('manage_users')
 @csrf_exempt
 @require_http_methods(['GET', 'PUT'])
@@ -1915,7 +1575,7 @@ def api_reset_admin_password(request, user_id):
             new_password = ''.join(secrets.choice(alphabet) for _ in range(12))
         
         # Hash the password
-        password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        password_hash = PasswordHasher.hash(new_password)
         user_to_reset.password_hash = password_hash
         user_to_reset.updated_by_id = admin_id
         user_to_reset.save()
@@ -2170,8 +1830,8 @@ def api_delete_admin_user(request, user_id):
         user_to_delete.updated_by_id = admin_id
         user_to_delete.save()
         
-        # Deactivate all sessions for this user
-        AdminSession.objects.filter(admin_user=user_to_delete).update(is_active=False)
+        # End all sessions of this user
+        SessionRegistry.revoke_all(user_to_delete.admin_id)
         
         return JsonResponse({
             'success': True,
@@ -2428,15 +2088,11 @@ def api_export_admin_users(request):
         # Get users within admin's scope
         users_query = AdminUser.objects.filter(status='active')
         
-        # Apply geographic filtering
-        if admin_scope['admin_level'] == 'region':
-            users_query = users_query.filter(region_id=admin_scope.get('region_id'))
-        elif admin_scope['admin_level'] == 'division':
-            users_query = users_query.filter(division_id=admin_scope.get('division_id'))
-        elif admin_scope['admin_level'] == 'district':
-            users_query = users_query.filter(district_id=admin_scope.get('district_id'))
-        elif admin_scope['admin_level'] == 'school':
-            users_query = users_query.filter(school_id=admin_scope.get('school_id'))
+        # Apply geographic filtering (one predicate on the admin's hierarchy id)
+        scope = get_identity(request).scope
+        if scope is None:
+            return JsonResponse({'success': False, 'error': 'Admin user not found'}, status=403)
+        users_query = scope.filter(users_query)
         
         export_format = request.GET.get('format', 'csv').lower()
         
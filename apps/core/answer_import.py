@@ -0,0 +1,243 @@
+"""
+Bulk import of offline-filled form answers from XLSX/CSV files
+Rows are streamed (openpyxl read-only mode / csv module), validated against the compiled
+questionnaire schema and written as chunked upserts, so memory stays flat for any file size
+"""
+
+import csv
+import logging
+import os
+import time
+from datetime import date, datetime
+
+import openpyxl
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Form
+from .progress import FormProgressManager
+from .schema import QuestionnaireSchema
+
+logger = logging.getLogger(__name__)
+
+QUESTION_ID_COLUMNS = ('question_id', 'question')
+ANSWER_COLUMNS = ('answer', 'response', 'value')
+
+MAX_REPORTED_ERRORS = 100
+
+# One statement per chunk with an explicit row list (every value a parameter), so the
+# chunk is one round trip whatever the driver's executemany does. An existing (form,
+# question) answer is overwritten and its version bumped so interactive editors holding
+# the old version get a conflict
+UPSERT_ANSWERS_SQL = """
+    INSERT INTO answers (form_id, question_id, response, answered_at, version)
+    VALUES {rows}
+    ON DUPLICATE KEY UPDATE
+        response = VALUES(response),
+        answered_at = VALUES(answered_at),
+        version = version + 1
+"""
+UPSERT_ROW_SQL = '(%s, %s, %s, %s, %s)'
+
+
+def upsert_answers_sql(row_count):
+    return UPSERT_ANSWERS_SQL.format(rows=', '.join([UPSERT_ROW_SQL] * row_count))
+
+
+class AnswerImportError(Exception):
+    """Raised when an import file cannot be read at all (bad format, missing columns)"""
+    pass
+
+
+class OfflineAnswerImporter:
+    """Streams an XLSX/CSV of (question_id, answer) rows into one form"""
+
+    def __init__(self, form_id, path, file_format=None, chunk_size=None, progress_callback=None):
+        self.form_id = form_id
+        self.path = path
+        self.file_format = (file_format or os.path.splitext(path)[1].lstrip('.')).lower()
+        self.chunk_size = chunk_size or getattr(settings, 'OFFLINE_IMPORT_CHUNK_SIZE', 2000)
+        self.progress_callback = progress_callback
+        self.total_rows = None
+        self.stats = {
+            'form_id': form_id,
+            'rows_processed': 0,
+            'total_rows': None,
+            'answers_imported': 0,
+            'rows_skipped': 0,
+            'error_count': 0,
+            'errors': [],
+            'elapsed_seconds': 0.0,
+            'rows_per_second': 0.0,
+        }
+
+    @staticmethod
+    def get_question_map():
+        """{question_id: (answer_type, allowed_choices or None)} for every question"""
+        return {
+            question_id: (question['answer_type'],
+                          frozenset(c.strip() for c in question['choices']) if question['choices'] else None)
+            for question_id, question in QuestionnaireSchema.get().questions.items()
+        }
+
+    def iter_rows(self):
+        """Yield (row_number, question_id, answer) lazily from the file"""
+        if self.file_format == 'csv':
+            yield from self._iter_csv()
+        elif self.file_format in ('xlsx', 'xlsm'):
+            yield from self._iter_xlsx()
+        else:
+            raise AnswerImportError(f'Unsupported file format: {self.file_format}')
+
+    def _iter_csv(self):
+        with open(self.path, newline='', encoding='utf-8-sig') as handle:
+            reader = csv.reader(handle)
+            header = next(reader, None)
+            question_col, answer_col = self._resolve_columns(header)
+            for row_number, row in enumerate(reader, start=2):
+                if not row:
+                    continue
+                yield (
+                    row_number,
+                    row[question_col] if question_col < len(row) else None,
+                    row[answer_col] if answer_col < len(row) else None,
+                )
+
+    def _iter_xlsx(self):
+        workbook = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            if sheet.max_row:
+                self.total_rows = max(sheet.max_row - 1, 0)
+                self.stats['total_rows'] = self.total_rows
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            question_col, answer_col = self._resolve_columns(header)
+            for row_number, row in enumerate(rows, start=2):
+                if not row:
+                    continue
+                yield (
+                    row_number,
+                    row[question_col] if question_col < len(row) else None,
+                    row[answer_col] if answer_col < len(row) else None,
+                )
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _resolve_columns(header):
+        if not header:
+            raise AnswerImportError('Import file is empty')
+        names = [str(cell).strip().lower() if cell is not None else '' for cell in header]
+        question_col = next((names.index(c) for c in QUESTION_ID_COLUMNS if c in names), None)
+        answer_col = next((names.index(c) for c in ANSWER_COLUMNS if c in names), None)
+        if question_col is None or answer_col is None:
+            raise AnswerImportError(
+                'Import file needs a header row with "question_id" and "answer" columns'
+            )
+        return question_col, answer_col
+
+    @staticmethod
+    def clean_value(raw_value, answer_type, allowed_choices):
+        """Normalize one answer; returns None for blank cells, raises ValueError when invalid"""
+        if raw_value is None:
+            return None
+
+        if isinstance(raw_value, datetime):
+            raw_value = raw_value.date()
+        if isinstance(raw_value, date):
+            value = raw_value.isoformat()
+        elif isinstance(raw_value, float) and raw_value.is_integer():
+            value = str(int(raw_value))
+        else:
+            value = str(raw_value).strip()
+
+        if value == '':
+            return None
+
+        if answer_type in ('number', 'percentage'):
+            try:
+                number = float(value.rstrip('%'))
+            except ValueError:
+                raise ValueError(f'"{value}" is not a number')
+            if answer_type == 'percentage' and not 0 <= number <= 100:
+                raise ValueError(f'{value} is not a percentage between 0 and 100')
+        elif answer_type == 'date':
+            try:
+                value = datetime.strptime(value[:10], '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                raise ValueError(f'"{value}" is not a YYYY-MM-DD date')
+        elif answer_type == 'choice' and allowed_choices and value not in allowed_choices:
+            raise ValueError(f'"{value}" is not one of the allowed choices')
+
+        return value
+
+    def run(self):
+        """Import the whole file; returns the final stats dict"""
+        if not Form.objects.filter(form_id=self.form_id).exists():
+            raise AnswerImportError(f'Form {self.form_id} does not exist')
+
+        started = time.perf_counter()
+        question_map = self.get_question_map()
+        chunk = {}
+
+        for row_number, raw_question_id, raw_value in self.iter_rows():
+            self.stats['rows_processed'] += 1
+            try:
+                try:
+                    question_id = int(str(raw_question_id).strip())
+                except (TypeError, ValueError):
+                    raise ValueError(f'invalid question id "{raw_question_id}"')
+                if question_id not in question_map:
+                    raise ValueError(f'question {question_id} does not exist')
+
+                answer_type, allowed_choices = question_map[question_id]
+                value = self.clean_value(raw_value, answer_type, allowed_choices)
+                if value is None:
+                    self.stats['rows_skipped'] += 1
+                    continue
+
+                # Later rows for the same question win, as they would interactively
+                chunk[question_id] = value
+            except ValueError as e:
+                self._record_error(row_number, str(e))
+                continue
+
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = {}
+
+        if chunk:
+            self._flush(chunk)
+
+        Form.objects.filter(form_id=self.form_id).update(updated_at=timezone.now())
+        elapsed = time.perf_counter() - started
+        self.stats['elapsed_seconds'] = round(elapsed, 3)
+        self.stats['rows_per_second'] = round(self.stats['rows_processed'] / elapsed, 1) if elapsed else 0.0
+        logger.info(
+            f"Offline import into form {self.form_id}: {self.stats['answers_imported']} answers, "
+            f"{self.stats['error_count']} errors, {self.stats['rows_per_second']} rows/s"
+        )
+        return self.stats
+
+    def _flush(self, chunk):
+        """Write one chunk in its own bounded transaction"""
+        answered_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        params = []
+        for question_id, value in chunk.items():
+            params.extend((self.form_id, question_id, value, answered_at, 1))
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(upsert_answers_sql(len(chunk)), params)
+            # Every imported value is non-empty, so each question is now answered
+            FormProgressManager.apply_changes(self.form_id, answered_ids=list(chunk.keys()))
+            FormProgressManager.record_write(self.form_id)
+        self.stats['answers_imported'] += len(chunk)
+        if self.progress_callback:
+            self.progress_callback(dict(self.stats))
+
+    def _record_error(self, row_number, message):
+        self.stats['error_count'] += 1
+        if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+            self.stats['errors'].append(f'Row {row_number}: {message}')
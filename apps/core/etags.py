@@ -0,0 +1,88 @@
+"""
+Strong validators for the form structure and answer payloads
+ETags are derived from the compiled schema version and the per-form answer version
+(form_progress.answers_version), so a client revalidating with If-None-Match gets
+304 Not Modified without the payload being rebuilt or transferred
+"""
+
+import hashlib
+from functools import wraps
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .progress import FormProgressManager
+from .schema import QuestionnaireSchema
+
+
+def make_etag(*parts):
+    """Quoted strong ETag over the given parts"""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def schema_etag(scope=''):
+    """ETag for payloads built only from the questionnaire schema"""
+    return make_etag('schema', scope, QuestionnaireSchema.get().version)
+
+
+def form_etag(scope, *progress_rows, schema=True):
+    """
+    ETag for payloads that depend on forms' answers (and optionally on the schema).
+    scope names the payload shape so different endpoints never share a tag.
+    """
+    parts = [scope]
+    if schema:
+        parts.append(QuestionnaireSchema.get().version)
+    parts.extend(FormProgressManager.state_token(progress) for progress in progress_rows)
+    return make_etag(*parts)
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match comparison (weak comparison, as RFC 9110 specifies for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return any((tag[2:] if tag.startswith('W/') else tag) == etag for tag in candidates)
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    HttpResponseNotModified when the client already has this representation, else None.
+    Pair with set_validators() on the full response.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if isinstance(response, HttpResponseNotModified):
+        return set_validators(response, etag, last_modified)
+    return None
+
+
+def set_validators(response, etag, last_modified=None):
+    """Attach validators and force revalidation (answers are private, per-user data)"""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def schema_conditional(view_func):
+    """
+    For GET views whose payload depends only on the questionnaire schema and the URL:
+    answer 304 while the schema is unchanged, and tag full responses with the ETag.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        etag = schema_etag(request.get_full_path())
+        not_modified = conditional_response(request, etag)
+        if not_modified:
+            return not_modified
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag)
+        return response
+    return _wrapped_view
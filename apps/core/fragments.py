@@ -0,0 +1,36 @@
+"""
+Template fragment caching for the server-rendered pages
+Schema- and scope-dependent parts of a page are wrapped in {% cache %} blocks whose
+vary-on values come from fragment_context(): the compiled schema version, a compact key
+of the viewer's admin scope, and the active language. A questionnaire edit, a different
+scope or a language switch therefore lands on a new key; per-user overlays (answers,
+progress, names) stay outside the cached blocks and are rendered on every request
+"""
+
+from django.conf import settings
+from django.utils.translation import get_language
+
+SCOPE_KEY_FIELDS = ('admin_level', 'region_id', 'division_id', 'district_id', 'school_id')
+
+
+def scope_key(admin_scope):
+    """Compact, stable key of what an admin may see (level, geography and granted permissions)"""
+    if not admin_scope:
+        return 'anonymous'
+    parts = [str(admin_scope.get(field) or '-') for field in SCOPE_KEY_FIELDS]
+    permissions = admin_scope.get('permissions') or {}
+    parts.append(','.join(sorted(name for name, granted in permissions.items() if granted)))
+    return ':'.join(parts)
+
+
+def fragment_context(schema=None, admin_scope=None):
+    """
+    Context variables for {% cache fragment_timeout "<name>" fragment_version fragment_scope fragment_language %}.
+    Pass the schema for questionnaire fragments and the admin scope for scope-dependent ones.
+    """
+    return {
+        'fragment_timeout': getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600),
+        'fragment_version': schema.version if schema is not None else '',
+        'fragment_scope': scope_key(admin_scope) if admin_scope is not None else '',
+        'fragment_language': get_language() or settings.LANGUAGE_CODE,
+    }
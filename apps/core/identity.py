@@ -0,0 +1,119 @@
+"""
+Request-scoped identity
+IdentityMiddleware attaches request.identity, which resolves the logged-in admin lazily
+and at most once per request: the admin row (with its school and area joined in one
+query), the school id, the access scope and the permissions. Decorators, context
+helpers and views read it instead of each loading the same AdminUser again.
+A request that never touches request.identity costs nothing.
+"""
+
+from django.utils.functional import cached_property
+
+from .models import AdminUser
+
+
+class RequestIdentity:
+    """Lazy view of who is making the request (session admin_id based)"""
+
+    def __init__(self, request):
+        self._request = request
+
+    @cached_property
+    def admin_id(self):
+        session = getattr(self._request, 'session', None)
+        return session.get('admin_id') if session is not None else None
+
+    @property
+    def is_authenticated(self):
+        return bool(self.admin_id)
+
+    @cached_property
+    def admin(self):
+        """The AdminUser (any status) with school/region/division/district joined, or None"""
+        if not self.admin_id:
+            return None
+        return (
+            AdminUser.objects.select_related('school', 'region', 'division', 'district')
+            .filter(admin_id=self.admin_id).first()
+        )
+
+    def require_admin(self):
+        """Like AdminUser.objects.get(admin_id=...) for the session admin"""
+        if self.admin is None:
+            raise AdminUser.DoesNotExist('Admin user not found')
+        return self.admin
+
+    @property
+    def admin_level(self):
+        return self.scope.admin_level if self.scope else None
+
+    @cached_property
+    def school_id(self):
+        """schools.id of a school-level admin (what forms.school_id references), else None"""
+        scope = self.scope
+        if scope and scope.admin_level == 'school':
+            return scope.school_id
+        return None
+
+    @property
+    def school(self):
+        return self.admin.school if self.school_id and self.admin else None
+
+    @cached_property
+    def scope(self):
+        """
+        AccessScope of an active admin, or None. Taken from the per-admin scope cache
+        when the admin row is not loaded yet; otherwise (or on a cache miss) built from
+        the admin row, so identity never costs more than that one query.
+        """
+        from apps.admin_management.scope import AccessScope, AccessScopeCache
+        if not self.admin_id:
+            return None
+        if 'admin' not in self.__dict__:
+            found, scope = AccessScopeCache.peek(self.admin_id)
+            if found:
+                return scope
+            return AccessScopeCache.store(self.admin_id, self.admin)
+        admin = self.admin
+        return AccessScope.from_admin(admin) if admin is not None and admin.status == 'active' else None
+
+    @property
+    def permissions(self):
+        return self.scope.permissions if self.scope else {}
+
+    def has_permission(self, permission):
+        return bool(self.scope) and self.scope.has_permission(permission)
+
+    def admin_context(self):
+        """The dict get_admin_context() returns for templates, or None"""
+        scope = self.scope
+        if scope is None:
+            return None
+        admin_scope = scope.as_dict()
+        return {
+            'admin_scope': admin_scope,
+            'admin_id': scope.admin_id,
+            'admin_level': scope.admin_level,
+            'permissions': admin_scope['permissions'],
+            'coverage': scope.coverage,
+        }
+
+
+def get_identity(request):
+    """request.identity, attaching one when IdentityMiddleware did not run (e.g. RequestFactory)"""
+    identity = getattr(request, 'identity', None)
+    if identity is None:
+        identity = RequestIdentity(request)
+        request.identity = identity
+    return identity
+
+
+class IdentityMiddleware:
+    """Adds request.identity; place after SessionMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.identity = RequestIdentity(request)
+        return self.get_response(request)
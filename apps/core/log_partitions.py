@@ -0,0 +1,280 @@
+"""
+Monthly partitions for the log tables (MySQL)
+audit_logs, audit_trail, login_attempts and admin_activity_log can be converted to
+PARTITION BY RANGE COLUMNS(timestamp) with one partition per month (pYYYYMM) plus an
+empty catch-all (pmax). Future months are split off pmax ahead of time, retention drops
+(or first exchanges out to an archive table) whole months instead of DELETEing rows,
+and queries bounded on timestamp only read the months they cover.
+
+MySQL does not allow foreign keys or FULLTEXT indexes on partitioned tables. Tables
+carrying a FULLTEXT index for log search (migration 0024: audit_logs, login_attempts,
+admin_activity_log) are left unpartitioned so search keeps its index, and retention on
+them (and on any table not converted yet) deletes expired rows in batches instead; in
+practice only audit_trail, whose foreign keys are declared without constraints
+(migration 0025), is partitioned. audit_logs and admin_activity_log keep their foreign
+keys (migration 0027).
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import AdminActivityLog, AuditLog, AuditTrail, DataRetentionPolicy, LoginAttempt
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_MODELS = (AuditLog, AuditTrail, LoginAttempt, AdminActivityLog)
+
+CATCH_ALL = 'pmax'
+
+
+class PartitionError(Exception):
+    pass
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(value):
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'p{month:%Y%m}'
+
+
+def partition_month(name):
+    """First day of the month a pYYYYMM partition holds, or None (pmax, foreign names)"""
+    try:
+        return datetime.strptime(name[1:], '%Y%m') if name.startswith('p') else None
+    except ValueError:
+        return None
+
+
+class LogPartitionManager:
+    """Partition maintenance for one log model (MySQL only)"""
+
+    def __init__(self, model):
+        if connection.vendor != 'mysql':
+            raise PartitionError('Log partitioning needs MySQL')
+        self.model = model
+        self.table = model._meta.db_table
+        self.pk = model._meta.pk.column
+
+    def _execute(self, sql, params=None):
+        logger.info(f"Log partitions: {sql}")
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def _fetch(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _q(self, name):
+        return connection.ops.quote_name(name)
+
+    # --- inspection ---
+
+    def partitions(self):
+        """Partition names in order (empty for an unpartitioned table)"""
+        rows = self._fetch(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            [self.table],
+        )
+        return [row[0] for row in rows]
+
+    def is_partitioned(self):
+        return bool(self.partitions())
+
+    def months(self):
+        return [month for month in map(partition_month, self.partitions()) if month]
+
+    def foreign_keys(self):
+        """Foreign key constraints from or to the table (they block partitioning)"""
+        rows = self._fetch(
+            "SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS "
+            "WHERE CONSTRAINT_SCHEMA = DATABASE() AND (TABLE_NAME = %s OR REFERENCED_TABLE_NAME = %s)",
+            [self.table, self.table],
+        )
+        return [row[0] for row in rows]
+
+    def fulltext_indexes(self):
+        rows = self._fetch(
+            "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_TYPE = 'FULLTEXT'",
+            [self.table],
+        )
+        return [row[0] for row in rows]
+
+    # --- changes ---
+
+    def _definitions(self, months):
+        return ', '.join(
+            f"PARTITION {partition_name(month)} VALUES LESS THAN ('{next_month(month):%Y-%m-%d} 00:00:00')"
+            for month in months
+        )
+
+    def convert(self, months_ahead):
+        """
+        Rebuild the table partitioned by month, from its oldest row's month to
+        `months_ahead` months from now. Copies the whole table: run it in a quiet window.
+        """
+        if self.is_partitioned():
+            return False
+        foreign_keys = self.foreign_keys()
+        if foreign_keys:
+            raise PartitionError(
+                f"{self.table} still has foreign key constraints ({', '.join(foreign_keys)}); run migrate first"
+            )
+        if self.fulltext_indexes():
+            raise PartitionError(f"{self.table} has a FULLTEXT search index; it stays unpartitioned")
+
+        oldest = self.model._base_manager.order_by('timestamp').values_list('timestamp', flat=True).first()
+        first = month_start(timezone.make_naive(oldest) if oldest else timezone.make_naive(timezone.now()))
+        months = self._month_range(first, months_ahead)
+
+        # Every unique key of a partitioned table must contain the partitioning column
+        self._execute(
+            f"ALTER TABLE {self._q(self.table)} DROP PRIMARY KEY, "
+            f"ADD PRIMARY KEY ({self._q(self.pk)}, {self._q('timestamp')})"
+        )
+        self._execute(
+            f"ALTER TABLE {self._q(self.table)} PARTITION BY RANGE COLUMNS({self._q('timestamp')}) "
+            f"({self._definitions(months)}, PARTITION {CATCH_ALL} VALUES LESS THAN (MAXVALUE))"
+        )
+        return True
+
+    def ensure_future(self, months_ahead):
+        """Split the months up to `months_ahead` from now off pmax; returns the new partition names"""
+        existing = self.months()
+        if not existing:
+            raise PartitionError(f"{self.table} is not partitioned; run with --convert first")
+        missing = self._month_range(next_month(existing[-1]), months_ahead)
+        if not missing:
+            return []
+        self._execute(
+            f"ALTER TABLE {self._q(self.table)} REORGANIZE PARTITION {CATCH_ALL} INTO "
+            f"({self._definitions(missing)}, PARTITION {CATCH_ALL} VALUES LESS THAN (MAXVALUE))"
+        )
+        return [partition_name(month) for month in missing]
+
+    def expired(self, retention_days):
+        """Month partitions holding only rows older than the retention period"""
+        cutoff = timezone.make_naive(timezone.now()) - timedelta(days=retention_days)
+        return [partition_name(month) for month in self.months() if next_month(month) <= cutoff]
+
+    def drop(self, name, archive=False):
+        """
+        Remove one month. With `archive`, its rows are first swapped (EXCHANGE PARTITION,
+        no copying) into a plain table named <table>_<partition> for offloading.
+        """
+        if archive:
+            archive_table = f'{self.table}_{name}'
+            self._execute(f"CREATE TABLE {self._q(archive_table)} LIKE {self._q(self.table)}")
+            self._execute(f"ALTER TABLE {self._q(archive_table)} REMOVE PARTITIONING")
+            self._execute(
+                f"ALTER TABLE {self._q(self.table)} EXCHANGE PARTITION {self._q(name)} "
+                f"WITH TABLE {self._q(archive_table)}"
+            )
+        self._execute(f"ALTER TABLE {self._q(self.table)} DROP PARTITION {self._q(name)}")
+
+    def purge(self, retention_days, batch_size, dry_run=False):
+        """
+        Delete rows older than the retention period from an unpartitioned table, in
+        batches of `batch_size` so no statement holds locks for long; returns the count
+        """
+        cutoff = connection.ops.adapt_datetimefield_value(timezone.now() - timedelta(days=retention_days))
+        if dry_run:
+            return self._fetch(
+                f"SELECT COUNT(*) FROM {self._q(self.table)} WHERE {self._q('timestamp')} < %s", [cutoff]
+            )[0][0]
+        deleted = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {self._q(self.table)} WHERE {self._q('timestamp')} < %s "
+                    f"ORDER BY {self._q('timestamp')} LIMIT %s",
+                    [cutoff, batch_size],
+                )
+                deleted += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    return deleted
+
+    @staticmethod
+    def _month_range(first, months_ahead):
+        last = month_start(timezone.make_naive(timezone.now()))
+        for _ in range(months_ahead):
+            last = next_month(last)
+        months = []
+        month = first
+        while month <= last:
+            months.append(month)
+            month = next_month(month)
+        return months
+
+
+def retention_days(model):
+    """
+    Days to keep for a log model: the shortest active DataRetentionPolicy listing the
+    table (or model name) in data_types, else LOG_RETENTION_DAYS; None keeps everything.
+    """
+    names = {model._meta.db_table, model._meta.model_name, model.__name__, model._meta.label}
+    days = [
+        policy.retention_period_days
+        for policy in DataRetentionPolicy.objects.filter(is_active=True)
+        if any(isinstance(name, str) and name in names for name in policy.data_types or [])
+    ]
+    if days:
+        return min(days)
+    return getattr(settings, 'LOG_RETENTION_DAYS', None)
+
+
+def maintain(months_ahead=None, archive=None, dry_run=False, convert=False):
+    """
+    One maintenance pass over every log table: (optionally convert,) pre-create future
+    months and drop the months past retention. Tables that stay unpartitioned (FULLTEXT
+    indexed, or not converted) have their expired rows deleted in batches instead.
+    Returns a per-table report.
+    """
+    months_ahead = getattr(settings, 'LOG_PARTITION_MONTHS_AHEAD', 3) if months_ahead is None else months_ahead
+    archive = getattr(settings, 'LOG_PARTITION_ARCHIVE', False) if archive is None else archive
+    batch_size = getattr(settings, 'LOG_PURGE_BATCH_SIZE', 5000)
+    report = {}
+    for model in PARTITIONED_MODELS:
+        manager = LogPartitionManager(model)
+        entry = report.setdefault(manager.table, {'converted': False, 'created': [], 'dropped': [], 'purged': 0})
+        days = retention_days(model)
+        if not manager.is_partitioned():
+            if manager.fulltext_indexes():
+                entry['skipped'] = 'kept unpartitioned (FULLTEXT search index)'
+            elif not convert:
+                entry['skipped'] = 'not partitioned'
+            if 'skipped' in entry:
+                if days is not None:
+                    entry['purged'] = manager.purge(days, batch_size, dry_run=dry_run)
+                continue
+            entry['converted'] = dry_run or manager.convert(months_ahead)
+            if dry_run:
+                continue
+        if dry_run:
+            existing = manager.months()
+            if existing:
+                entry['created'] = [partition_name(month) for month in
+                                    manager._month_range(next_month(existing[-1]), months_ahead)]
+        else:
+            entry['created'] = manager.ensure_future(months_ahead)
+
+        if days is None:
+            continue
+        for name in manager.expired(days):
+            if not dry_run:
+                manager.drop(name, archive=archive)
+            entry['dropped'].append(name)
+    return report
@@ -0,0 +1,306 @@
+"""
+Login pipeline: keeps the slow parts of a login off the request worker
+- bcrypt runs in a bounded thread pool (LOGIN_HASH_WORKERS); when the pool and its
+  queue are full the login is refused with LoginBusy instead of piling up workers
+- new hashes use PASSWORD_HASH_ROUNDS, and older hashes are moved to it after a
+  successful login
+- login attempts are pushed to a Redis list and written to login_attempts in batches
+  by the flush_login_attempts task
+- the suspicious-login rule is evaluated against Redis sliding-window counters
+  instead of a COUNT over login_attempts
+Every Redis step falls back to the old synchronous database path when Redis is down
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+
+import bcrypt
+import redis
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import LoginAttempt
+
+logger = logging.getLogger(__name__)
+
+r = redis.Redis(
+    host=getattr(settings, 'REDIS_HOST', 'localhost'),
+    port=getattr(settings, 'REDIS_PORT', 6379),
+    db=getattr(settings, 'REDIS_DB', 0)
+)
+
+ATTEMPT_QUEUE_KEY = 'login_attempts:queue'
+FLUSH_SCHEDULED_KEY = 'login_attempts:flush_scheduled'
+FAILURE_WINDOW_PREFIX = 'login_failures:ip:'
+
+# Failed attempts from one IP within the window that make the next attempt suspicious
+SUSPICIOUS_FAILURES = 3
+SUSPICIOUS_WINDOW_SECONDS = 3600
+SUSPICIOUS_USERNAMES = ('admin', 'administrator', 'root', 'test', 'user')
+
+
+class LoginBusy(Exception):
+    """All password-hash workers are busy; the client should retry shortly"""
+
+
+class PasswordHasher:
+    """Bounded bcrypt worker pool shared by the Django views and the FastAPI routes"""
+
+    _pool = None
+    _slots = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def workers():
+        return getattr(settings, 'LOGIN_HASH_WORKERS', 4)
+
+    @classmethod
+    def _get_pool(cls):
+        if cls._pool is None:
+            with cls._lock:
+                if cls._pool is None:
+                    workers = cls.workers()
+                    # Running plus waiting verifications; anything beyond is refused
+                    cls._slots = threading.BoundedSemaphore(
+                        workers + getattr(settings, 'LOGIN_HASH_QUEUE', workers * 4)
+                    )
+                    cls._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        return cls._pool
+
+    @classmethod
+    def _submit(cls, password, password_hash):
+        pool = cls._get_pool()
+        if not cls._slots.acquire(timeout=getattr(settings, 'LOGIN_HASH_WAIT_SECONDS', 2)):
+            raise LoginBusy('Too many logins in progress')
+        try:
+            future = pool.submit(cls._check, password, password_hash)
+        except RuntimeError:
+            cls._slots.release()
+            raise
+        future.add_done_callback(lambda _: cls._slots.release())
+        return future
+
+    @staticmethod
+    def rounds():
+        """bcrypt cost for new hashes (calibrate with the calibrate_password_hash command)"""
+        return getattr(settings, 'PASSWORD_HASH_ROUNDS', 12)
+
+    @staticmethod
+    def hash(password):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(PasswordHasher.rounds())).decode('utf-8')
+
+    @staticmethod
+    def cost_of(password_hash):
+        """Cost stored in a $2b$NN$... hash, None if it is not a bcrypt hash"""
+        try:
+            return int(password_hash.split('$')[2])
+        except (AttributeError, IndexError, ValueError):
+            return None
+
+    @staticmethod
+    def needs_rehash(password_hash):
+        cost = PasswordHasher.cost_of(password_hash)
+        return cost is not None and cost != PasswordHasher.rounds()
+
+    @classmethod
+    def rehash_if_needed(cls, admin, password):
+        """
+        After a successful login, move the stored hash to the configured cost in the
+        background. Skipped (and retried on a later login) while the pool is busy.
+        """
+        if not cls.needs_rehash(admin.password_hash):
+            return False
+        pool = cls._get_pool()
+        if not cls._slots.acquire(blocking=False):
+            return False
+        try:
+            future = pool.submit(cls._rehash, admin.admin_id, password, admin.password_hash)
+        except RuntimeError:
+            cls._slots.release()
+            return False
+        future.add_done_callback(lambda _: cls._slots.release())
+        return True
+
+    @staticmethod
+    def _rehash(admin_id, password, old_hash):
+        from .models import AdminUser
+        try:
+            new_hash = PasswordHasher.hash(password)
+            # Only if the password was not changed in the meantime
+            updated = AdminUser.objects.filter(admin_id=admin_id, password_hash=old_hash).update(password_hash=new_hash)
+            if updated:
+                logger.info(f"Rehashed password of admin {admin_id} from cost "
+                            f"{PasswordHasher.cost_of(old_hash)} to {PasswordHasher.rounds()}")
+        except Exception as e:
+            logger.error(f"Failed to rehash password of admin {admin_id}: {e}")
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _check(password, password_hash):
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        except ValueError:
+            # Malformed/legacy hash in admin_user: treat as a wrong password
+            return False
+
+    @classmethod
+    def verify(cls, password, password_hash):
+        """Blocking check for WSGI views; the request thread waits but no longer burns a core"""
+        future = cls._submit(password, password_hash)
+        try:
+            return future.result(timeout=getattr(settings, 'LOGIN_HASH_TIMEOUT_SECONDS', 10))
+        except FutureTimeoutError:
+            raise LoginBusy('Password check timed out')
+
+    @classmethod
+    async def averify(cls, password, password_hash):
+        """Non-blocking check for async (FastAPI) handlers"""
+        future = cls._submit(password, password_hash)
+        return await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            timeout=getattr(settings, 'LOGIN_HASH_TIMEOUT_SECONDS', 10)
+        )
+
+
+class SuspiciousLoginWindow:
+    """Per-IP failed-login counters as Redis sorted sets (member per attempt, score = time)"""
+
+    @staticmethod
+    def record(ip_address, username, success):
+        """Record this attempt and return whether it is suspicious (same rule as before)"""
+        now = time.time()
+        key = f"{FAILURE_WINDOW_PREFIX}{ip_address}"
+        try:
+            pipe = r.pipeline()
+            pipe.zremrangebyscore(key, 0, now - SUSPICIOUS_WINDOW_SECONDS)
+            pipe.zcard(key)
+            if not success:
+                pipe.zadd(key, {f"{now}:{uuid.uuid4().hex[:8]}": now})
+                pipe.expire(key, SUSPICIOUS_WINDOW_SECONDS)
+            recent_failures = pipe.execute()[1]
+        except redis.RedisError as e:
+            logger.warning(f"Login window unavailable, counting in the database: {e}")
+            recent_failures = LoginAttempt.objects.filter(
+                ip_address=ip_address,
+                success=False,
+                timestamp__gte=timezone.now() - timedelta(seconds=SUSPICIOUS_WINDOW_SECONDS)
+            ).count()
+
+        return (recent_failures >= SUSPICIOUS_FAILURES) or (
+            not success and (username or '').lower() in SUSPICIOUS_USERNAMES
+        )
+
+    @staticmethod
+    def recent_failures(ip_address):
+        key = f"{FAILURE_WINDOW_PREFIX}{ip_address}"
+        return r.zcount(key, time.time() - SUSPICIOUS_WINDOW_SECONDS, '+inf')
+
+
+class LoginAttemptQueue:
+    """Queued LoginAttempt rows, persisted in batches (see flush_login_attempts)"""
+
+    COLUMNS = ('username', 'ip_address', 'user_agent', 'success', 'failure_reason',
+               'timestamp', 'location', 'is_suspicious', 'blocked')
+
+    @staticmethod
+    def batch_size():
+        return getattr(settings, 'LOGIN_LOG_BATCH_SIZE', 200)
+
+    @staticmethod
+    def flush_delay():
+        return getattr(settings, 'LOGIN_LOG_FLUSH_SECONDS', 5)
+
+    @staticmethod
+    def enqueue(username, ip_address, user_agent, success, failure_reason=None, location=None,
+                is_suspicious=False):
+        entry = {
+            'username': (username or '')[:150],
+            'ip_address': ip_address,
+            'user_agent': user_agent or '',
+            'success': bool(success),
+            'failure_reason': failure_reason[:100] if failure_reason else None,
+            'timestamp': timezone.now().isoformat(),
+            'location': location,
+            'is_suspicious': bool(is_suspicious),
+            'blocked': False,
+        }
+        try:
+            length = r.rpush(ATTEMPT_QUEUE_KEY, json.dumps(entry))
+        except redis.RedisError as e:
+            logger.warning(f"Login attempt queue unavailable, writing directly: {e}")
+            LoginAttemptQueue.write([entry])
+            return
+
+        try:
+            if length >= LoginAttemptQueue.batch_size():
+                LoginAttemptQueue.schedule_flush(countdown=0)
+            elif r.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=LoginAttemptQueue.flush_delay() * 2):
+                # First attempt since the last flush: persist it within flush_delay seconds
+                LoginAttemptQueue.schedule_flush(countdown=LoginAttemptQueue.flush_delay())
+        except Exception as e:
+            logger.error(f"Failed to schedule login attempt flush: {e}")
+
+    @staticmethod
+    def schedule_flush(countdown=0):
+        """Queue a background flush; falls back to flushing inline without a worker"""
+        from .tasks import flush_login_attempts
+        try:
+            flush_login_attempts.apply_async(countdown=countdown)
+        except Exception as e:
+            logger.warning(f"Could not queue login attempt flush, running inline: {e}")
+            LoginAttemptQueue.flush()
+
+    @staticmethod
+    def flush(max_batches=None):
+        """Move queued attempts into login_attempts; returns rows written"""
+        batch_size = LoginAttemptQueue.batch_size()
+        written = 0
+        batches = 0
+        r.delete(FLUSH_SCHEDULED_KEY)
+        while max_batches is None or batches < max_batches:
+            pipe = r.pipeline()
+            pipe.lrange(ATTEMPT_QUEUE_KEY, 0, batch_size - 1)
+            pipe.ltrim(ATTEMPT_QUEUE_KEY, batch_size, -1)
+            raw, _ = pipe.execute()
+            if not raw:
+                break
+            entries = [json.loads(item) for item in raw]
+            try:
+                LoginAttemptQueue.write(entries)
+            except Exception:
+                # Put the batch back for the next flush
+                r.rpush(ATTEMPT_QUEUE_KEY, *raw)
+                raise
+            written += len(entries)
+            batches += 1
+        return written
+
+    @staticmethod
+    def write(entries):
+        """One multi-row INSERT; the queued timestamp is kept (auto_now_add would overwrite it)"""
+        if not entries:
+            return
+        rows = []
+        for entry in entries:
+            timestamp = entry['timestamp']
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            values = dict(entry, timestamp=connection.ops.adapt_datetimefield_value(timestamp))
+            rows.append([values[column] for column in LoginAttemptQueue.COLUMNS])
+
+        placeholders = ', '.join(['%s'] * len(LoginAttemptQueue.COLUMNS))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {LoginAttempt._meta.db_table} ({', '.join(LoginAttemptQueue.COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                rows
+            )
@@ -0,0 +1,174 @@
+"""
+Django management command to benchmark answer writes under contention.
+
+Many writers hammer the same questions of one form through AnswerManager
+(compare-and-set on answers.version) and the command reports throughput,
+latency, conflict rate and whether any update was lost. The answers touched
+are restored to their original state afterwards.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import random
+import time
+
+from apps.core.models import Form, Question, Answer
+from apps.core.utils import AnswerManager, AnswerConflict
+from apps.core.progress import FormProgressManager
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent answer writes on one form (optimistic concurrency)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--form-id',
+            type=int,
+            required=True,
+            help='Form whose answers are written concurrently'
+        )
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=20,
+            help='Number of concurrent writers (default: 20)'
+        )
+        parser.add_argument(
+            '--writes-per-writer',
+            type=int,
+            default=50,
+            help='Successful writes each writer attempts (default: 50)'
+        )
+        parser.add_argument(
+            '--questions',
+            type=int,
+            default=1,
+            help='Number of distinct questions to spread writes over; 1 = worst case (default: 1)'
+        )
+        parser.add_argument(
+            '--max-retries',
+            type=int,
+            default=10,
+            help='Re-read and retry a conflicting write up to this many times (default: 10)'
+        )
+
+    def handle(self, *args, **options):
+        form_id = options['form_id']
+        writers = options['writers']
+        writes_per_writer = options['writes_per_writer']
+        max_retries = options['max_retries']
+
+        if not Form.objects.filter(form_id=form_id).exists():
+            raise CommandError(f'Form {form_id} does not exist')
+
+        question_ids = list(
+            Question.objects.order_by('question_id').values_list('question_id', flat=True)[:options['questions']]
+        )
+        if not question_ids:
+            raise CommandError('No questions found')
+
+        self.stdout.write("Starting answer contention benchmark...")
+        self.stdout.write(f"Form: {form_id}")
+        self.stdout.write(f"Writers: {writers}")
+        self.stdout.write(f"Writes per writer: {writes_per_writer}")
+        self.stdout.write(f"Questions: {len(question_ids)}")
+
+        # Snapshot so the benchmark leaves the form as it found it
+        original = {
+            a['question_id']: a
+            for a in Answer.objects.filter(form_id=form_id, question_id__in=question_ids)
+                                   .values('answer_id', 'question_id', 'response', 'sub_answers', 'version', 'answered_at')
+        }
+
+        stats = {'writes': 0, 'conflicts': 0, 'gave_up': 0, 'latencies': []}
+        stats_lock = Lock()
+
+        def writer(writer_id):
+            local = {'writes': 0, 'conflicts': 0, 'gave_up': 0, 'latencies': []}
+            try:
+                for i in range(writes_per_writer):
+                    question_id = random.choice(question_ids)
+                    value = f'bench-{writer_id}-{i}'
+                    for attempt in range(max_retries + 1):
+                        current = (Answer.objects.filter(form_id=form_id, question_id=question_id)
+                                   .values_list('version', flat=True).first())
+                        started = time.perf_counter()
+                        try:
+                            AnswerManager.save_answer(form_id, question_id, value, current or 0)
+                            local['latencies'].append(time.perf_counter() - started)
+                            local['writes'] += 1
+                            break
+                        except AnswerConflict:
+                            local['latencies'].append(time.perf_counter() - started)
+                            local['conflicts'] += 1
+                    else:
+                        local['gave_up'] += 1
+            finally:
+                connection.close()
+            with stats_lock:
+                for key in ('writes', 'conflicts', 'gave_up'):
+                    stats[key] += local[key]
+                stats['latencies'].extend(local['latencies'])
+
+        baseline_versions = {
+            q: (original[q]['version'] if q in original else 0) for q in question_ids
+        }
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=writers) as executor:
+                list(executor.map(writer, range(writers)))
+            elapsed = time.perf_counter() - started
+
+            final_versions = dict(
+                Answer.objects.filter(form_id=form_id, question_id__in=question_ids)
+                              .values_list('question_id', 'version')
+            )
+        finally:
+            self.restore(form_id, question_ids, original)
+
+        # Every successful write bumps exactly one version, so the sum of version deltas
+        # must equal the number of successful writes; anything else is a lost update.
+        version_delta = sum(final_versions.get(q, 0) - baseline_versions[q] for q in question_ids)
+        lost_updates = stats['writes'] - version_delta
+
+        latencies = sorted(stats['latencies'])
+        attempts = len(latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write("ANSWER CONTENTION RESULTS")
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"Elapsed: {elapsed:.2f}s")
+        self.stdout.write(f"Attempts: {attempts}")
+        self.stdout.write(f"Successful writes: {stats['writes']} ({stats['writes'] / elapsed:.1f}/s)")
+        self.stdout.write(f"Conflicts reported: {stats['conflicts']} "
+                          f"({(stats['conflicts'] / attempts * 100) if attempts else 0:.1f}% of attempts)")
+        self.stdout.write(f"Writes abandoned after {max_retries} retries: {stats['gave_up']}")
+        self.stdout.write(f"Latency p50/p95/p99: {percentile(0.50):.1f} / {percentile(0.95):.1f} / "
+                          f"{percentile(0.99):.1f} ms")
+
+        if lost_updates == 0:
+            self.stdout.write(self.style.SUCCESS("No lost updates detected"))
+        else:
+            self.stdout.write(self.style.ERROR(f"{lost_updates} lost update(s) detected"))
+
+    def restore(self, form_id, question_ids, original):
+        """Put the benchmarked answers back the way they were"""
+        Answer.objects.filter(form_id=form_id, question_id__in=question_ids).exclude(
+            question_id__in=list(original.keys())
+        ).delete()
+        for question_id, row in original.items():
+            Answer.objects.filter(answer_id=row['answer_id']).update(
+                response=row['response'],
+                sub_answers=row['sub_answers'],
+                version=row['version'],
+                answered_at=row['answered_at']
+            )
+        FormProgressManager.rebuild(form_id)
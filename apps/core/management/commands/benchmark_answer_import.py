@@ -0,0 +1,127 @@
+"""
+Django management command to benchmark the offline answer import.
+
+A CSV with one valid answer per question is generated and imported into one form
+through OfflineAnswerImporter, once with the configured chunk size (one multi-row
+upsert per chunk) and once with chunks of one row (one round trip per answer, what
+a non-batched executemany costs), and the rows/s of each are reported. The form's
+answers are restored to their original state afterwards.
+"""
+
+import csv
+import os
+import statistics
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.answer_import import OfflineAnswerImporter
+from apps.core.models import Answer, Form
+from apps.core.progress import FormProgressManager
+
+
+class Command(BaseCommand):
+    help = 'Benchmark chunked offline answer imports against per-row writes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--form-id',
+            type=int,
+            required=True,
+            help='Form the generated answers are imported into'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=None,
+            help='Answers per import, at most one per question (default: every question)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Chunk size of the batched run (default: OFFLINE_IMPORT_CHUNK_SIZE)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Imports per mode; the median rows/s is reported (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        form_id = options['form_id']
+        if not Form.objects.filter(form_id=form_id).exists():
+            raise CommandError(f'Form {form_id} does not exist')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        question_map = OfflineAnswerImporter.get_question_map()
+        question_ids = sorted(question_map)[:options['rows']] if options['rows'] else sorted(question_map)
+        if not question_ids:
+            raise CommandError('No questions found')
+        chunk_size = options['chunk_size'] or getattr(settings, 'OFFLINE_IMPORT_CHUNK_SIZE', 2000)
+
+        self.stdout.write("Starting offline answer import benchmark...")
+        self.stdout.write(f"Form: {form_id}")
+        self.stdout.write(f"Rows per import: {len(question_ids)}")
+
+        original = list(
+            Answer.objects.filter(form_id=form_id)
+                          .values('answer_id', 'question_id', 'response', 'sub_answers', 'version', 'answered_at')
+        )
+
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        results = {}
+        try:
+            with os.fdopen(handle, 'w', newline='', encoding='utf-8') as out:
+                writer = csv.writer(out)
+                writer.writerow(['question_id', 'answer'])
+                for question_id in question_ids:
+                    writer.writerow([question_id, self.sample_value(*question_map[question_id])])
+
+            for label, size in (('per-row', 1), (f'chunk {chunk_size}', chunk_size)):
+                rates = []
+                for _ in range(options['repeat']):
+                    stats = OfflineAnswerImporter(form_id, path, 'csv', chunk_size=size).run()
+                    if stats['error_count']:
+                        raise CommandError(f"Generated rows were rejected: {stats['errors'][:3]}")
+                    rates.append(stats['rows_per_second'])
+                results[label] = statistics.median(rates)
+        finally:
+            os.remove(path)
+            self.restore(form_id, original)
+
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write("OFFLINE IMPORT RESULTS")
+        self.stdout.write("=" * 60)
+        for label, rate in results.items():
+            self.stdout.write(f"{label:<16}{rate:>12.1f} rows/s")
+        per_row, batched = results.values()
+        if per_row:
+            self.stdout.write(self.style.SUCCESS(f"Speed-up from batching: {batched / per_row:.1f}x"))
+
+    @staticmethod
+    def sample_value(answer_type, allowed_choices):
+        if allowed_choices:
+            return sorted(allowed_choices)[0]
+        if answer_type in ('number', 'percentage'):
+            return '42'
+        if answer_type == 'date':
+            return '2024-01-15'
+        return 'benchmark answer'
+
+    def restore(self, form_id, original):
+        """Put the form's answers back the way they were"""
+        Answer.objects.filter(form_id=form_id).exclude(
+            answer_id__in=[row['answer_id'] for row in original]
+        ).delete()
+        for row in original:
+            Answer.objects.filter(answer_id=row['answer_id']).update(
+                response=row['response'],
+                sub_answers=row['sub_answers'],
+                version=row['version'],
+                answered_at=row['answered_at']
+            )
+        FormProgressManager.rebuild(form_id)
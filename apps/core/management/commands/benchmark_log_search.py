@@ -0,0 +1,132 @@
+"""
+Django management command to compare log search paths.
+
+For each search term and log table (AuditLog, LoginAttempt, AdminActivityLog) it runs
+the same date-bounded search twice, through the former icontains filters and through
+the ngram FULLTEXT index (apps.admin_management.log_search), and reports the median
+time of the first page and of the match count, the row counts and the index MySQL
+chose. Read-only; needs a MySQL database with migration 0024 applied.
+"""
+
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.admin_management.log_search import FULLTEXT_COLUMNS, search_q
+from apps.core.models import AdminActivityLog, AuditLog, LoginAttempt
+
+# The icontains columns each table was searched on before full-text search
+ICONTAINS_FIELDS = {
+    AuditLog: ('user__username', 'action_type', 'description', 'resource_type'),
+    LoginAttempt: ('username', 'ip_address', 'location', 'failure_reason'),
+    AdminActivityLog: ('admin_user__username', 'action', 'resource_type'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark icontains against FULLTEXT (ngram) log search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--terms',
+            nargs='+',
+            default=['login', 'update', 'admin', 'form', 'fail'],
+            help='Search terms to time (default: login update admin form fail)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Date window searched, ending now (default: 30)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per measurement; the median is reported (default: 5)'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=25,
+            help='Rows fetched for the first-page timing (default: 25)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql':
+            raise CommandError('The FULLTEXT search path needs MySQL')
+        if options['repeat'] < 1 or options['days'] < 1:
+            raise CommandError('--repeat and --days must be at least 1')
+
+        end = timezone.now()
+        start = end - timedelta(days=options['days'])
+        self.stdout.write("Starting log search benchmark...")
+        self.stdout.write(f"Window: last {options['days']} days, {options['repeat']} runs per measurement")
+
+        speedups = []
+        for model in FULLTEXT_COLUMNS:
+            self.stdout.write("\n" + "=" * 78)
+            self.stdout.write(f"{model._meta.db_table} ({model.objects.count()} rows)")
+            self.stdout.write("=" * 78)
+            self.stdout.write(f"{'term':<14}{'path':<11}{'page ms':>9}{'count ms':>10}{'matches':>10}  index")
+            for term in options['terms']:
+                results = {}
+                for path, enabled in (('icontains', False), ('fulltext', True)):
+                    with override_settings(LOG_SEARCH_FULLTEXT=enabled):
+                        queryset = model.objects.filter(
+                            search_q(model, term, ICONTAINS_FIELDS[model]), timestamp__range=(start, end)
+                        )
+                        results[path] = self.measure(queryset, options['repeat'], options['page_size'])
+                for path, result in results.items():
+                    self.stdout.write(
+                        f"{term:<14}{path:<11}{result['page_ms']:>9.1f}{result['count_ms']:>10.1f}"
+                        f"{result['matches']:>10}  {result['index']}"
+                    )
+                if results['fulltext']['count_ms']:
+                    speedups.append(results['icontains']['count_ms'] / results['fulltext']['count_ms'])
+
+        if speedups:
+            self.stdout.write(self.style.SUCCESS(
+                f"\nMedian speed-up of the full match count: {statistics.median(speedups):.1f}x"
+            ))
+        self.stdout.write(
+            "Match counts can differ: FULLTEXT matches whole ngram phrases per column, and "
+            "terms shorter than the ngram size fall back to icontains."
+        )
+
+    def measure(self, queryset, repeat, page_size):
+        page_times, count_times = [], []
+        matches = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.order_by('-timestamp')[:page_size])
+            page_times.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            matches = queryset.count()
+            count_times.append((time.perf_counter() - started) * 1000)
+        return {
+            'page_ms': statistics.median(page_times),
+            'count_ms': statistics.median(count_times),
+            'matches': matches,
+            'index': self.index_used(queryset),
+        }
+
+    @staticmethod
+    def index_used(queryset):
+        """Access type and key of the log table in EXPLAIN (e.g. 'fulltext audit_logs_search_ft')"""
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [col[0] for col in cursor.description]
+            for row in cursor.fetchall():
+                row = dict(zip(columns, row))
+                if row.get('table') == table:
+                    return f"{row.get('type')} {row.get('key') or '-'}"
+        return '?'
@@ -0,0 +1,183 @@
+"""
+Django management command to benchmark login throughput under a login wave.
+
+Runs the same burst of logins (a share of them with wrong passwords) through request
+threads twice:
+- inline: bcrypt on the request thread, LoginAttempt INSERT plus the suspicious-login
+  COUNT on every attempt (the previous login_view behaviour)
+- pipeline: bcrypt in the bounded PasswordHasher pool, attempts queued in Redis and
+  checked against the sliding-window counters (apps.core.login_pipeline)
+and reports logins/s, latency and database statements on the request path. Benchmark
+attempts (username benchmark-login) and their Redis counters are removed afterwards.
+"""
+
+import queue
+import random
+import statistics
+import threading
+import time
+from datetime import timedelta
+
+import bcrypt
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.core.login_pipeline import (
+    FAILURE_WINDOW_PREFIX, LoginAttemptQueue, LoginBusy, PasswordHasher, r
+)
+from apps.core.models import LoginAttempt
+from apps.utils.logging import SystemLogger
+
+USERNAME = 'benchmark-login'
+PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = 'Compare login throughput of the inline path and the login pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=400,
+            help='Logins per mode (default: 400)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Simultaneous request threads (default: 32)'
+        )
+        parser.add_argument(
+            '--cost',
+            type=int,
+            default=12,
+            help='bcrypt cost of the benchmark hash (default: 12, same as bcrypt.gensalt())'
+        )
+        parser.add_argument(
+            '--failure-rate',
+            type=float,
+            default=0.2,
+            help='Share of logins with a wrong password (default: 0.2)'
+        )
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        concurrency = options['concurrency']
+        if logins < 1 or concurrency < 1:
+            raise CommandError('--logins and --concurrency must be at least 1')
+
+        password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(options['cost'])).decode('utf-8')
+        rng = random.Random(42)
+        attempts = [
+            (f"203.0.113.{rng.randint(1, 254)}", rng.random() >= options['failure_rate'])
+            for _ in range(logins)
+        ]
+
+        self.stdout.write("Starting login throughput benchmark...")
+        self.stdout.write(f"Logins: {logins}, request threads: {concurrency}, bcrypt cost: {options['cost']}, "
+                          f"hash workers: {PasswordHasher.workers()}")
+
+        try:
+            inline = self.run_wave(self.inline_login, attempts, password_hash, concurrency)
+            pipeline = self.run_wave(self.pipeline_login, attempts, password_hash, concurrency)
+            started = time.perf_counter()
+            flushed = LoginAttemptQueue.flush()
+            flush_ms = (time.perf_counter() - started) * 1000
+        finally:
+            self.cleanup(attempts)
+
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write("LOGIN THROUGHPUT RESULTS")
+        self.stdout.write("=" * 60)
+        for name, result in (('inline', inline), ('pipeline', pipeline)):
+            self.stdout.write(
+                f"{name:<9} {result['throughput']:7.1f} logins/s  median {result['median']:7.1f} ms  "
+                f"p95 {result['p95']:7.1f} ms  db statements/login {result['queries'] / logins:.2f}  "
+                f"busy {result['busy']}"
+            )
+        self.stdout.write(f"Queued attempts flushed afterwards: {flushed} rows in {flush_ms:.0f} ms")
+        self.stdout.write(self.style.SUCCESS("Login throughput benchmark completed"))
+
+    def run_wave(self, login, attempts, password_hash, concurrency):
+        work = queue.Queue()
+        for attempt in attempts:
+            work.put(attempt)
+        latencies = []
+        counters = {'queries': 0, 'busy': 0}
+        lock = threading.Lock()
+
+        def count_queries(execute, sql, params, many, context):
+            with lock:
+                counters['queries'] += 1
+            return execute(sql, params, many, context)
+
+        def request_thread():
+            try:
+                with connection.execute_wrapper(count_queries):
+                    while True:
+                        try:
+                            ip_address, correct = work.get_nowait()
+                        except queue.Empty:
+                            return
+                        started = time.perf_counter()
+                        try:
+                            login(ip_address, PASSWORD if correct else 'wrong-password', password_hash)
+                        except LoginBusy:
+                            with lock:
+                                counters['busy'] += 1
+                        elapsed = (time.perf_counter() - started) * 1000
+                        with lock:
+                            latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=request_thread) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'throughput': len(attempts) / duration,
+            'median': statistics.median(latencies),
+            'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'queries': counters['queries'],
+            'busy': counters['busy'],
+        }
+
+    def inline_login(self, ip_address, password, password_hash):
+        success = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        recent_failures = LoginAttempt.objects.filter(
+            ip_address=ip_address, success=False, timestamp__gte=timezone.now() - timedelta(hours=1)
+        ).count()
+        LoginAttempt.objects.create(
+            username=USERNAME,
+            ip_address=ip_address,
+            user_agent='benchmark',
+            success=success,
+            failure_reason=None if success else 'Invalid password',
+            is_suspicious=recent_failures >= 3
+        )
+        return success
+
+    def pipeline_login(self, ip_address, password, password_hash):
+        success = PasswordHasher.verify(password, password_hash)
+        SystemLogger.log_login_attempt(
+            username=USERNAME,
+            ip_address=ip_address,
+            user_agent='benchmark',
+            success=success,
+            failure_reason=None if success else 'Invalid password'
+        )
+        return success
+
+    def cleanup(self, attempts):
+        deleted, _ = LoginAttempt.objects.filter(username=USERNAME).delete()
+        ips = {ip_address for ip_address, _ in attempts}
+        r.delete(*[f"{FAILURE_WINDOW_PREFIX}{ip_address}" for ip_address in ips])
+        self.stdout.write(f"Removed {deleted} benchmark login attempts")
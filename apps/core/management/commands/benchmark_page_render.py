@@ -0,0 +1,140 @@
+"""
+Django management command to benchmark full-page rendering with and without fragment caching.
+
+Renders the questionnaire page (dashboard/user_form.html), the user dashboard overview
+and the admin dashboard the way their views do, first with fragment caching disabled
+(timeout 0, every {% cache %} block re-renders) and then with warm fragments, and
+reports per-page render times. Nothing is written to the database.
+"""
+
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from apps.core.fragments import fragment_context
+from apps.core.schema import QuestionnaireSchema
+from apps.core.views import build_user_form_context
+
+# A nationwide admin; the scope only feeds the fragment key
+SAMPLE_ADMIN_SCOPE = {
+    'admin_level': 'central',
+    'permissions': {
+        'can_create_users': True,
+        'can_manage_users': True,
+        'can_set_deadlines': True,
+        'can_approve_submissions': True,
+        'can_view_system_logs': True,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare server-side page render time with fragment caching off and on'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Renders per page and mode (default: 200)'
+        )
+        parser.add_argument(
+            '--page',
+            choices=['user_form', 'dashboard', 'admin'],
+            action='append',
+            help='Only benchmark these pages (repeatable; default: all)'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        schema = QuestionnaireSchema.get()
+        pages = {
+            'user_form': ('dashboard/user_form.html', self.user_form_context),
+            'dashboard': ('user_dashboard/overview.html', self.dashboard_context),
+            'admin': ('admin/admin.html', self.admin_context),
+        }
+        selected = options['page'] or list(pages)
+
+        self.stdout.write("Starting page render benchmark...")
+        self.stdout.write(f"Schema version: {schema.version} ({len(schema.questions)} questions)")
+        self.stdout.write(f"Iterations: {iterations}")
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write("PAGE RENDER RESULTS (ms per render)")
+        self.stdout.write("=" * 60)
+        for name in selected:
+            template_name, build_context = pages[name]
+            uncached = self.measure(template_name, build_context, request, iterations, timeout=0)
+            cached = self.measure(template_name, build_context, request, iterations, timeout=None)
+            speedup = uncached['median'] / cached['median'] if cached['median'] else float('inf')
+            self.stdout.write(
+                f"{name:<10} uncached median {uncached['median']:.2f} / p95 {uncached['p95']:.2f}  "
+                f"cached median {cached['median']:.2f} / p95 {cached['p95']:.2f}  "
+                f"({speedup:.1f}x, {cached['size'] / 1024:.0f} KiB)"
+            )
+            if uncached['size'] != cached['size']:
+                self.stdout.write(self.style.WARNING(
+                    f"  {name}: cached page differs in size ({uncached['size']} vs {cached['size']} bytes)"
+                ))
+
+        self.stdout.write(self.style.SUCCESS("Page render benchmark completed"))
+
+    def measure(self, template_name, build_context, request, iterations, timeout):
+        """timeout=0 disables fragment caching; None keeps the configured timeout"""
+        timings = []
+        size = 0
+        # One untimed render warms the fragments (and the template loader)
+        for i in range(iterations + 1):
+            started = time.perf_counter()
+            context = build_context()
+            if timeout is not None:
+                context['fragment_timeout'] = timeout
+            html = render_to_string(template_name, context, request=request)
+            if i:
+                timings.append((time.perf_counter() - started) * 1000)
+            size = len(html)
+        timings.sort()
+        return {
+            'median': statistics.median(timings),
+            'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            'size': size,
+        }
+
+    def user_form_context(self):
+        # No form: the per-user overlay is empty, the questionnaire markup is complete
+        context = build_user_form_context(None, None)
+        context['active_page'] = 'form'
+        return context
+
+    def dashboard_context(self):
+        context = {
+            'user': {'username': 'benchmark', 'email': 'benchmark@example.com', 'is_authenticated': True},
+            'school_name': 'Benchmark School',
+            'role': 'school',
+            'full_name': 'Benchmark User',
+            'admin_level': 'school',
+            'user_type': 'school_user',
+            'active_page': 'overview',
+        }
+        context.update(fragment_context())
+        return context
+
+    def admin_context(self):
+        context = {
+            'admin_scope': SAMPLE_ADMIN_SCOPE,
+            'admin_level': SAMPLE_ADMIN_SCOPE['admin_level'],
+            'permissions': SAMPLE_ADMIN_SCOPE['permissions'],
+            'recent_activities': [],
+        }
+        context.update(fragment_context(admin_scope=SAMPLE_ADMIN_SCOPE))
+        return context
@@ -0,0 +1,110 @@
+"""
+Django management command to measure session write volume under autosave traffic.
+
+Simulates N logged-in users each sending M requests (the form autosave pattern) with
+SESSION_SAVE_EVERY_REQUEST semantics: every request loads the session and saves it,
+and only every Nth request actually changes session data. The same traffic is run
+against the database session engine and the Redis engine (apps.core.redis_sessions),
+counting the statements that reach django_session. Sessions are deleted afterwards.
+"""
+
+import time
+
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.core import redis_sessions
+
+
+class Command(BaseCommand):
+    help = 'Compare django_session writes of the database and Redis session engines under autosave traffic'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sessions',
+            type=int,
+            default=50,
+            help='Simulated users (default: 50)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Autosave requests per user (default: 200)'
+        )
+        parser.add_argument(
+            '--change-every',
+            type=int,
+            default=20,
+            help='Every Nth request modifies session data (default: 20; 0 = never)'
+        )
+
+    def handle(self, *args, **options):
+        sessions = options['sessions']
+        requests = options['requests']
+        change_every = options['change_every']
+        if sessions < 1 or requests < 1:
+            raise CommandError('--sessions and --requests must be at least 1')
+
+        self.stdout.write("Starting session write benchmark...")
+        self.stdout.write(f"Users: {sessions}, requests per user: {requests}, "
+                          f"data changes every {change_every or 'never'} requests")
+
+        db_result = self.run_traffic(DBSessionStore, sessions, requests, change_every)
+        before = dict(redis_sessions.stats)
+        redis_result = self.run_traffic(redis_sessions.SessionStore, sessions, requests, change_every)
+        redis_stats = {key: redis_sessions.stats[key] - before.get(key, 0) for key in redis_sessions.stats}
+
+        total = sessions * requests
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write("SESSION WRITE RESULTS")
+        self.stdout.write("=" * 60)
+        for name, result in (('database', db_result), ('redis', redis_result)):
+            self.stdout.write(
+                f"{name:<9} django_session reads {result['reads']:>7}  writes {result['writes']:>7}  "
+                f"({result['duration_ms']:.0f} ms, {result['duration_ms'] * 1000 / total:.0f} us/request)"
+            )
+        self.stdout.write(
+            f"Redis engine: {redis_stats['writes']} SETs, {redis_stats['touches']} TTL touches, "
+            f"{redis_stats['skipped']} saves skipped, {redis_stats['db_writes']} database fallbacks"
+        )
+        removed = db_result['writes'] - redis_result['writes']
+        share = removed * 100 / db_result['writes'] if db_result['writes'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"MySQL session writes removed: {removed} of {db_result['writes']} ({share:.1f}%)"
+        ))
+
+    def run_traffic(self, store_class, sessions, requests, change_every):
+        keys = []
+        for user in range(sessions):
+            store = store_class()
+            store['admin_id'] = -(user + 1)
+            store['user_type'] = 'benchmark'
+            store.create()
+            keys.append(store.session_key)
+
+        started = time.perf_counter()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                for i in range(requests):
+                    for key in keys:
+                        # One request: SessionMiddleware loads lazily, the view reads, the response saves
+                        store = store_class(key)
+                        store.get('admin_id')
+                        if change_every and i % change_every == 0:
+                            store['last_autosave'] = i
+                        store.save()
+            duration_ms = (time.perf_counter() - started) * 1000
+        finally:
+            cleanup = store_class()
+            for key in keys:
+                cleanup.delete(key)
+
+        session_queries = [q['sql'] for q in queries.captured_queries if 'django_session' in q['sql']]
+        return {
+            'reads': sum(1 for sql in session_queries if sql.lstrip().upper().startswith('SELECT')),
+            'writes': sum(1 for sql in session_queries if not sql.lstrip().upper().startswith('SELECT')),
+            'duration_ms': duration_ms,
+        }
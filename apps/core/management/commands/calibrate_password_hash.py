@@ -0,0 +1,153 @@
+"""
+Django management command to calibrate the bcrypt cost for admin passwords.
+
+Measures bcrypt verification time on this host for a range of costs, scales it to the
+CPU budget of the container (cgroup quota, or --cpus), and reports per cost the latency
+of one login and the logins per second the budget can sustain. The recommended cost is
+the highest one whose verification stays within PASSWORD_HASH_TARGET_MS. Also shows how
+many stored admin_user hashes still use another cost (they are rehashed on their next
+successful login once PASSWORD_HASH_ROUNDS is changed).
+"""
+
+import os
+import statistics
+import time
+from collections import Counter
+
+import bcrypt
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.login_pipeline import PasswordHasher
+from apps.core.models import AdminUser
+
+# Never recommend less than this, whatever the hardware
+MIN_COST = 10
+
+
+def container_cpus():
+    """CPU quota of this container (cgroup v2, then v1), else the visible core count"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return float(os.cpu_count() or 1)
+
+
+class Command(BaseCommand):
+    help = 'Measure bcrypt cost vs login latency/capacity and recommend PASSWORD_HASH_ROUNDS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-cost',
+            type=int,
+            default=MIN_COST,
+            help=f'Lowest cost to measure (default: {MIN_COST})'
+        )
+        parser.add_argument(
+            '--max-cost',
+            type=int,
+            default=14,
+            help='Highest cost to measure (default: 14)'
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=5,
+            help='Verifications timed per cost (default: 5)'
+        )
+        parser.add_argument(
+            '--cpus',
+            type=float,
+            default=None,
+            help='CPU budget of the production container (default: detected cgroup quota)'
+        )
+        parser.add_argument(
+            '--target-ms',
+            type=int,
+            default=None,
+            help='Acceptable verification latency (default: PASSWORD_HASH_TARGET_MS)'
+        )
+
+    def handle(self, *args, **options):
+        min_cost, max_cost = options['min_cost'], options['max_cost']
+        if not 4 <= min_cost <= max_cost <= 31:
+            raise CommandError('Costs must satisfy 4 <= --min-cost <= --max-cost <= 31')
+        if options['samples'] < 1:
+            raise CommandError('--samples must be at least 1')
+        cpus = options['cpus'] or container_cpus()
+        target_ms = options['target_ms'] or getattr(settings, 'PASSWORD_HASH_TARGET_MS', 250)
+
+        self.stdout.write("Starting password hash calibration...")
+        self.stdout.write(f"CPU budget: {cpus:g} CPUs, target verification latency: {target_ms} ms, "
+                          f"current PASSWORD_HASH_ROUNDS: {PasswordHasher.rounds()}")
+
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write("BCRYPT COST RESULTS")
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"{'cost':>4}  {'cpu ms':>8}  {'login ms':>9}  {'hashes/s/core':>13}  {'logins/s':>8}")
+        recommended = None
+        for cost in range(min_cost, max_cost + 1):
+            cpu_ms = self.measure(cost, options['samples'])
+            # A lone verification is throttled to the quota when it is below one core
+            latency_ms = cpu_ms / min(cpus, 1.0)
+            capacity = cpus * 1000 / cpu_ms
+            fits = latency_ms <= target_ms
+            if fits:
+                recommended = cost
+            self.stdout.write(
+                f"{cost:>4}  {cpu_ms:>8.1f}  {latency_ms:>9.1f}  {1000 / cpu_ms:>13.1f}  {capacity:>8.1f}"
+                f"{'' if fits else '  (over target)'}"
+            )
+            if not fits:
+                # Each step doubles the work; higher costs only get slower
+                break
+
+        self.report_stored_costs()
+
+        if recommended is None:
+            self.stdout.write(self.style.WARNING(
+                f"Even cost {min_cost} exceeds {target_ms} ms here; keep at least {MIN_COST} "
+                f"and add CPU or raise PASSWORD_HASH_TARGET_MS"
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Recommended: PASSWORD_HASH_ROUNDS={recommended}"))
+
+    def measure(self, cost, samples):
+        """Median CPU milliseconds of one verification at `cost`"""
+        password = b'calibration-password'
+        password_hash = bcrypt.hashpw(password, bcrypt.gensalt(cost))
+        timings = []
+        for _ in range(samples):
+            started = time.thread_time()
+            bcrypt.checkpw(password, password_hash)
+            timings.append((time.thread_time() - started) * 1000)
+        return statistics.median(timings)
+
+    def report_stored_costs(self):
+        costs = Counter(
+            PasswordHasher.cost_of(password_hash)
+            for password_hash in AdminUser.objects.values_list('password_hash', flat=True).iterator()
+        )
+        if not costs:
+            return
+        summary = ', '.join(
+            f"cost {cost}: {count}" if cost is not None else f"not bcrypt: {count}"
+            for cost, count in sorted(costs.items(), key=lambda item: (item[0] is None, item[0] or 0))
+        )
+        pending = sum(count for cost, count in costs.items()
+                      if cost is not None and cost != PasswordHasher.rounds())
+        self.stdout.write(f"\nStored admin hashes: {summary}")
+        self.stdout.write(f"Waiting for rehash-on-login at cost {PasswordHasher.rounds()}: {pending}")
@@ -0,0 +1,178 @@
+"""
+Django management command to check the query budget of the user_form rendering path.
+
+Builds a throw-away questionnaire fixture (categories -> topics -> questions ->
+choices, plus a form with answers) inside a transaction that is rolled back, then
+counts the queries issued while building the user_form context. The count must be
+exactly the budget for a small and a large questionnaire alike; any per-question or
+per-topic query shows up as a failure.
+"""
+
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.models import (
+    Region, Division, District, School, Form,
+    Category, Topic, Question, QuestionChoice, Answer
+)
+from apps.core.schema import CompiledSchema, QuestionnaireSchema
+from apps.core.views import build_user_form_context
+
+# Form lookup + the form's answers; the tree itself comes from the compiled schema
+USER_FORM_QUERY_BUDGET = 2
+# One query per level: choices, questions, topics, categories
+SCHEMA_COMPILE_QUERY_BUDGET = 4
+
+
+class Command(BaseCommand):
+    help = 'Assert that user_form builds its context in a fixed number of queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--categories',
+            type=int,
+            default=10,
+            help='Categories in the large fixture (default: 10)'
+        )
+        parser.add_argument(
+            '--topics',
+            type=int,
+            default=10,
+            help='Topics per category (default: 10)'
+        )
+        parser.add_argument(
+            '--questions',
+            type=int,
+            default=40,
+            help='Questions per topic (default: 40)'
+        )
+        parser.add_argument(
+            '--choices',
+            type=int,
+            default=4,
+            help='Choices per choice question; every other question is a choice question (default: 4)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Checking user_form query budget...")
+
+        failures = []
+        for label, sizes in (
+            ('small', (1, 1, 1, options['choices'])),
+            ('large', (options['categories'], options['topics'], options['questions'], options['choices'])),
+        ):
+            result = self.measure(*sizes)
+            self.stdout.write(
+                f"{label}: {result['questions']} questions, {result['answers']} answers -> "
+                f"compile {result['compile_queries']} queries ({result['compile_ms']:.1f} ms), "
+                f"context {result['context_queries']} queries ({result['context_ms']:.1f} ms)"
+            )
+            if result['context_queries'] != USER_FORM_QUERY_BUDGET:
+                failures.append(
+                    f"{label}: user_form used {result['context_queries']} queries, "
+                    f"budget is {USER_FORM_QUERY_BUDGET}"
+                )
+                for sql in result['sql'][:10]:
+                    self.stdout.write(f"    {sql}")
+            if result['compile_queries'] != SCHEMA_COMPILE_QUERY_BUDGET:
+                failures.append(
+                    f"{label}: schema compile used {result['compile_queries']} queries, "
+                    f"budget is {SCHEMA_COMPILE_QUERY_BUDGET}"
+                )
+
+        if failures:
+            raise CommandError('Query budget exceeded:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS(
+            f"user_form stays at {USER_FORM_QUERY_BUDGET} queries regardless of questionnaire size"
+        ))
+
+    def measure(self, categories, topics, questions, choices):
+        """Build the fixture, measure, and roll everything back"""
+        with transaction.atomic():
+            user, school = self.create_owner()
+            form = Form.objects.create(user=user, school=school, status='draft')
+            question_ids = self.create_questionnaire(categories, topics, questions, choices)
+
+            # Answer every other question
+            answered_ids = question_ids[::2]
+            Answer.objects.bulk_create(
+                [Answer(form=form, question_id=qid, response=f'answer {qid}') for qid in answered_ids],
+                batch_size=1000
+            )
+
+            # Compile from this transaction's view of the tree without touching the shared cache
+            with CaptureQueriesContext(connection) as compile_ctx:
+                started = time.perf_counter()
+                schema = CompiledSchema(None, QuestionnaireSchema.compile_payload())
+                compile_ms = (time.perf_counter() - started) * 1000
+
+            with CaptureQueriesContext(connection) as context_ctx:
+                started = time.perf_counter()
+                context = build_user_form_context(user.pk, school.pk, schema=schema)
+                context_ms = (time.perf_counter() - started) * 1000
+
+            if context['total_questions'] < len(question_ids):
+                raise CommandError('Fixture questions are missing from the user_form context')
+
+            transaction.set_rollback(True)
+
+        return {
+            'questions': len(question_ids),
+            'answers': len(answered_ids),
+            'compile_queries': len(compile_ctx.captured_queries),
+            'compile_ms': compile_ms,
+            'context_queries': len(context_ctx.captured_queries),
+            'context_ms': context_ms,
+            'sql': [q['sql'] for q in context_ctx.captured_queries],
+        }
+
+    def create_owner(self):
+        tag = uuid.uuid4().hex[:8]
+        region = Region.objects.create(name=f'Query budget {tag}')
+        division = Division.objects.create(name=f'Query budget {tag}', region=region)
+        district = District.objects.create(name=f'Query budget {tag}', division=division)
+        school = School.objects.create(
+            school_name=f'Query budget {tag}',
+            school_id=f'QB{tag}',
+            district=district,
+            division=division,
+            region=region
+        )
+        user = User.objects.create(username=f'query_budget_{tag}')
+        return user, school
+
+    def create_questionnaire(self, categories, topics, questions, choices):
+        """Returns the created question ids"""
+        topic_ids = []
+        for c in range(categories):
+            category = Category.objects.create(name=f'Budget category {c + 1}', display_order=10000 + c)
+            for t in range(topics):
+                topic_ids.append(Topic.objects.create(
+                    category=category, name=f'Budget topic {c + 1}.{t + 1}', display_order=t + 1
+                ).topic_id)
+
+        Question.objects.bulk_create([
+            Question(
+                topic_id=topic_id,
+                question_text=f'Budget question {q + 1}',
+                answer_type='choice' if q % 2 else 'text',
+                display_order=q + 1
+            )
+            for topic_id in topic_ids for q in range(questions)
+        ], batch_size=1000)
+
+        # bulk_create does not return ids on MySQL, so read them back
+        question_rows = list(
+            Question.objects.filter(topic_id__in=topic_ids).values_list('question_id', 'answer_type')
+        )
+        QuestionChoice.objects.bulk_create([
+            QuestionChoice(question_id=question_id, choice_text=f'Choice {n + 1}')
+            for question_id, answer_type in question_rows if answer_type == 'choice'
+            for n in range(choices)
+        ], batch_size=1000)
+        return [question_id for question_id, _ in question_rows]
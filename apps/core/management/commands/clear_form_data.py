@@ -18,6 +18,7 @@ from apps.core.models import (
     Question, Topic, Category,
     Answer, QuestionChoice
 )
+from apps.core.progress import FormProgressManager
 import sys
 
 
@@ -135,6 +136,9 @@ class Command(BaseCommand):
                     self.stdout.write(f"Deleting {counts['categories']:,} categories...")
                     Category.objects.all().delete()
                 
+                # Answered-question bitmaps and counters refer to the deleted schema
+                FormProgressManager.invalidate_all()
+                
                 # Verify deletion
                 remaining_counts = {
                     'questions': Question.objects.count(),
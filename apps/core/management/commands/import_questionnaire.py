@@ -0,0 +1,106 @@
+"""
+Django management command to sync the questionnaire from a JSON/XLSX/CSV file.
+
+The file is diffed against the current categories, topics, questions and choices;
+only the difference is written (chunked bulk inserts, updates, reorders and deletes
+in one transaction) and the compiled schema version is bumped once.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.schema_import import QuestionnaireImportError, QuestionnaireSync, load_questionnaire
+
+
+class Command(BaseCommand):
+    help = 'Import a questionnaire file, applying only the changes against the current tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Questionnaire file (.json nested or fixture, .xlsx, .csv)'
+        )
+        parser.add_argument(
+            '--format',
+            dest='file_format',
+            help='Override the format detected from the file extension'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the changes without writing them'
+        )
+        parser.add_argument(
+            '--keep-missing',
+            action='store_true',
+            help='Do not delete categories/topics/questions that are absent from the file'
+        )
+        parser.add_argument(
+            '--allow-answer-loss',
+            action='store_true',
+            help='Allow deleting questions that already have answers (their answers are deleted too)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Rows per bulk statement (default: SCHEMA_IMPORT_CHUNK_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            categories = load_questionnaire(options['path'], options['file_format'])
+            sync = QuestionnaireSync(
+                categories,
+                delete_missing=not options['keep_missing'],
+                allow_answer_loss=options['allow_answer_loss'],
+                chunk_size=options['chunk_size']
+            )
+            plan = sync.compute_plan()
+        except QuestionnaireImportError as e:
+            for error in e.errors:
+                self.stdout.write(f"  {error}")
+            raise CommandError(str(e))
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+
+        questions = sum(len(t.get('questions') or []) for c in categories for t in c.get('topics') or [])
+        self.stdout.write(f"Read {len(categories)} categories, {questions} questions "
+                          f"in {(time.monotonic() - started) * 1000:.0f} ms")
+        self.print_changes(plan)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("DRY RUN - nothing was written"))
+            return
+        if not plan['changed']:
+            self.stdout.write(self.style.SUCCESS("Questionnaire already up to date"))
+            return
+        if plan['answers_removed'] and not options['allow_answer_loss']:
+            raise CommandError(
+                f"{plan['answers_removed']} answers belong to questions that would be deleted; "
+                f"re-run with --allow-answer-loss or --keep-missing"
+            )
+
+        try:
+            result = sync.apply()
+        except QuestionnaireImportError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Questionnaire synced in {result['duration_ms']} ms (schema version bumped once)"
+        ))
+
+    def print_changes(self, plan):
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write("QUESTIONNAIRE CHANGES")
+        self.stdout.write("=" * 60)
+        for kind in ('category', 'topic', 'question'):
+            self.stdout.write(
+                f"{kind.capitalize() + 's':<11} +{plan[f'{kind}_created']}  "
+                f"~{plan[f'{kind}_updated']}  -{plan[f'{kind}_deleted']}"
+            )
+        self.stdout.write(f"Choice lists rewritten: {plan['choices_replaced']}")
+        self.stdout.write(f"Questions moved between topics: {plan['questions_moved']}")
+        if plan['answers_removed']:
+            self.stdout.write(self.style.WARNING(f"Answers that would be deleted: {plan['answers_removed']}"))
@@ -0,0 +1,94 @@
+"""
+Django management command to maintain monthly partitions of the log tables.
+
+Run it monthly (or from the maintain_log_partitions Celery task). Each run pre-creates
+the partitions for the next --ahead months and drops, or with --archive exchanges out,
+the months older than the retention period (DataRetentionPolicy, else LOG_RETENTION_DAYS).
+--convert first rebuilds unpartitioned log tables as partitioned ones: that copies the
+whole table, so run it once, in a maintenance window, after `migrate`. Tables with a
+FULLTEXT search index are never converted; their expired rows are deleted in batches.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.core.log_partitions import LogPartitionManager, PARTITIONED_MODELS, PartitionError, maintain, retention_days
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly log partitions and drop expired ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=None,
+            help='Months of empty partitions to keep ready (default: LOG_PARTITION_MONTHS_AHEAD)'
+        )
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Partition log tables that are not partitioned yet (rebuilds them)'
+        )
+        parser.add_argument(
+            '--archive',
+            action='store_true',
+            default=None,
+            help='Exchange expired months into <table>_pYYYYMM tables instead of discarding them'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be created and dropped without changing anything'
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Only list the partitions and retention of each log table'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql':
+            raise CommandError('Log partitioning needs MySQL')
+        if options['ahead'] is not None and options['ahead'] < 1:
+            raise CommandError('--ahead must be at least 1')
+
+        if options['status']:
+            for model in PARTITIONED_MODELS:
+                manager = LogPartitionManager(model)
+                partitions = manager.partitions()
+                days = retention_days(model)
+                if partitions:
+                    layout = ', '.join(partitions)
+                elif manager.fulltext_indexes():
+                    layout = 'not partitioned (FULLTEXT search index, batched deletes)'
+                else:
+                    layout = 'not partitioned'
+                self.stdout.write(
+                    f"{manager.table:<20} retention {f'{days} days' if days is not None else 'unlimited':<14} {layout}"
+                )
+            return
+
+        try:
+            report = maintain(
+                months_ahead=options['ahead'], archive=options['archive'],
+                dry_run=options['dry_run'], convert=options['convert'],
+            )
+        except PartitionError as e:
+            raise CommandError(str(e))
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        for table, entry in report.items():
+            if entry.get('skipped'):
+                hint = ' (use --convert)' if entry['skipped'] == 'not partitioned' else ''
+                self.stdout.write(self.style.WARNING(
+                    f"{prefix}{table}: {entry['skipped']}{hint}; expired rows deleted: {entry['purged']}"
+                ))
+                continue
+            if entry['converted']:
+                self.stdout.write(f"{prefix}{table}: converted to monthly partitions")
+            self.stdout.write(
+                f"{prefix}{table}: created {', '.join(entry['created']) or 'none'}; "
+                f"dropped {', '.join(entry['dropped']) or 'none'}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{prefix}Log partition maintenance complete"))
@@ -0,0 +1,111 @@
+"""
+Django management command to move legacy sub-question answers into Answer.sub_answers.
+
+Older clients stored multi-part answers in the parent answer's response as
+"8375:pap;8376:pew". This command converts those rows to the sub_answers JSON
+column in primary-key chunks, one transaction per chunk, using the same
+compare-and-set on answers.version as interactive writes so a concurrent edit
+is skipped (and reported) instead of overwritten. The legacy string is kept in
+response unless --clear-response is given. Safe to re-run.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max
+
+from apps.core.models import Answer
+from apps.core.progress import FormProgressManager
+from apps.core.utils import AnswerManager
+
+
+class Command(BaseCommand):
+    help = 'Convert concatenated "id:value;" sub-question responses to structured sub_answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Answer ids scanned per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be converted without writing'
+        )
+        parser.add_argument(
+            '--clear-response',
+            action='store_true',
+            help='Clear the legacy string from response once it is copied to sub_answers'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        clear_response = options['clear_response']
+
+        max_id = Answer.objects.aggregate(max_id=Max('answer_id'))['max_id'] or 0
+        stats = {'scanned': 0, 'converted': 0, 'skipped': 0, 'conflicts': 0}
+
+        self.stdout.write(f"Scanning answers up to id {max_id} in chunks of {chunk_size}...")
+        if dry_run:
+            self.stdout.write(self.style.WARNING("DRY RUN - nothing will be written"))
+
+        start = 0
+        while start < max_id:
+            end = start + chunk_size
+            candidates = list(
+                Answer.objects.filter(
+                    answer_id__gt=start,
+                    answer_id__lte=end,
+                    sub_answers__isnull=True,
+                    response__regex=r'^[[:space:]]*[0-9]+[[:space:]]*:',
+                    response__contains=';'
+                ).values_list('answer_id', 'form_id', 'response', 'version')
+            )
+            stats['scanned'] += len(candidates)
+
+            with transaction.atomic():
+                converted_forms = set()
+                for answer_id, form_id, response, version in candidates:
+                    sub_answers = AnswerManager.parse_legacy_sub_answers(response)
+                    # All-blank parts ("8375:;8376:") are left alone so answered progress is unchanged
+                    if not sub_answers:
+                        stats['skipped'] += 1
+                        continue
+                    if dry_run:
+                        stats['converted'] += 1
+                        continue
+
+                    values = {'sub_answers': sub_answers, 'version': F('version') + 1}
+                    if clear_response:
+                        values['response'] = None
+                    updated = Answer.objects.filter(
+                        answer_id=answer_id,
+                        version=version,
+                        sub_answers__isnull=True
+                    ).update(**values)
+                    if updated:
+                        stats['converted'] += 1
+                        converted_forms.add(form_id)
+                    else:
+                        stats['conflicts'] += 1
+                # Answer payloads changed shape, so cached copies must revalidate
+                if converted_forms:
+                    FormProgressManager.record_write(list(converted_forms))
+
+            start = end
+            self.stdout.write(f"  ...up to answer {min(end, max_id)}: {stats['converted']} converted")
+
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write("SUB-ANSWER MIGRATION RESULTS")
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"Candidate rows: {stats['scanned']}")
+        self.stdout.write(f"Converted: {stats['converted']}")
+        self.stdout.write(f"Skipped (ordinary or blank values): {stats['skipped']}")
+        self.stdout.write(f"Changed concurrently, left for a re-run: {stats['conflicts']}")
+
+        if stats['conflicts']:
+            self.stdout.write(self.style.WARNING("Re-run the command to pick up the remaining rows"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Sub-answer migration completed"))
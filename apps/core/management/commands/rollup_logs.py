@@ -0,0 +1,53 @@
+"""
+Django management command to maintain the log rollups.
+
+Without options it does what the rollup_logs Celery task does: recounts the last
+LOG_ROLLUP_LOOKBACK_HOURS closed hours. --since rolls up everything from a date (run it
+once after `migrate`, or after replaying rows written long after the fact); until then
+dashboard counts are read from the raw log tables.
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.utils.log_rollups import LogRollups
+
+
+class Command(BaseCommand):
+    help = 'Refresh the hourly/daily log rollups used by the dashboards'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Backfill the rollups from this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Only show the time range the rollups cover'
+        )
+
+    def handle(self, *args, **options):
+        if options['status']:
+            covered = LogRollups.covered()
+            if covered:
+                self.stdout.write(f"Rollups cover {covered[0].isoformat()} to {covered[1].isoformat()}")
+            else:
+                self.stdout.write(self.style.WARNING('No rollups yet (run with --since)'))
+            return
+
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.strptime(options['since'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError('--since must be a date (YYYY-MM-DD)')
+            self.stdout.write(f"Backfilling log rollups from {options['since']}...")
+            written = LogRollups.backfill(since)
+        else:
+            written = LogRollups.run()
+
+        for source, rows in written.items():
+            self.stdout.write(f"{source}: {rows} hourly rows")
+        self.stdout.write(self.style.SUCCESS('Log rollups updated'))
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+def dedupe_answers(apps, schema_editor):
+    """Keep only the newest answer per (form, question) so the unique constraint can be added."""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            DELETE a FROM answers a
+            JOIN answers newer
+              ON newer.form_id = a.form_id
+             AND newer.question_id = a.question_id
+             AND newer.answer_id > a.answer_id
+            """
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_add_choice_answer_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(dedupe_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='answer',
+            constraint=models.UniqueConstraint(fields=('form', 'question'), name='uniq_answers_form_question'),
+        ),
+    ]
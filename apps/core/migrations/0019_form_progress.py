@@ -0,0 +1,25 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_answer_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormProgress',
+            fields=[
+                ('form', models.OneToOneField(db_column='form_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress', serialize=False, to='core.form')),
+                ('answered_bitmap', models.BinaryField(default=b'')),
+                ('category_counts', models.JSONField(default=dict)),
+                ('answered_total', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'form_progress',
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_form_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='sub_answers',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
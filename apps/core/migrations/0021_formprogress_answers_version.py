@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_answer_sub_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formprogress',
+            name='answers_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# Must match DISPLAY_ORDER_GAP at the time of the migration (apps.core.ordering)
+GAP = 1024
+
+
+def spread_display_order(apps, schema_editor):
+    """Renumber every sibling group GAP apart so later moves only rewrite one row."""
+    groups = (
+        ('Category', 'category_id', None),
+        ('Topic', 'topic_id', 'category_id'),
+        ('Question', 'question_id', 'topic_id'),
+    )
+    for model_name, pk_name, parent_field in groups:
+        model = apps.get_model('core', model_name)
+        fields = [pk_name, 'display_order'] + ([parent_field] if parent_field else [])
+        rows = model.objects.order_by(*([parent_field] if parent_field else []), 'display_order', pk_name).values_list(*fields)
+
+        changed = []
+        current_parent = object()
+        index = 0
+        for row in rows.iterator():
+            parent = row[2] if parent_field else None
+            if parent != current_parent:
+                current_parent = parent
+                index = 0
+            index += 1
+            if row[1] != index * GAP:
+                changed.append(model(**{pk_name: row[0], 'display_order': index * GAP}))
+            if len(changed) >= 1000:
+                model.objects.bulk_update(changed, ['display_order'])
+                changed = []
+        if changed:
+            model.objects.bulk_update(changed, ['display_order'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_formprogress_answers_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_display_order, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# ngram FULLTEXT indexes used by apps.admin_management.log_search. MySQL only; the
+# column lists must stay in sync with log_search.FULLTEXT_COLUMNS.
+FULLTEXT_INDEXES = [
+    ('audit_logs', 'audit_logs_search_ft', ['description', 'action_type', 'resource_type']),
+    ('login_attempts', 'login_attem_search_ft', ['username', 'location', 'failure_reason']),
+    ('admin_activity_log', 'adm_log_search_ft', ['action', 'resource_type', 'resource_id']),
+]
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(
+            f"ALTER TABLE {quote(table)} ADD FULLTEXT INDEX {quote(name)} "
+            f"({', '.join(quote(column) for column in columns)}) WITH PARSER ngram"
+        )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(f"ALTER TABLE {quote(table)} DROP INDEX {quote(name)}")
+
+
+class Migration(migrations.Migration):
+
+    # MySQL cannot run these ALTERs inside a transaction anyway
+    atomic = False
+
+    dependencies = [
+        ('core', '0023_log_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_indexes, drop_fulltext_indexes),
+    ]
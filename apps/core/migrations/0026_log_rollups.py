@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_log_tables_without_fk_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('source', models.CharField(choices=[('audit_log', 'Audit Log'), ('admin_activity', 'Admin Activity')], max_length=20)),
+                ('actor_id', models.IntegerField(default=0)),
+                ('action', models.CharField(max_length=100)),
+                ('resource_type', models.CharField(max_length=50)),
+                ('severity', models.CharField(blank=True, default='', max_length=10)),
+                ('success', models.BooleanField(default=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'log_rollups',
+                'indexes': [
+                    models.Index(fields=['period', 'source', 'bucket'], name='log_rollup_per_src_bkt_idx'),
+                    models.Index(fields=['source', 'actor_id', 'period', 'bucket'], name='log_rollup_actor_bkt_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='LoginRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('username', models.CharField(max_length=150)),
+                ('ip_address', models.GenericIPAddressField()),
+                ('success', models.BooleanField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'login_rollups',
+                'indexes': [
+                    models.Index(fields=['period', 'bucket'], name='login_rollup_per_bkt_idx'),
+                    models.Index(fields=['username', 'period', 'bucket'], name='login_rollup_user_bkt_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def clear_orphans(apps, schema_editor):
+    """Rows written while the constraints were off may point at deleted users"""
+    AuditLog = apps.get_model('core', 'AuditLog')
+    AdminActivityLog = apps.get_model('core', 'AdminActivityLog')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    AdminUser = apps.get_model('core', 'AdminUser')
+
+    AuditLog.objects.filter(user__isnull=False).exclude(
+        user_id__in=User.objects.values('pk')
+    ).update(user=None)
+    AdminActivityLog.objects.exclude(
+        admin_user_id__in=AdminUser.objects.values('pk')
+    ).delete()
+
+
+class Migration(migrations.Migration):
+    """
+    audit_logs and admin_activity_log keep their FULLTEXT search indexes and so are never
+    partitioned (apps.core.log_partitions); give them their foreign keys back.
+    """
+
+    dependencies = [
+        ('core', '0026_log_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_orphans, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='adminactivitylog',
+            name='admin_user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_logs', to='core.adminuser'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import copy
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -126,7 +127,49 @@ class UsersSchool(models.Model):
             models.Index(fields=['approval_status'], name='usr_sch_approval_idx'),
         ]
 
-class Category(models.Model):
+class TrackedFieldsMixin:
+    """
+    Snapshot `tracked_fields` when an instance is loaded so audit code can diff
+    old and new values without re-reading the row before every save.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.reset_tracked_values()
+        return instance
+
+    def reset_tracked_values(self):
+        # Deferred fields are not in __dict__ and are simply not tracked; JSON values are
+        # copied so in-place edits still show up as changes
+        self._loaded_values = {
+            name: copy.deepcopy(self.__dict__[name]) for name in self.tracked_fields if name in self.__dict__
+        }
+
+    def get_loaded_values(self):
+        """Values as they were loaded from the database, or None for unsaved/unloaded instances"""
+        loaded = getattr(self, '_loaded_values', None)
+        return dict(loaded) if loaded else None
+
+    def get_tracked_changes(self):
+        """Tracked fields whose value differs from the loaded snapshot: {field: {'old', 'new'}}"""
+        changes = {}
+        for name, old in (getattr(self, '_loaded_values', None) or {}).items():
+            new = self.__dict__.get(name, old)
+            if new != old:
+                changes[name] = {'old': old, 'new': new}
+        return changes
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save handlers have seen the old snapshot; the saved values are the new baseline
+        self.reset_tracked_values()
+
+
+class Category(TrackedFieldsMixin, models.Model):
+    tracked_fields = ('name', 'display_order')
+
     category_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100)
     display_order = models.IntegerField()
@@ -139,7 +182,9 @@ class Category(models.Model):
 
 # SubSection model removed
 
-class Topic(models.Model):
+class Topic(TrackedFieldsMixin, models.Model):
+    tracked_fields = ('name', 'category_id', 'display_order', 'can_skip')
+
     topic_id = models.AutoField(primary_key=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, db_column='category_id', null=True)
     name = models.CharField(max_length=100)
@@ -153,7 +198,9 @@ class Topic(models.Model):
             models.Index(fields=['display_order'], name='idx_topics_order'),
         ]
 
-class Question(models.Model):
+class Question(TrackedFieldsMixin, models.Model):
+    tracked_fields = ('question_text', 'answer_type', 'is_required', 'display_order', 'topic_id')
+
     question_id = models.AutoField(primary_key=True)
     topic = models.ForeignKey(Topic, on_delete=models.CASCADE, db_column='topic_id')
     question_text = models.TextField()
@@ -239,12 +286,18 @@ class Form(models.Model):
         }
         return level_map.get(self.current_level)
 
-class Answer(models.Model):
+class Answer(TrackedFieldsMixin, models.Model):
+    tracked_fields = ('response', 'sub_answers', 'version')
+
     answer_id = models.AutoField(primary_key=True)
     form = models.ForeignKey(Form, on_delete=models.CASCADE, db_column='form_id')
     question = models.ForeignKey(Question, on_delete=models.CASCADE, db_column='question_id')
     response = models.TextField(null=True, blank=True)
     answered_at = models.DateTimeField(auto_now_add=True)
+    # Multi-part answers as {sub_question_id (str): value}; replaces "id:value;id:value" strings in response
+    sub_answers = models.JSONField(null=True, blank=True)
+    # Bumped on every write; updates compare-and-set against it (see apps.core.utils.AnswerManager)
+    version = models.PositiveIntegerField(default=1)
 
     class Meta:
         db_table = 'answers'
@@ -252,6 +305,24 @@ class Answer(models.Model):
             models.Index(fields=['form'], name='idx_answers_form'),
             models.Index(fields=['question'], name='idx_answers_question'),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['form', 'question'], name='uniq_answers_form_question'),
+        ]
+
+class FormProgress(models.Model):
+    """Answered-question bitmap and per-category answered counters for a form (see apps.core.progress)"""
+    form = models.OneToOneField(Form, on_delete=models.CASCADE, primary_key=True, db_column='form_id', related_name='progress')
+    # Bit n set <=> question_id n has a non-empty answer; little-endian bytes
+    answered_bitmap = models.BinaryField(default=b'')
+    # {category_id (str): answered question count}
+    category_counts = models.JSONField(default=dict)
+    answered_total = models.PositiveIntegerField(default=0)
+    # Bumped on every answer write to the form; part of the answer payload ETags (see apps.core.etags)
+    answers_version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'form_progress'
 
 class RawImport(models.Model):
     id = models.AutoField(primary_key=True)
@@ -383,9 +454,10 @@ class AuditTrail(models.Model):
         ('delete', 'Delete'),
     ]
     id = models.AutoField(primary_key=True)
-    user = models.ForeignKey(get_user_model(), null=True, blank=True, on_delete=models.SET_NULL)
+    # Log tables keep no FK constraints so they can be partitioned (apps.core.log_partitions)
+    user = models.ForeignKey(get_user_model(), null=True, blank=True, on_delete=models.SET_NULL, db_constraint=False)
     action = models.CharField(max_length=10, choices=ACTION_CHOICES)
-    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, db_constraint=False)
     old_value = models.JSONField(null=True, blank=True)
     new_value = models.JSONField(null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
@@ -501,6 +573,8 @@ class LoginAttempt(models.Model):
             models.Index(fields=['username', 'timestamp'], name='login_attem_usernam_ece61f_idx'),
             models.Index(fields=['ip_address', 'timestamp'], name='login_attem_ip_addr_340a7c_idx'),
             models.Index(fields=['success', 'timestamp'], name='login_attem_success_f3dfbd_idx'),
+            # Keyset pagination of the logs page
+            models.Index(fields=['timestamp', 'id'], name='login_attem_timesta_id_idx'),
         ]
 
 class SecurityAlert(models.Model):
@@ -678,6 +752,8 @@ class AuditLog(models.Model):
             models.Index(fields=['severity', 'timestamp'], name='audit_logs_severit_549d29_idx'),
             models.Index(fields=['ip_address', 'timestamp'], name='audit_logs_ip_addr_932507_idx'),
             models.Index(fields=['resource_type', 'resource_id'], name='audit_logs_resourc_bda8a6_idx'),
+            # Keyset pagination of the logs page
+            models.Index(fields=['timestamp', 'id'], name='audit_logs_timesta_id_idx'),
         ]
 
 class DataProcessingConsent(models.Model):
@@ -775,6 +851,56 @@ class AdminActivityLog(models.Model):
         return f"{self.admin_user.username} - {self.action} at {self.timestamp}"
 
 
+ROLLUP_PERIOD_CHOICES = [
+    ('hour', 'Hour'),
+    ('day', 'Day'),
+]
+
+
+class LogRollup(models.Model):
+    """Hourly/daily event counts of audit_logs and admin_activity_log (apps.utils.log_rollups)"""
+    SOURCE_CHOICES = [
+        ('audit_log', 'Audit Log'),
+        ('admin_activity', 'Admin Activity'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    period = models.CharField(max_length=4, choices=ROLLUP_PERIOD_CHOICES)
+    bucket = models.DateTimeField()
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    actor_id = models.IntegerField(default=0)  # AuditLog.user_id / AdminActivityLog.admin_user_id, 0 = none
+    action = models.CharField(max_length=100)
+    resource_type = models.CharField(max_length=50)
+    severity = models.CharField(max_length=10, blank=True, default='')
+    success = models.BooleanField(default=True)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'log_rollups'
+        indexes = [
+            models.Index(fields=['period', 'source', 'bucket'], name='log_rollup_per_src_bkt_idx'),
+            models.Index(fields=['source', 'actor_id', 'period', 'bucket'], name='log_rollup_actor_bkt_idx'),
+        ]
+
+
+class LoginRollup(models.Model):
+    """Hourly/daily login attempt counts per username, IP and outcome (apps.utils.log_rollups)"""
+    id = models.BigAutoField(primary_key=True)
+    period = models.CharField(max_length=4, choices=ROLLUP_PERIOD_CHOICES)
+    bucket = models.DateTimeField()
+    username = models.CharField(max_length=150)
+    ip_address = models.GenericIPAddressField()
+    success = models.BooleanField()
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'login_rollups'
+        indexes = [
+            models.Index(fields=['period', 'bucket'], name='login_rollup_per_bkt_idx'),
+            models.Index(fields=['username', 'period', 'bucket'], name='login_rollup_user_bkt_idx'),
+        ]
+
+
 class AdminSession(models.Model):
     """Session management for admin users"""
     session_id = models.CharField(max_length=128, primary_key=True)
@@ -0,0 +1,166 @@
+"""
+Gap-based display ordering for categories, topics and questions
+Siblings are numbered DISPLAY_ORDER_GAP apart, so moving a row only rewrites that row:
+it takes the midpoint between its new neighbours. When neighbours get too close a
+background task re-spreads that one sibling group; a synchronous renumber only happens
+if a move finds no integer left between its neighbours
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+
+from .models import Category, Question, Topic
+from .progress import FormProgressManager
+
+logger = logging.getLogger(__name__)
+
+# model -> column that groups siblings (None: the whole table is one group)
+ORDERED_MODELS = {
+    'category': (Category, None),
+    'topic': (Topic, 'category_id'),
+    'question': (Question, 'topic_id'),
+}
+
+_UNCHANGED = object()
+
+
+class DisplayOrder:
+    """Sparse display_order allocation (static helpers, like the other *Manager classes)"""
+
+    @staticmethod
+    def gap():
+        return getattr(settings, 'DISPLAY_ORDER_GAP', 1024)
+
+    @staticmethod
+    def min_gap():
+        """Neighbour distance below which a background rebalance is scheduled"""
+        return getattr(settings, 'DISPLAY_ORDER_MIN_GAP', 8)
+
+    @staticmethod
+    def resolve(kind):
+        """(model, parent_field) for 'category' / 'topic' / 'question'"""
+        try:
+            return ORDERED_MODELS[kind]
+        except KeyError:
+            raise ValueError(f'Unknown ordered model "{kind}"')
+
+    @staticmethod
+    def siblings(kind, parent_id=None):
+        model, parent_field = DisplayOrder.resolve(kind)
+        queryset = model.objects.all()
+        if parent_field:
+            queryset = queryset.filter(**{parent_field: parent_id})
+        return queryset
+
+    @staticmethod
+    def next_order(kind, parent_id=None):
+        """display_order for a row appended after its last sibling"""
+        last = DisplayOrder.siblings(kind, parent_id).aggregate(last=Max('display_order'))['last']
+        return (last or 0) + DisplayOrder.gap()
+
+    @staticmethod
+    def move(kind, pk, after_id=None, before_id=None, parent_id=_UNCHANGED):
+        """
+        Place a row directly after `after_id` and/or before `before_id` (sibling ids;
+        neither means "last"), optionally under a new parent. Only the moved row is
+        written unless its neighbours have no room left. Returns (display_order, parent_id).
+        """
+        model, parent_field = DisplayOrder.resolve(kind)
+        pk_name = model._meta.pk.name
+        with transaction.atomic():
+            row = model.objects.select_for_update().get(**{pk_name: pk})
+            if parent_field and parent_id is _UNCHANGED:
+                parent_id = getattr(row, parent_field)
+            elif not parent_field:
+                parent_id = None
+
+            for attempt in range(2):
+                lower, upper = DisplayOrder._neighbours(kind, parent_id, pk, after_id, before_id)
+                if lower is not None and upper is not None and upper - lower < 2:
+                    # No integer left between the neighbours: renumber this group once
+                    DisplayOrder.rebalance(kind, parent_id)
+                    continue
+                break
+
+            if lower is None and upper is None:
+                order = DisplayOrder.gap()
+            elif lower is None:
+                order = upper - DisplayOrder.gap()
+            elif upper is None:
+                order = lower + DisplayOrder.gap()
+            else:
+                order = (lower + upper) // 2
+
+            values = {'display_order': order}
+            if parent_field:
+                values[parent_field] = parent_id
+            model.objects.filter(**{pk_name: pk}).update(**values)
+
+            crowded = any(
+                bound is not None and abs(order - bound) < DisplayOrder.min_gap()
+                for bound in (lower, upper)
+            )
+            if crowded:
+                transaction.on_commit(lambda: DisplayOrder.schedule_rebalance(kind, parent_id))
+        return order, parent_id
+
+    @staticmethod
+    def _neighbours(kind, parent_id, pk, after_id, before_id):
+        """display_order of the rows the moved row will sit between (None = open end)"""
+        model, _ = DisplayOrder.resolve(kind)
+        pk_name = model._meta.pk.name
+        siblings = DisplayOrder.siblings(kind, parent_id).exclude(**{pk_name: pk})
+
+        def order_of(sibling_id):
+            order = siblings.filter(**{pk_name: sibling_id}).values_list('display_order', flat=True).first()
+            if order is None:
+                raise model.DoesNotExist(f'{kind} {sibling_id} is not a sibling of {kind} {pk}')
+            return order
+
+        if after_id is not None and before_id is not None:
+            return order_of(after_id), order_of(before_id)
+        if after_id is not None:
+            lower = order_of(after_id)
+            upper = siblings.filter(display_order__gt=lower).aggregate(o=Min('display_order'))['o']
+            return lower, upper
+        if before_id is not None:
+            upper = order_of(before_id)
+            lower = siblings.filter(display_order__lt=upper).aggregate(o=Max('display_order'))['o']
+            return lower, upper
+        return siblings.aggregate(o=Max('display_order'))['o'], None
+
+    @staticmethod
+    def rebalance(kind, parent_id=None):
+        """Re-spread one sibling group GAP apart, keeping its order; returns rows rewritten"""
+        model, _ = DisplayOrder.resolve(kind)
+        pk_name = model._meta.pk.name
+        gap = DisplayOrder.gap()
+        with transaction.atomic():
+            rows = list(
+                DisplayOrder.siblings(kind, parent_id).select_for_update()
+                .order_by('display_order', pk_name).values_list(pk_name, 'display_order')
+            )
+            changed = [
+                model(**{pk_name: row_id, 'display_order': index * gap})
+                for index, (row_id, order) in enumerate(rows, start=1)
+                if order != index * gap
+            ]
+            if changed:
+                model.objects.bulk_update(changed, ['display_order'], batch_size=1000)
+        if changed:
+            logger.info(f"Rebalanced display_order of {len(changed)} {kind} rows (parent {parent_id})")
+        return len(changed)
+
+    @staticmethod
+    def schedule_rebalance(kind, parent_id=None):
+        """Queue a background rebalance; falls back to doing it inline without a worker"""
+        from .tasks import rebalance_display_order
+        try:
+            rebalance_display_order.delay(kind, parent_id)
+        except Exception as e:
+            logger.warning(f"Could not queue display_order rebalance, running inline: {e}")
+            if DisplayOrder.rebalance(kind, parent_id):
+                FormProgressManager.on_schema_change()
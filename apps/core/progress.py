@@ -0,0 +1,209 @@
+"""
+Per-form answered-question bitmap and per-category progress counters
+The form_progress row is updated in the same transaction as the answer writes, so
+answered flags and category progress are one primary-key lookup instead of a
+COUNT/EXISTS per question or category
+"""
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Answer, FormProgress
+from .schema import QuestionnaireSchema
+
+logger = logging.getLogger(__name__)
+
+
+class FormProgressManager:
+    """Maintains and reads FormProgress rows"""
+
+    @staticmethod
+    def is_answer_value(response):
+        """Whether a stored response counts as answered"""
+        return response is not None and str(response).strip() != ''
+
+    @staticmethod
+    def is_answered(response, sub_answers=None):
+        """An answer counts when it has a response or at least one sub-answer"""
+        return FormProgressManager.is_answer_value(response) or bool(sub_answers)
+
+    @staticmethod
+    def get_question_categories():
+        """{question_id: category_id} for the current schema"""
+        return QuestionnaireSchema.get().question_categories
+
+    @staticmethod
+    def get_category_totals():
+        """{category_id: number of questions}"""
+        return QuestionnaireSchema.get().category_totals
+
+    @staticmethod
+    def bitmap_to_int(progress):
+        return int.from_bytes(bytes(progress.answered_bitmap or b''), 'little')
+
+    @staticmethod
+    def is_question_answered(bitmap, question_id):
+        """bitmap is the int returned by bitmap_to_int"""
+        return bool(bitmap >> question_id & 1)
+
+    @staticmethod
+    def rebuild(form_id):
+        """Recompute a form's progress from its answers (first use, or after a schema change)"""
+        question_categories = FormProgressManager.get_question_categories()
+        bitmap = 0
+        counts = {}
+        total = 0
+        for question_id, response, sub_answers in (Answer.objects.filter(form_id=form_id)
+                                                   .values_list('question_id', 'response', 'sub_answers')
+                                                   .iterator()):
+            if not FormProgressManager.is_answered(response, sub_answers) or question_id not in question_categories:
+                continue
+            bitmap |= 1 << question_id
+            key = str(question_categories[question_id])
+            counts[key] = counts.get(key, 0) + 1
+            total += 1
+
+        progress, _ = FormProgress.objects.update_or_create(
+            form_id=form_id,
+            defaults={
+                'answered_bitmap': bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'),
+                'category_counts': counts,
+                'answered_total': total,
+            }
+        )
+        return progress
+
+    @staticmethod
+    def get(form_id):
+        """The form's progress row, built on first use"""
+        progress = FormProgress.objects.filter(form_id=form_id).first()
+        if progress is None:
+            try:
+                with transaction.atomic():
+                    progress = FormProgressManager.rebuild(form_id)
+            except IntegrityError:
+                progress = FormProgress.objects.get(form_id=form_id)
+        return progress
+
+    @staticmethod
+    def apply_changes(form_id, answered_ids=(), unanswered_ids=()):
+        """
+        Record questions that became answered / unanswered.
+        Call inside the transaction that writes the answers; the row lock serializes
+        concurrent writers of the same form.
+        """
+        if not answered_ids and not unanswered_ids:
+            return
+
+        progress = FormProgress.objects.select_for_update().filter(form_id=form_id).first()
+        if progress is None:
+            # A fresh rebuild already sees the answers written in this transaction
+            try:
+                with transaction.atomic():
+                    FormProgressManager.rebuild(form_id)
+                return
+            except IntegrityError:
+                progress = FormProgress.objects.select_for_update().get(form_id=form_id)
+
+        question_categories = FormProgressManager.get_question_categories()
+        if any(question_id not in question_categories for question_id in answered_ids):
+            # This process may not have seen a just-created question yet
+            question_categories = QuestionnaireSchema.refresh().question_categories
+        bitmap = FormProgressManager.bitmap_to_int(progress)
+        counts = dict(progress.category_counts or {})
+        total = progress.answered_total
+        changed = False
+
+        for question_id in answered_ids:
+            bit = 1 << question_id
+            if bitmap & bit or question_id not in question_categories:
+                continue
+            bitmap |= bit
+            key = str(question_categories[question_id])
+            counts[key] = counts.get(key, 0) + 1
+            total += 1
+            changed = True
+
+        for question_id in unanswered_ids:
+            bit = 1 << question_id
+            if not bitmap & bit:
+                continue
+            bitmap &= ~bit
+            key = str(question_categories.get(question_id))
+            if counts.get(key):
+                counts[key] -= 1
+            total = max(total - 1, 0)
+            changed = True
+
+        if changed:
+            progress.answered_bitmap = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+            progress.category_counts = counts
+            progress.answered_total = total
+            progress.save(update_fields=['answered_bitmap', 'category_counts', 'answered_total', 'updated_at'])
+
+    @staticmethod
+    def record_write(form_ids):
+        """
+        Bump the answer version of forms whose answers were written (call in the writing
+        transaction). A form without a progress row gets a fresh one on next read anyway.
+        """
+        if isinstance(form_ids, int):
+            form_ids = [form_ids]
+        FormProgress.objects.filter(form_id__in=form_ids).update(
+            answers_version=F('answers_version') + 1,
+            updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def state_token(progress):
+        """Changes whenever the form's answers change, including when the row is rebuilt"""
+        return f'{progress.form_id}:{progress.answers_version}:{progress.updated_at.timestamp():.6f}'
+
+    @staticmethod
+    def category_progress(form_id):
+        """{category_id: {'answered': n, 'total': m}} for every category with questions"""
+        counts = FormProgressManager.get(form_id).category_counts or {}
+        return {
+            category_id: {'answered': counts.get(str(category_id), 0), 'total': total}
+            for category_id, total in FormProgressManager.get_category_totals().items()
+        }
+
+    @staticmethod
+    def forms_answering(question_ids):
+        """
+        Forms with an answer to any of `question_ids`: the ones whose counters change when
+        those questions are deleted or move to another category. Call before deleting.
+        """
+        question_ids = list(question_ids)
+        if not question_ids:
+            return []
+        return list(
+            Answer.objects.filter(question_id__in=question_ids)
+            .values_list('form_id', flat=True).distinct()
+        )
+
+    @staticmethod
+    def on_schema_change(form_ids=()):
+        """
+        Call after questions/topics/categories change: starts a new compiled schema
+        generation. form_ids (from forms_answering) are the forms whose counters the change
+        invalidated, i.e. that answered removed or re-categorized questions; their rows are
+        rebuilt lazily on next use and every other form keeps its counters.
+        """
+        QuestionnaireSchema.bump()
+        form_ids = sorted(set(form_ids))
+        deleted = 0
+        for start in range(0, len(form_ids), 1000):
+            deleted += FormProgress.objects.filter(form_id__in=form_ids[start:start + 1000]).delete()[0]
+        if deleted:
+            logger.info(f"Schema change invalidated {deleted} form progress rows")
+
+    @staticmethod
+    def invalidate_all():
+        """Drop every form's counters (the whole questionnaire was replaced or cleared)"""
+        QuestionnaireSchema.bump()
+        deleted, _ = FormProgress.objects.all().delete()
+        logger.info(f"Schema reset invalidated {deleted} form progress rows")
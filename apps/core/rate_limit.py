@@ -0,0 +1,233 @@
+"""
+Shared rate limiting: token buckets in Redis, updated atomically by a Lua script
+Buckets are keyed per endpoint and per IP and/or user, hold `limit` tokens and refill
+at limit/window tokens per second. Nothing is stored in the session or the database.
+If Redis is unavailable each process falls back to its own in-memory buckets (limits
+then apply per worker) and retries Redis after a short pause.
+"""
+
+import asyncio
+import hashlib
+import ipaddress
+import logging
+import threading
+import time
+from functools import wraps
+
+import redis
+from django.conf import settings
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+r = redis.Redis(
+    host=getattr(settings, 'REDIS_HOST', 'localhost'),
+    port=getattr(settings, 'REDIS_PORT', 6379),
+    db=getattr(settings, 'REDIS_DB', 0)
+)
+
+KEY_PREFIX = 'ratelimit:'
+
+# KEYS[1] bucket; ARGV: capacity, refill per second, cost
+# Returns {allowed (0/1), tokens left, milliseconds until `cost` tokens are available}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  wait = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) * 1000 / rate) + 1000)
+return {allowed, math.floor(tokens), wait}
+"""
+
+# How long to use the in-memory buckets after a Redis error before trying Redis again
+REDIS_RETRY_SECONDS = 5
+# Bound on in-memory buckets per process; full (idle) buckets are dropped first
+MAX_LOCAL_BUCKETS = 10000
+
+
+class RateLimitResult:
+    def __init__(self, allowed, remaining, retry_after):
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after  # seconds, 0 when allowed
+
+    def __bool__(self):
+        return self.allowed
+
+
+class RateLimiter:
+    """Token-bucket checks (static helpers, like the other *Manager classes)"""
+
+    _script = None
+    _local_buckets = {}
+    _local_lock = threading.Lock()
+    _redis_down_until = 0
+
+    @staticmethod
+    def hit(key, limit, window, cost=1):
+        """Take `cost` tokens from bucket `key` (limit tokens per `window` seconds)"""
+        rate = limit / float(window)
+        if time.monotonic() >= RateLimiter._redis_down_until:
+            try:
+                if RateLimiter._script is None:
+                    RateLimiter._script = r.register_script(TOKEN_BUCKET_SCRIPT)
+                allowed, remaining, wait_ms = RateLimiter._script(
+                    keys=[KEY_PREFIX + key], args=[limit, rate, cost]
+                )
+                return RateLimitResult(bool(allowed), int(remaining), (int(wait_ms) + 999) // 1000)
+            except redis.RedisError as e:
+                logger.warning(f"Rate limiter falling back to in-memory buckets: {e}")
+                RateLimiter._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        return RateLimiter._hit_local(key, limit, rate, cost)
+
+    @staticmethod
+    def _hit_local(key, limit, rate, cost):
+        now = time.monotonic()
+        buckets = RateLimiter._local_buckets
+        with RateLimiter._local_lock:
+            tokens, ts = buckets.get(key, (limit, now))
+            tokens = min(limit, tokens + (now - ts) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            buckets[key] = (tokens, now)
+            if len(buckets) > MAX_LOCAL_BUCKETS:
+                RateLimiter._prune_local(now)
+        wait = 0 if allowed else int((cost - tokens) / rate) + 1
+        return RateLimitResult(allowed, int(tokens), wait)
+
+    @staticmethod
+    def _prune_local(now):
+        buckets = RateLimiter._local_buckets
+        for key in [k for k, (tokens, ts) in buckets.items() if now - ts > 3600]:
+            del buckets[key]
+        while len(buckets) > MAX_LOCAL_BUCKETS:
+            buckets.pop(next(iter(buckets)))
+
+    @staticmethod
+    def identities(scopes, ip_address, user_id):
+        """Bucket suffixes for the requested scopes ('ip', 'user'); anonymous users fall back to the IP"""
+        keys = []
+        for scope in scopes:
+            if scope == 'user' and user_id:
+                keys.append(f"user:{user_id}")
+            elif scope == 'ip' or scope == 'user':
+                keys.append(f"ip:{ip_address}")
+            else:
+                raise ValueError(f'Unknown rate limit scope "{scope}"')
+        return list(dict.fromkeys(keys))
+
+    @staticmethod
+    def check(endpoint, limit, window, ip_address, user_id=None, scopes=('ip', 'user')):
+        """Hit every bucket of the endpoint; the first exhausted one decides"""
+        result = RateLimitResult(True, limit, 0)
+        for identity in RateLimiter.identities(scopes, ip_address, user_id):
+            result = RateLimiter.hit(f"{endpoint}:{identity}", limit, window)
+            if not result:
+                return result
+        return result
+
+
+def _trusted_proxy(address):
+    """Whether `address` is one of RATE_LIMIT_TRUSTED_PROXIES (networks in CIDR form)"""
+    try:
+        address = ipaddress.ip_address((address or '').strip())
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', ('127.0.0.1/32', '::1/128'))
+    )
+
+
+def _client_ip(remote_addr, real_ip, forwarded_for):
+    """
+    The address buckets are keyed on. Proxy headers are only believed when the
+    connection comes from a trusted proxy: then nginx's X-Real-IP, else the right-most
+    X-Forwarded-For hop that is not a trusted proxy. Earlier hops are whatever the client
+    sent (nginx appends to them), so keying on them would let a client pick its bucket.
+    """
+    if _trusted_proxy(remote_addr):
+        if real_ip and real_ip.strip():
+            return real_ip.strip()
+        for hop in reversed((forwarded_for or '').split(',')):
+            if hop.strip() and not _trusted_proxy(hop):
+                return hop.strip()
+    return remote_addr or 'unknown'
+
+
+def check_request(request, endpoint, limit, window, scopes=('ip', 'user')):
+    """
+    Rate-limit a Django request. The user is the session's admin_id, or the session key
+    for anonymous visitors with a session; the session is only read, never written.
+    """
+    ip_address = _client_ip(request.META.get('REMOTE_ADDR'), request.META.get('HTTP_X_REAL_IP'),
+                            request.META.get('HTTP_X_FORWARDED_FOR'))
+    user_id = None
+    if 'user' in scopes and hasattr(request, 'session'):
+        admin_id = request.session.get('admin_id')
+        if admin_id:
+            user_id = admin_id
+        elif request.session.session_key:
+            user_id = 's-' + hashlib.sha1(request.session.session_key.encode('utf-8')).hexdigest()[:16]
+    return RateLimiter.check(endpoint, limit, window, ip_address, user_id, scopes)
+
+
+def too_many_requests(result, message='Too many requests. Please slow down.'):
+    response = JsonResponse({'success': False, 'error': message}, status=429)
+    response['Retry-After'] = str(max(result.retry_after, 1))
+    return response
+
+
+def rate_limit(endpoint, limit, window, scopes=('ip', 'user')):
+    """Decorator for Django views: 429 with Retry-After once a bucket is empty"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            result = check_request(request, endpoint, limit, window, scopes)
+            if not result:
+                return too_many_requests(result)
+            return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
+
+
+def rate_limit_dependency(endpoint, limit, window, scopes=('ip', 'user')):
+    """FastAPI dependency: `Depends(rate_limit_dependency('login', 30, 60))`"""
+    from fastapi import HTTPException, Request
+
+    async def dependency(request: Request):
+        ip_address = _client_ip(request.client.host if request.client else None,
+                                request.headers.get('x-real-ip'), request.headers.get('x-forwarded-for'))
+        # The user is whoever holds the session cookie / bearer token (hashed, not stored)
+        credential = request.cookies.get('sessionid') or request.headers.get('authorization')
+        user_id = hashlib.sha1(credential.encode('utf-8')).hexdigest()[:16] if credential else None
+        result = await asyncio.to_thread(RateLimiter.check, endpoint, limit, window, ip_address, user_id, scopes)
+        if not result:
+            raise HTTPException(
+                status_code=429,
+                detail='Too many requests. Please slow down.',
+                headers={'Retry-After': str(max(result.retry_after, 1))}
+            )
+        return result
+    return dependency
@@ -0,0 +1,186 @@
+"""
+Redis session engine with write coalescing (SESSION_ENGINE = 'apps.core.redis_sessions')
+SESSION_SAVE_EVERY_REQUEST makes Django save the session on every response. This store
+turns those saves into:
+- nothing, when the session data is unchanged and its expiry was refreshed recently
+  (within SESSION_TOUCH_INTERVAL seconds),
+- an EXPIRE when only the sliding expiry needs refreshing,
+- a SET only when the data actually changed.
+During the migration from the database backend a session missing from Redis is read
+from django_session once and moved over (SESSION_REDIS_DB_FALLBACK); if Redis is down,
+reads and writes fall back to the database backend
+"""
+
+import hashlib
+import json
+import logging
+
+import redis
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError, SessionBase, UpdateError
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'session:'
+
+r = redis.Redis(
+    host=getattr(settings, 'REDIS_HOST', 'localhost'),
+    port=getattr(settings, 'REDIS_PORT', 6379),
+    db=getattr(settings, 'SESSION_REDIS_DB', getattr(settings, 'REDIS_DB', 0))
+)
+
+# Per-process counters, read by the benchmark_session_writes command
+stats = {'loads': 0, 'db_reads': 0, 'migrated': 0, 'writes': 0, 'touches': 0, 'skipped': 0, 'db_writes': 0}
+
+
+def session_key_for(session_key):
+    return KEY_PREFIX + session_key
+
+
+class SessionStore(SessionBase):
+    """Sessions stored as signed strings under session:<key> with a Redis TTL"""
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._loaded_digest = None
+        self._loaded_ttl = None
+
+    @property
+    def cache_key(self):
+        return session_key_for(self._get_or_create_session_key())
+
+    @staticmethod
+    def _digest(session_dict):
+        """Content hash of the session; encode() output is timestamped so it cannot be compared"""
+        payload = json.dumps(session_dict, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _db_fallback_enabled():
+        return getattr(settings, 'SESSION_REDIS_DB_FALLBACK', True)
+
+    def load(self):
+        stats['loads'] += 1
+        try:
+            pipe = r.pipeline()
+            pipe.get(self.cache_key)
+            pipe.ttl(self.cache_key)
+            data, ttl = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Session read from Redis failed, using the database: {e}")
+            data, ttl = None, None
+
+        if data is not None:
+            session = self.decode(data.decode('utf-8'))
+            self._loaded_digest = self._digest(session)
+            self._loaded_ttl = ttl if ttl and ttl > 0 else None
+            return session
+
+        session = self._load_from_db() if self._db_fallback_enabled() or ttl is None else None
+        if session is not None:
+            return session
+        self._session_key = None
+        return {}
+
+    def _load_from_db(self):
+        """Read a not-yet-migrated (or Redis-outage) session from django_session"""
+        if not self.session_key:
+            return None
+        model = DBSessionStore.get_model_class()
+        row = model.objects.filter(
+            session_key=self.session_key, expire_date__gt=timezone.now()
+        ).first()
+        stats['db_reads'] += 1
+        if row is None:
+            return None
+
+        session = self.decode(row.session_data)
+        ttl = max(int((row.expire_date - timezone.now()).total_seconds()), 1)
+        try:
+            if r.set(self.cache_key, row.session_data, ex=ttl, nx=True):
+                # Moved; the row must not resurrect the session after a logout
+                row.delete()
+                stats['migrated'] += 1
+            self._loaded_digest = self._digest(session)
+            self._loaded_ttl = ttl
+        except redis.RedisError as e:
+            logger.warning(f"Could not move session to Redis: {e}")
+        return session
+
+    def exists(self, session_key):
+        try:
+            if r.exists(session_key_for(session_key)):
+                return True
+        except redis.RedisError as e:
+            logger.warning(f"Session exists check on Redis failed: {e}")
+        if self._db_fallback_enabled():
+            return DBSessionStore.get_model_class().objects.filter(session_key=session_key).exists()
+        return False
+
+    def create(self):
+        for _ in range(10000):
+            self._session_key = self._get_new_session_key()
+            try:
+                self.save(must_create=True)
+            except CreateError:
+                continue
+            self.modified = True
+            return
+        raise RuntimeError('Unable to create a new session key. It is likely that Redis is unavailable.')
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        session = self._get_session(no_load=must_create)
+        digest = self._digest(session)
+        expiry = self.get_expiry_age()
+
+        try:
+            if must_create:
+                if not r.set(self.cache_key, self.encode(session), ex=expiry, nx=True):
+                    raise CreateError
+                stats['writes'] += 1
+            elif digest == self._loaded_digest:
+                # Unchanged: only keep the sliding expiry roughly in step with the cookie
+                interval = getattr(settings, 'SESSION_TOUCH_INTERVAL', 300)
+                if self._loaded_ttl is not None and expiry - self._loaded_ttl < interval:
+                    stats['skipped'] += 1
+                    return
+                if not r.expire(self.cache_key, expiry):
+                    raise UpdateError
+                stats['touches'] += 1
+            else:
+                if not r.set(self.cache_key, self.encode(session), ex=expiry, xx=True):
+                    raise UpdateError
+                stats['writes'] += 1
+        except redis.RedisError as e:
+            logger.warning(f"Session write to Redis failed, using the database: {e}")
+            db_store = DBSessionStore(self.session_key)
+            db_store._session_cache = session
+            db_store.save(must_create=must_create)
+            stats['db_writes'] += 1
+            return
+
+        self._loaded_digest = digest
+        self._loaded_ttl = expiry
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        try:
+            r.delete(session_key_for(session_key))
+        except redis.RedisError as e:
+            logger.warning(f"Session delete on Redis failed: {e}")
+        if self._db_fallback_enabled():
+            DBSessionStore.get_model_class().objects.filter(session_key=session_key).delete()
+
+    @classmethod
+    def clear_expired(cls):
+        # Redis expires keys itself; only leftover database rows and the registry need clearing
+        from .session_registry import SessionRegistry
+        DBSessionStore.clear_expired()
+        SessionRegistry.prune()
@@ -0,0 +1,179 @@
+"""
+Compiled questionnaire schema
+The Category -> Topic -> Question -> QuestionChoice tree only changes when an administrator
+edits the questionnaire, so it is compiled once per schema generation into an immutable
+structure. The serialized tree is shared between processes through Redis and each process
+keeps the decoded copy; requests overlay a form's answers on top of it instead of walking
+the tree in the database
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from types import MappingProxyType
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from .models import Category, Question, QuestionChoice, Topic
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_GENERATION_KEY = 'questionnaire_schema:generation'
+SCHEMA_DATA_KEY = 'questionnaire_schema:data:{generation}'
+SCHEMA_DATA_TIMEOUT = 7 * 24 * 3600  # seconds; old generations simply expire
+
+r = redis.Redis(
+    host=getattr(settings, 'REDIS_HOST', 'localhost'),
+    port=getattr(settings, 'REDIS_PORT', 6379),
+    db=getattr(settings, 'REDIS_DB', 0)
+)
+
+
+def _freeze(value):
+    """Read-only view of decoded JSON so a shared schema cannot be mutated by a caller"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class CompiledSchema:
+    """
+    One immutable questionnaire generation.
+
+    categories: ordered categories, each with ordered 'topics', each with ordered 'questions'
+    questions: {question_id: question}
+    question_categories / category_totals: what progress tracking needs
+    digest: content hash, stable for identical questionnaires (usable as a cache validator)
+    """
+
+    __slots__ = ('generation', 'digest', 'categories', 'questions', 'topics',
+                 'question_categories', 'category_totals')
+
+    def __init__(self, generation, payload):
+        self.generation = generation
+        self.digest = hashlib.sha1(payload).hexdigest()[:16]
+        self.categories = _freeze(json.loads(payload))
+
+        questions = {}
+        topics = {}
+        question_categories = {}
+        category_totals = {}
+        for category in self.categories:
+            category_id = category['category_id']
+            for topic in category['topics']:
+                topics[topic['topic_id']] = topic
+                for question in topic['questions']:
+                    questions[question['question_id']] = question
+                    question_categories[question['question_id']] = category_id
+                    category_totals[category_id] = category_totals.get(category_id, 0) + 1
+        self.questions = MappingProxyType(questions)
+        self.topics = MappingProxyType(topics)
+        self.question_categories = MappingProxyType(question_categories)
+        self.category_totals = MappingProxyType(category_totals)
+
+    @property
+    def version(self):
+        """Identifier of this schema for cache keys and validators"""
+        return f'{self.generation}-{self.digest}'
+
+    def get_category(self, category_id):
+        return next((c for c in self.categories if c['category_id'] == category_id), None)
+
+
+class QuestionnaireSchema:
+    """Per-process + Redis cache of the CompiledSchema for the current generation"""
+
+    _lock = threading.Lock()
+    _local = None          # CompiledSchema held by this process
+    _checked_at = 0.0      # monotonic time the Redis generation was last read
+
+    @staticmethod
+    def compile_payload():
+        """Serialize the whole questionnaire tree with one query per level"""
+        choices = {}
+        for question_id, choice_text in (QuestionChoice.objects.order_by('choice_id')
+                                         .values_list('question_id', 'choice_text').iterator()):
+            choices.setdefault(question_id, []).append(choice_text)
+
+        questions = {}
+        for row in (Question.objects.order_by('display_order', 'question_id')
+                    .values('question_id', 'topic_id', 'question_text', 'answer_type',
+                            'is_required', 'display_order').iterator()):
+            row['choices'] = choices.get(row['question_id'], [])
+            questions.setdefault(row['topic_id'], []).append(row)
+
+        topics = {}
+        for row in (Topic.objects.filter(category__isnull=False).order_by('display_order', 'topic_id')
+                    .values('topic_id', 'category_id', 'name', 'display_order', 'can_skip').iterator()):
+            row['questions'] = questions.get(row['topic_id'], [])
+            topics.setdefault(row['category_id'], []).append(row)
+
+        categories = []
+        for row in (Category.objects.order_by('display_order', 'category_id')
+                    .values('category_id', 'name', 'display_order').iterator()):
+            row['topics'] = topics.get(row['category_id'], [])
+            categories.append(row)
+
+        return json.dumps(categories, separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def get(cls):
+        """The current CompiledSchema (compiled at most once per generation across processes)"""
+        local = cls._local
+        interval = getattr(settings, 'SCHEMA_VERSION_CHECK_SECONDS', 1.0)
+        if local is not None and time.monotonic() - cls._checked_at < interval:
+            return local
+
+        with cls._lock:
+            try:
+                generation = int(r.get(SCHEMA_GENERATION_KEY) or 0)
+            except redis.RedisError as e:
+                # Without Redis other processes' bumps are invisible, so only trust the
+                # local copy for one check interval
+                logger.warning(f"Schema generation unavailable, compiling locally: {e}")
+                if cls._local is None or time.monotonic() - cls._checked_at >= interval:
+                    cls._local = CompiledSchema(None, cls.compile_payload())
+                    cls._checked_at = time.monotonic()
+                return cls._local
+
+            cls._checked_at = time.monotonic()
+            if cls._local is not None and cls._local.generation == generation:
+                return cls._local
+
+            data_key = SCHEMA_DATA_KEY.format(generation=generation)
+            payload = r.get(data_key)
+            if payload is None:
+                # The generation is read before the tree, so a payload stored under it is
+                # never older than the edit that produced it
+                payload = cls.compile_payload()
+                r.set(data_key, payload, ex=SCHEMA_DATA_TIMEOUT)
+            cls._local = CompiledSchema(generation, payload)
+            return cls._local
+
+    @classmethod
+    def refresh(cls):
+        """get(), re-checking the generation now instead of after the check interval"""
+        with cls._lock:
+            cls._checked_at = 0.0
+        return cls.get()
+
+    @classmethod
+    def bump(cls):
+        """Start a new schema generation once the current transaction commits"""
+        def _bump():
+            try:
+                generation = r.incr(SCHEMA_GENERATION_KEY)
+                logger.info(f"Questionnaire schema generation bumped to {generation}")
+            except redis.RedisError as e:
+                logger.warning(f"Could not bump schema generation: {e}")
+            with cls._lock:
+                cls._local = None
+                cls._checked_at = 0.0
+
+        transaction.on_commit(_bump)
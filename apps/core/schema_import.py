@@ -0,0 +1,606 @@
+"""
+Bulk questionnaire import with diff-based sync
+An incoming questionnaire (nested JSON, a Django fixture, or an XLSX/CSV sheet) is
+compared with the current categories/topics/questions/choices and only the difference
+is written: chunked bulk inserts, updates (including reorders) and deletes, all in one
+transaction, followed by a single schema version bump
+"""
+
+import csv
+import json
+import logging
+import os
+import time
+
+import openpyxl
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import ANSWER_TYPE_CHOICES, Answer, Category, Question, QuestionChoice, Topic
+from .progress import FormProgressManager
+
+logger = logging.getLogger(__name__)
+
+ANSWER_TYPES = frozenset(value for value, _ in ANSWER_TYPE_CHOICES)
+TRUE_VALUES = frozenset(('1', 'true', 'yes', 'y', 'x'))
+CHOICE_SEPARATORS = ('|', '\n', ';')
+
+# Sheet columns (header names, case-insensitive); question_id is optional
+SHEET_COLUMNS = {
+    'category': ('category', 'category_name'),
+    'topic': ('topic', 'topic_name'),
+    'question': ('question', 'question_text'),
+    'answer_type': ('answer_type', 'type'),
+    'is_required': ('is_required', 'required'),
+    'choices': ('choices', 'options'),
+    'question_id': ('question_id',),
+}
+
+MAX_REPORTED_ERRORS = 100
+
+# Columns new rows are read back by after a bulk insert (see insert_with_ids)
+CATEGORY_KEY = ('name', 'display_order')
+TOPIC_KEY = ('category_id', 'name', 'display_order')
+QUESTION_KEY = ('topic_id', 'question_text', 'display_order')
+
+
+class QuestionnaireImportError(Exception):
+    """Raised when a questionnaire file cannot be read, is invalid, or the sync is refused"""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+def _normalize(text):
+    """Matching key for names: whitespace-collapsed and case-insensitive"""
+    return ' '.join(str(text or '').split()).casefold()
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def _split_choices(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(choice).strip() for choice in value if str(choice).strip()]
+    text = str(value)
+    separator = next((sep for sep in CHOICE_SEPARATORS if sep in text), None)
+    parts = text.split(separator) if separator else [text]
+    return [part.strip() for part in parts if part.strip()]
+
+
+def insert_with_ids(model, objs, key_fields, chunk_size):
+    """
+    Bulk insert objs (no primary keys set) one statement per chunk and return their new
+    primary keys in input order. MySQL does not hand back ids from a multi-row INSERT,
+    and reserving a range up front races with ordinary inserts into the same table, so
+    each chunk's rows are read back by key_fields among the rows at or above the first
+    id the statement was given (LAST_INSERT_ID()). Rows with equal keys get their ids in
+    insertion order, which a single INSERT preserves.
+    """
+    pk_name = model._meta.pk.attname
+    ids = []
+    for start in range(0, len(objs), chunk_size):
+        chunk = objs[start:start + chunk_size]
+        model.objects.bulk_create(chunk, batch_size=len(chunk))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT LAST_INSERT_ID()')
+            first_id = cursor.fetchone()[0]
+
+        pool = {}
+        rows = (
+            model.objects.filter(**{f'{pk_name}__gte': first_id,
+                                    f'{key_fields[0]}__in': {getattr(obj, key_fields[0]) for obj in chunk}})
+            .order_by(pk_name).values(pk_name, *key_fields)
+        )
+        for row in rows:
+            pool.setdefault(tuple(row[field] for field in key_fields), []).append(row[pk_name])
+        for obj in chunk:
+            # Compare as the database hands the values back (e.g. "5" -> 5)
+            candidates = pool.get(tuple(
+                model._meta.get_field(field).to_python(getattr(obj, field)) for field in key_fields
+            ))
+            if not candidates:
+                raise QuestionnaireImportError(f'Could not read back the id of a new {model._meta.model_name} row')
+            setattr(obj, pk_name, candidates.pop(0))
+            ids.append(getattr(obj, pk_name))
+    return ids
+
+
+def bulk_insert_questions(topic_id, questions, chunk_size=None):
+    """
+    Insert a topic's new questions and their choices with one statement per chunk instead
+    of one per row. questions are dicts with question_text, answer_type, is_required,
+    display_order and choices; returns the new question ids in input order.
+    """
+    chunk_size = chunk_size or getattr(settings, 'SCHEMA_IMPORT_CHUNK_SIZE', 1000)
+    gap = getattr(settings, 'DISPLAY_ORDER_GAP', 1024)
+    with transaction.atomic():
+        ids = insert_with_ids(Question, [
+            Question(
+                topic_id=topic_id,
+                question_text=q.get('question_text'),
+                answer_type=q.get('answer_type'),
+                is_required=bool(q.get('is_required', False)),
+                display_order=q.get('display_order') or (index + 1) * gap,
+            )
+            for index, q in enumerate(questions)
+        ], QUESTION_KEY, chunk_size)
+        QuestionChoice.objects.bulk_create([
+            QuestionChoice(question_id=question_id, choice_text=choice)
+            for question_id, q in zip(ids, questions) if q.get('answer_type') == 'choice'
+            for choice in _split_choices(q.get('choices'))
+        ], batch_size=chunk_size)
+    return ids
+
+
+def load_questionnaire(path, file_format=None):
+    """Read a questionnaire file into the nested category -> topic -> question structure"""
+    file_format = (file_format or os.path.splitext(path)[1].lstrip('.')).lower()
+    if file_format == 'json':
+        with open(path, encoding='utf-8-sig') as handle:
+            try:
+                return parse_questionnaire_json(json.load(handle))
+            except json.JSONDecodeError as e:
+                raise QuestionnaireImportError(f'Invalid JSON: {e}')
+    if file_format == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            return parse_questionnaire_rows(csv.reader(handle))
+    if file_format in ('xlsx', 'xlsm'):
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            return parse_questionnaire_rows(workbook.active.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    raise QuestionnaireImportError(f'Unsupported questionnaire format "{file_format}"')
+
+
+def parse_questionnaire_json(data):
+    """
+    Accepts the nested format ({"categories": [...]} or a bare list, the same shape the
+    compiled schema uses; *_id keys pin a node to an existing row) or a Django fixture
+    of category/topic/question/questionchoice objects.
+
+    A node without a "topics"/"questions"/"choices" key leaves its existing children
+    untouched; an empty list removes them.
+    """
+    if isinstance(data, dict):
+        data = data.get('categories')
+    if not isinstance(data, list):
+        raise QuestionnaireImportError('Expected a list of categories')
+    if data and all(isinstance(item, dict) and 'model' in item and 'fields' in item for item in data):
+        return _parse_fixture(data)
+
+    categories = []
+    for category in data:
+        node = {
+            'id': category.get('category_id'),
+            'name': category.get('name'),
+            'display_order': category.get('display_order'),
+        }
+        if 'topics' in category:
+            node['topics'] = []
+            for topic in category['topics'] or []:
+                topic_node = {
+                    'id': topic.get('topic_id'),
+                    'name': topic.get('name'),
+                    'display_order': topic.get('display_order'),
+                    'can_skip': topic.get('can_skip', False),
+                }
+                if 'questions' in topic:
+                    topic_node['questions'] = [
+                        {
+                            'id': question.get('question_id'),
+                            'question_text': question.get('question_text'),
+                            'answer_type': question.get('answer_type') or 'text',
+                            'is_required': _as_bool(question.get('is_required', False)),
+                            'display_order': question.get('display_order'),
+                            **({'choices': _split_choices(question['choices'])} if 'choices' in question else {}),
+                        }
+                        for question in topic['questions'] or []
+                    ]
+                node['topics'].append(topic_node)
+        categories.append(node)
+    return categories
+
+
+def _parse_fixture(items):
+    """Django fixture (e.g. app/initial_categories.json); pks only link parents and children"""
+    by_model = {}
+    for item in items:
+        by_model.setdefault(item['model'].rsplit('.', 1)[-1].lower(), []).append(item)
+
+    choices = {}
+    for item in by_model.get('questionchoice', []):
+        choices.setdefault(item['fields'].get('question'), []).append(item['fields'].get('choice_text'))
+
+    questions = {}
+    for item in by_model.get('question', []):
+        fields = item['fields']
+        node = {
+            'id': None,
+            'question_text': fields.get('question_text'),
+            'answer_type': fields.get('answer_type') or 'text',
+            'is_required': _as_bool(fields.get('is_required', False)),
+            'display_order': fields.get('display_order'),
+        }
+        if 'questionchoice' in by_model:
+            node['choices'] = choices.get(item['pk'], [])
+        questions.setdefault(fields.get('topic'), []).append(node)
+
+    topics = {}
+    for item in by_model.get('topic', []):
+        fields = item['fields']
+        node = {
+            'id': None,
+            'name': fields.get('name'),
+            'display_order': fields.get('display_order'),
+            'can_skip': _as_bool(fields.get('can_skip', False)),
+        }
+        if 'question' in by_model:
+            node['questions'] = questions.get(item['pk'], [])
+        topics.setdefault(fields.get('category'), []).append(node)
+
+    categories = []
+    for item in by_model.get('category', []):
+        node = {'id': None, 'name': item['fields'].get('name'), 'display_order': item['fields'].get('display_order')}
+        if 'topic' in by_model:
+            node['topics'] = topics.get(item['pk'], [])
+        categories.append(node)
+    return categories
+
+
+def parse_questionnaire_rows(rows):
+    """One question per row; categories and topics are ordered by first appearance"""
+    rows = iter(rows)
+    header = next(rows, None)
+    if not header:
+        raise QuestionnaireImportError('Questionnaire file is empty')
+    names = [str(cell).strip().lower() if cell is not None else '' for cell in header]
+    columns = {
+        key: next((names.index(alias) for alias in aliases if alias in names), None)
+        for key, aliases in SHEET_COLUMNS.items()
+    }
+    missing = [key for key in ('category', 'topic', 'question') if columns[key] is None]
+    if missing:
+        raise QuestionnaireImportError(
+            f'Questionnaire sheet needs a header row with {", ".join(missing)} columns'
+        )
+
+    def cell(row, key):
+        index = columns[key]
+        if index is None or index >= len(row) or row[index] is None:
+            return None
+        return str(row[index]).strip()
+
+    categories = {}
+    for row in rows:
+        if not row or not any(value not in (None, '') for value in row):
+            continue
+        category = categories.setdefault(_normalize(cell(row, 'category')), {
+            'id': None, 'name': cell(row, 'category'), 'display_order': None, 'topics': {},
+        })
+        topic = category['topics'].setdefault(_normalize(cell(row, 'topic')), {
+            'id': None, 'name': cell(row, 'topic'), 'display_order': None, 'can_skip': False, 'questions': [],
+        })
+        question_id = cell(row, 'question_id')
+        if question_id:
+            try:
+                question_id = int(float(question_id))
+            except ValueError:
+                raise QuestionnaireImportError(f'question_id "{question_id}" is not a number')
+        topic['questions'].append({
+            'id': question_id or None,
+            'question_text': cell(row, 'question'),
+            'answer_type': (cell(row, 'answer_type') or 'text').lower(),
+            'is_required': _as_bool(cell(row, 'is_required')),
+            'display_order': None,
+            'choices': _split_choices(cell(row, 'choices')),
+        })
+
+    for category in categories.values():
+        category['topics'] = list(category['topics'].values())
+    return list(categories.values())
+
+
+class QuestionnaireSync:
+    """
+    Diff an incoming questionnaire against the current tables and apply it.
+
+    Nodes are matched by explicit id when one is given, otherwise by name (categories,
+    topics within their category) or question text (within the topic). Unmatched current
+    rows are deleted unless delete_missing is False; deleting questions that have answers
+    is refused unless allow_answer_loss is set.
+    """
+
+    def __init__(self, categories, delete_missing=True, allow_answer_loss=False, chunk_size=None):
+        self.incoming = categories
+        self.delete_missing = delete_missing
+        self.allow_answer_loss = allow_answer_loss
+        self.chunk_size = chunk_size or getattr(settings, 'SCHEMA_IMPORT_CHUNK_SIZE', 1000)
+        self.errors = []
+        self.plan = None
+
+    def validate(self):
+        """Field-level checks on the incoming tree; raises with every problem found"""
+        for c_index, category in enumerate(self.incoming, start=1):
+            if not _normalize(category.get('name')):
+                self._error(f'Category #{c_index} has no name')
+            elif len(category['name']) > 100:
+                self._error(f'Category "{category["name"][:40]}..." is longer than 100 characters')
+            for t_index, topic in enumerate(category.get('topics') or [], start=1):
+                where = f'{category.get("name")} / topic #{t_index}'
+                if not _normalize(topic.get('name')):
+                    self._error(f'{where} has no name')
+                elif len(topic['name']) > 100:
+                    self._error(f'{where} name is longer than 100 characters')
+                for q_index, question in enumerate(topic.get('questions') or [], start=1):
+                    q_where = f'{category.get("name")} / {topic.get("name")} / question #{q_index}'
+                    if not _normalize(question.get('question_text')):
+                        self._error(f'{q_where} has no text')
+                    if question.get('answer_type') not in ANSWER_TYPES:
+                        self._error(f'{q_where} has unknown answer type "{question.get("answer_type")}"')
+                    if any(len(choice) > 255 for choice in question.get('choices') or []):
+                        self._error(f'{q_where} has a choice longer than 255 characters')
+        if self.errors:
+            raise QuestionnaireImportError(
+                f'Questionnaire has {len(self.errors)} problem(s)', self.errors[:MAX_REPORTED_ERRORS]
+            )
+
+    def compute_plan(self):
+        """Read the current questionnaire (one query per level) and work out the diff"""
+        self.validate()
+
+        current_categories = {
+            row['category_id']: row for row in Category.objects.values('category_id', 'name', 'display_order')
+        }
+        current_topics = {
+            row['topic_id']: row for row in Topic.objects.filter(category__isnull=False)
+            .values('topic_id', 'category_id', 'name', 'display_order', 'can_skip')
+        }
+        current_questions = {
+            row['question_id']: row for row in Question.objects.values(
+                'question_id', 'topic_id', 'question_text', 'answer_type', 'is_required', 'display_order'
+            )
+        }
+        current_choices = {}
+        for question_id, choice_text in QuestionChoice.objects.order_by('choice_id').values_list('question_id', 'choice_text'):
+            current_choices.setdefault(question_id, []).append(choice_text)
+
+        topics_by_category = {}
+        for topic in sorted(current_topics.values(), key=lambda t: (t['display_order'], t['topic_id'])):
+            topics_by_category.setdefault(topic['category_id'], []).append(topic['topic_id'])
+        questions_by_topic = {}
+        for question in sorted(current_questions.values(), key=lambda q: (q['display_order'], q['question_id'])):
+            questions_by_topic.setdefault(question['topic_id'], []).append(question['question_id'])
+
+        plan = {
+            'category': {'create': [], 'update': [], 'delete': set()},
+            'topic': {'create': [], 'update': [], 'delete': set()},
+            'question': {'create': [], 'update': [], 'delete': set()},
+            'choices_replace': [],   # (question node) whose choices are rewritten
+            'moved_questions': 0,
+            'recategorized_questions': set(),   # existing question ids counted under another category
+        }
+        matched = {'category': set(), 'topic': set(), 'question': set()}
+
+        def match(kind, node, current, candidates):
+            """Existing row id for node, or None when it is new"""
+            node_id = node.get('id')
+            if node_id in current and node_id not in matched[kind]:
+                matched[kind].add(node_id)
+                return node_id
+            key = _normalize(node.get('question_text') if kind == 'question' else node.get('name'))
+            field = 'question_text' if kind == 'question' else 'name'
+            for candidate in candidates:
+                if candidate not in matched[kind] and _normalize(current[candidate][field]) == key:
+                    matched[kind].add(candidate)
+                    return candidate
+            return None
+
+        # Positions without an explicit display_order are spaced like apps.core.ordering
+        gap = getattr(settings, 'DISPLAY_ORDER_GAP', 1024)
+        category_ids = sorted(current_categories, key=lambda c: (current_categories[c]['display_order'], c))
+        for c_index, category in enumerate(self.incoming, start=1):
+            category['display_order'] = category.get('display_order') or c_index * gap
+            category['id'] = match('category', category, current_categories, category_ids)
+            self._diff_row(plan['category'], category, current_categories.get(category['id']),
+                           ('name', 'display_order'))
+            if 'topics' not in category:
+                # Children left as they are
+                matched['topic'].update(topics_by_category.get(category['id'], []))
+                for topic_id in topics_by_category.get(category['id'], []):
+                    matched['question'].update(questions_by_topic.get(topic_id, []))
+                continue
+
+            for t_index, topic in enumerate(category['topics'], start=1):
+                topic['display_order'] = topic.get('display_order') or t_index * gap
+                topic['id'] = match('topic', topic, current_topics, topics_by_category.get(category['id'], []))
+                topic['parent'] = category
+                self._diff_row(plan['topic'], topic, current_topics.get(topic['id']),
+                               ('name', 'display_order', 'can_skip', 'category_id'),
+                               category_id=category['id'])
+                if 'questions' not in topic:
+                    matched['question'].update(questions_by_topic.get(topic['id'], []))
+                    existing_topic = current_topics.get(topic['id'])
+                    if existing_topic and existing_topic['category_id'] != category['id']:
+                        plan['recategorized_questions'].update(questions_by_topic.get(topic['id'], []))
+                    continue
+
+                for q_index, question in enumerate(topic['questions'], start=1):
+                    question['display_order'] = question.get('display_order') or q_index * gap
+                    question['id'] = match('question', question, current_questions,
+                                           questions_by_topic.get(topic['id'], []))
+                    question['parent'] = topic
+                    existing = current_questions.get(question['id'])
+                    self._diff_row(plan['question'], question, existing,
+                                   ('question_text', 'answer_type', 'is_required', 'display_order', 'topic_id'),
+                                   topic_id=topic['id'])
+                    if existing and existing['topic_id'] != topic['id']:
+                        plan['moved_questions'] += 1
+                    old_topic = current_topics.get(existing['topic_id']) if existing else None
+                    if old_topic and old_topic['category_id'] != category['id']:
+                        plan['recategorized_questions'].add(question['id'])
+                    if 'choices' in question:
+                        wanted = question['choices'] if question['answer_type'] == 'choice' else []
+                        question['choices'] = wanted
+                        if existing and current_choices.get(question['id'], []) != wanted:
+                            plan['choices_replace'].append(question)
+
+        if self.delete_missing:
+            plan['category']['delete'] = set(current_categories) - matched['category']
+            plan['topic']['delete'] = set(current_topics) - matched['topic']
+            plan['question']['delete'] = set(current_questions) - matched['question']
+            # Unmatched topics of a deleted category and unmatched questions of a deleted
+            # topic go with it (cascade), so count them as deleted too; matched ones are
+            # re-parented before the deletes run
+            for category_id in plan['category']['delete']:
+                plan['topic']['delete'].update(
+                    t for t in topics_by_category.get(category_id, []) if t not in matched['topic']
+                )
+            for topic_id in plan['topic']['delete']:
+                plan['question']['delete'].update(
+                    q for q in questions_by_topic.get(topic_id, []) if q not in matched['question']
+                )
+
+        plan['answers_removed'] = 0
+        if plan['question']['delete']:
+            plan['answers_removed'] = Answer.objects.filter(question_id__in=plan['question']['delete']).count()
+
+        self.plan = plan
+        return self.summary()
+
+    def _diff_row(self, bucket, node, existing, fields, **parent_ids):
+        """Queue node for create, or for update when any compared field differs"""
+        if existing is None:
+            bucket['create'].append(node)
+            return
+        wanted = dict(node, **parent_ids)
+        if any(existing[field] != wanted.get(field) for field in fields):
+            bucket['update'].append(node)
+
+    def summary(self):
+        plan = self.plan
+        result = {}
+        for kind in ('category', 'topic', 'question'):
+            result[f'{kind}_created'] = len(plan[kind]['create'])
+            result[f'{kind}_updated'] = len(plan[kind]['update'])
+            result[f'{kind}_deleted'] = len(plan[kind]['delete'])
+        result['choices_replaced'] = len(plan['choices_replace'])
+        result['questions_moved'] = plan['moved_questions']
+        result['answers_removed'] = plan['answers_removed']
+        result['changed'] = any(
+            value for key, value in result.items() if key not in ('answers_removed',)
+        )
+        return result
+
+    def apply(self):
+        """Write the diff in one transaction and bump the schema version once; returns the summary"""
+        started = time.monotonic()
+        if self.plan is None:
+            self.compute_plan()
+        plan = self.plan
+        summary = self.summary()
+
+        if plan['answers_removed'] and not self.allow_answer_loss:
+            raise QuestionnaireImportError(
+                f'Sync would delete {summary["question_deleted"]} question(s) holding '
+                f'{plan["answers_removed"]} answer(s); pass allow_answer_loss to proceed'
+            )
+        if not summary['changed']:
+            summary['duration_ms'] = int((time.monotonic() - started) * 1000)
+            return summary
+
+        # Forms whose per-category counters the import invalidates, read before the
+        # deletes remove the answers that identify them
+        affected_forms = FormProgressManager.forms_answering(
+            plan['question']['delete'] | plan['recategorized_questions']
+        )
+
+        with transaction.atomic():
+            self._create_categories(plan['category']['create'])
+            self._update(Category, plan['category']['update'], ('name', 'display_order'),
+                         lambda node: Category(category_id=node['id'], name=node['name'],
+                                               display_order=node['display_order']))
+
+            self._create_topics(plan['topic']['create'])
+            self._update(Topic, plan['topic']['update'], ('category_id', 'name', 'display_order', 'can_skip'),
+                         lambda node: Topic(topic_id=node['id'], category_id=node['parent']['id'],
+                                            name=node['name'], display_order=node['display_order'],
+                                            can_skip=bool(node.get('can_skip'))))
+
+            self._create_questions(plan['question']['create'])
+            self._update(Question, plan['question']['update'],
+                         ('topic_id', 'question_text', 'answer_type', 'is_required', 'display_order'),
+                         lambda node: Question(question_id=node['id'], topic_id=node['parent']['id'],
+                                               question_text=node['question_text'],
+                                               answer_type=node['answer_type'],
+                                               is_required=bool(node.get('is_required')),
+                                               display_order=node['display_order']))
+
+            # Answers reference choices by text, so rewriting a question's choices is safe
+            self._delete(QuestionChoice, [q['id'] for q in plan['choices_replace']], field='question_id')
+            QuestionChoice.objects.bulk_create([
+                QuestionChoice(question_id=question['id'], choice_text=choice)
+                for question in plan['choices_replace'] + plan['question']['create']
+                for choice in question.get('choices') or []
+            ], batch_size=self.chunk_size)
+
+            # Deletes last: topics and questions moved out of a category or topic that is
+            # going away have been re-parented above, so the cascade cannot take them (or
+            # their answers) along; everything it does reach is counted in answers_removed
+            for model, kind in ((Question, 'question'), (Topic, 'topic'), (Category, 'category')):
+                self._delete(model, plan[kind]['delete'])
+
+            # One generation bump for the whole import; only forms that answered removed or
+            # re-categorized questions lose their counters
+            FormProgressManager.on_schema_change(affected_forms)
+
+        summary['duration_ms'] = int((time.monotonic() - started) * 1000)
+        logger.info(f"Questionnaire sync applied: {summary}")
+        return summary
+
+    def _delete(self, model, ids, field=None):
+        ids = sorted(ids)
+        field = field or model._meta.pk.name
+        for start in range(0, len(ids), self.chunk_size):
+            model.objects.filter(**{f'{field}__in': ids[start:start + self.chunk_size]}).delete()
+
+    def _update(self, model, nodes, fields, build):
+        if nodes:
+            model.objects.bulk_update([build(node) for node in nodes], fields, batch_size=self.chunk_size)
+
+    def _create_categories(self, nodes):
+        ids = insert_with_ids(Category, [
+            Category(name=node['name'], display_order=node['display_order'])
+            for node in nodes
+        ], CATEGORY_KEY, self.chunk_size)
+        for node, category_id in zip(nodes, ids):
+            node['id'] = category_id
+
+    def _create_topics(self, nodes):
+        ids = insert_with_ids(Topic, [
+            Topic(category_id=node['parent']['id'], name=node['name'],
+                  display_order=node['display_order'], can_skip=bool(node.get('can_skip')))
+            for node in nodes
+        ], TOPIC_KEY, self.chunk_size)
+        for node, topic_id in zip(nodes, ids):
+            node['id'] = topic_id
+
+    def _create_questions(self, nodes):
+        ids = insert_with_ids(Question, [
+            Question(topic_id=node['parent']['id'],
+                     question_text=node['question_text'], answer_type=node['answer_type'],
+                     is_required=bool(node.get('is_required')), display_order=node['display_order'])
+            for node in nodes
+        ], QUESTION_KEY, self.chunk_size)
+        for node, question_id in zip(nodes, ids):
+            node['id'] = question_id
+
+    def _error(self, message):
+        self.errors.append(message)
@@ -0,0 +1,152 @@
+"""
+Per-admin session registry (admin_sessions table, indexed by admin_user + is_active)
+A row is written on login and deactivated on logout, forced revocation, account
+deactivation and expiry, so listing or revoking one admin's sessions is an indexed
+lookup instead of decoding every django_session row. The session itself still lives
+in the configured SESSION_ENGINE; the registry is only the index. Clients see a
+digest of the session key (public_id), never the key itself.
+"""
+
+import hashlib
+import logging
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import AdminSession
+
+logger = logging.getLogger(__name__)
+
+# Inactive rows are kept this long for the security pages, then deleted
+INACTIVE_RETENTION_DAYS = 30
+
+
+def public_id(session_key):
+    return hashlib.sha256(session_key.encode('utf-8')).hexdigest()[:16]
+
+
+def session_store(session_key=None):
+    return import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+
+
+class SessionRegistry:
+    """Registry maintenance and lookups (static helpers, like the other *Manager classes)"""
+
+    @staticmethod
+    def register(request, admin):
+        """Record the request's session as belonging to `admin` (call after login)"""
+        session_key = request.session.session_key
+        if not session_key:
+            return None
+        now = timezone.now()
+        row, _ = AdminSession.objects.update_or_create(
+            session_id=session_key,
+            defaults={
+                'admin_user': admin,
+                'ip_address': SessionRegistry._client_ip(request),
+                'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+                'expires_at': now + timedelta(seconds=request.session.get_expiry_age()),
+                'is_active': True,
+            }
+        )
+        return row
+
+    @staticmethod
+    def unregister(session_key):
+        """Mark a session ended (logout); the caller clears the session itself"""
+        if session_key:
+            SessionRegistry._deactivate(AdminSession.objects.filter(session_id=session_key, is_active=True))
+
+    @staticmethod
+    def active_for(admin_id, current_key=None):
+        """
+        Active sessions of one admin, newest first. Rows whose session is gone from the
+        store (expired, cleared) are deactivated on the way.
+        """
+        rows = list(
+            AdminSession.objects.filter(admin_user_id=admin_id, is_active=True).order_by('-created_at')
+        )
+        store = session_store()
+        alive, dead = [], []
+        for row in rows:
+            (alive if store.exists(row.session_id) else dead).append(row)
+        if dead:
+            SessionRegistry._deactivate(AdminSession.objects.filter(session_id__in=[row.session_id for row in dead]))
+        return [SessionRegistry.describe(row, current_key) for row in alive]
+
+    @staticmethod
+    def describe(row, current_key=None):
+        return {
+            'id': public_id(row.session_id),
+            'ip_address': row.ip_address,
+            'user_agent': row.user_agent,
+            'created_at': row.created_at,
+            'last_activity': row.last_activity,
+            'expires_at': row.expires_at,
+            'is_current': row.session_id == current_key,
+        }
+
+    @staticmethod
+    def revoke(admin_id, session_id):
+        """
+        End one of the admin's sessions by public id (or raw key). Returns False when the
+        admin has no such active session.
+        """
+        for row in AdminSession.objects.filter(admin_user_id=admin_id, is_active=True).only('session_id'):
+            if session_id in (row.session_id, public_id(row.session_id)):
+                session_store().delete(row.session_id)
+                SessionRegistry._deactivate(AdminSession.objects.filter(session_id=row.session_id))
+                return True
+        return False
+
+    @staticmethod
+    def revoke_all(admin_id, except_key=None):
+        """End every session of an admin (e.g. account deactivated); returns how many"""
+        keys = list(
+            AdminSession.objects.filter(admin_user_id=admin_id, is_active=True)
+            .exclude(session_id=except_key or '').values_list('session_id', flat=True)
+        )
+        store = session_store()
+        for key in keys:
+            store.delete(key)
+        SessionRegistry._deactivate(AdminSession.objects.filter(session_id__in=keys))
+        return len(keys)
+
+    @staticmethod
+    def prune():
+        """
+        Expiry pass: deactivate rows past expires_at whose session is gone, extend the ones
+        kept alive by sliding expiry, and delete old inactive rows. Returns counts.
+        """
+        now = timezone.now()
+        store = session_store()
+        ended, extended = [], []
+        expiring = AdminSession.objects.filter(is_active=True, expires_at__lte=now).values_list('session_id', flat=True)
+        for key in expiring:
+            (extended if store.exists(key) else ended).append(key)
+        if ended:
+            SessionRegistry._deactivate(AdminSession.objects.filter(session_id__in=ended))
+        if extended:
+            AdminSession.objects.filter(session_id__in=extended).update(
+                expires_at=now + timedelta(seconds=settings.SESSION_COOKIE_AGE)
+            )
+        deleted, _ = AdminSession.objects.filter(
+            is_active=False, last_activity__lt=now - timedelta(days=INACTIVE_RETENTION_DAYS)
+        ).delete()
+        if ended or deleted:
+            logger.info(f"Session registry: {len(ended)} expired, {len(extended)} extended, {deleted} deleted")
+        return {'expired': len(ended), 'extended': len(extended), 'deleted': deleted}
+
+    @staticmethod
+    def _deactivate(queryset):
+        # last_activity doubles as "ended at" for inactive rows (update() skips auto_now)
+        return queryset.update(is_active=False, last_activity=timezone.now())
+
+    @staticmethod
+    def _client_ip(request):
+        forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded_for:
+            return forwarded_for.split(',')[0].strip()
+        return request.META.get('REMOTE_ADDR')
@@ -1,8 +1,11 @@
 from celery import shared_task
 import redis
 import json
+import os
 from django.conf import settings
 from django.db import connection
+from .utils import AnswerManager
+from .answer_import import OfflineAnswerImporter, AnswerImportError
 
 r = redis.Redis(
     host=getattr(settings, 'REDIS_HOST', 'localhost'),
@@ -25,10 +28,79 @@ def flush_forms():
                 [form_data['school_id'], form_data['status']]
             )
             form_id = cursor.lastrowid
-            for answer in form_data['answers']:
-                cursor.execute(
-                    "INSERT INTO answers (form_id, question_id, response) VALUES (%s, %s, %s)",
-                    [form_id, answer['question_id'], answer['response']]
-                )
+        AnswerManager.save_answers(form_id, [
+            (answer['question_id'], answer['response'], None)
+            for answer in form_data['answers']
+        ])
         count += 1
-    return {'forms_flushed': count} 
\ No newline at end of file
+    return {'forms_flushed': count} 
+
+@shared_task(bind=True)
+def import_offline_answers(self, form_id, path, file_format=None, user_id=None):
+    """Stream an uploaded XLSX/CSV of offline answers into a form, reporting progress as task meta"""
+    from django.contrib.auth.models import User
+    from apps.utils.enhanced_logging import EnhancedSystemLogger
+
+    def report_progress(stats):
+        try:
+            self.update_state(state='PROGRESS', meta=stats)
+        except Exception:
+            # Progress is best effort; never fail the import over it
+            pass
+
+    user = User.objects.filter(id=user_id).first() if user_id else None
+    try:
+        stats = OfflineAnswerImporter(
+            form_id, path, file_format, progress_callback=report_progress
+        ).run()
+    except AnswerImportError as e:
+        EnhancedSystemLogger.log_data_import(user, 'offline_answers', 0, success=False, errors=[str(e)])
+        return {'form_id': form_id, 'success': False, 'error': str(e)}
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    EnhancedSystemLogger.log_data_import(
+        user, 'offline_answers', stats['answers_imported'],
+        success=stats['error_count'] == 0, errors=stats['errors'] or None
+    )
+    stats['success'] = True
+    return stats
+
+@shared_task
+def rebalance_display_order(kind, parent_id=None):
+    """Re-spread one group of siblings whose display_order gaps ran low (see apps.core.ordering)"""
+    from .ordering import DisplayOrder
+    from .progress import FormProgressManager
+    rewritten = DisplayOrder.rebalance(kind, parent_id)
+    if rewritten:
+        # Relative order is unchanged, but the compiled schema carries the values
+        FormProgressManager.on_schema_change()
+    return {'kind': kind, 'parent_id': parent_id, 'rows_rewritten': rewritten}
+
+@shared_task
+def flush_login_attempts():
+    """Persist queued login attempts in batches (see apps.core.login_pipeline)"""
+    from .login_pipeline import LoginAttemptQueue
+    return {'login_attempts_written': LoginAttemptQueue.flush()}
+
+@shared_task
+def prune_session_registry():
+    """Expire admin_sessions rows whose session ended (also run by `manage.py clearsessions`)"""
+    from .session_registry import SessionRegistry
+    return SessionRegistry.prune()
+
+@shared_task
+def maintain_log_partitions():
+    """Pre-create next months' log partitions and drop expired ones (run monthly or more often)"""
+    from django.db import connection
+    if connection.vendor != 'mysql':
+        return {}
+    from .log_partitions import maintain
+    return maintain()
+
+@shared_task
+def rollup_logs():
+    """Refresh the hourly/daily log rollups behind the dashboard counts (run every few minutes)"""
+    from apps.utils.log_rollups import LogRollups
+    return LogRollups.run()
@@ -58,6 +58,8 @@ urlpatterns = [
     path('admin/role/', admin_views.role_page, name='role-page'),
     path('admin/logs/', admin_views.logs_page, name='logs-page'),
     path('admin/logs/export/', admin_views.export_logs_csv, name='export-logs-csv'),
+    path('api/admin/logs/search/', admin_views.api_logs_search, name='api-admin-logs-search'),
+    path('api/admin/logs/<str:tab>/', admin_views.api_logs_tab, name='api-admin-logs-tab'),
     path('admin/settings/', admin_views.settings_page, name='settings-page'),
     
     # Admin API endpoints - New admin user system
@@ -69,6 +71,7 @@ urlpatterns = [
     path('api/admin/users/export/', admin_views.api_export_admin_users, name='api-export-admin-users'),
     path('api/admin/deadlines/', admin_views.api_set_deadline, name='api-set-deadline'),
     path('api/admin/activity-logs/', admin_views.api_activity_logs, name='api-admin-activity-logs'),
+    path('api/admin/audit-writer/metrics/', admin_views.api_audit_writer_metrics, name='api-admin-audit-writer-metrics'),
     path('api/admin/roles/create/', admin_views.api_create_role, name='api-create-role'),
     path('api/admin/roles/assign/', admin_views.api_assign_role, name='api-assign-role'),
     path('api/geographic-data/<str:data_type>/', views.api_geographic_data, name='api-geographic-data'),
@@ -127,8 +130,12 @@ urlpatterns = [
     path('api/dashboard/forms_over_time/', views.api_dashboard_forms_over_time, name='api_dashboard_forms_over_time'),
     path('api/dashboard/top_schools/', views.api_dashboard_top_schools, name='api_dashboard_top_schools'),
     path('api/form/sections/', views.api_form_sections, name='api_form_sections'),
+    path('api/form/sections/summary/', views.api_form_section_summary, name='api_form_section_summary'),
+    path('api/form/sections/<int:category_id>/', views.api_form_section_detail, name='api_form_section_detail'),
     path('api/form/answers/', views.api_form_answers, name='api_form_answers'),
     path('api/form/submit/', views.api_form_submit, name='api_form_submit'),
+    path('api/form/import/', views.api_form_import, name='api_form_import'),
+    path('api/form/import/<str:task_id>/', views.api_form_import_status, name='api_form_import_status'),
     path('api/profile/', views.api_profile, name='api_profile'),
     path('api/profile/update/', views.api_profile_update, name='api_profile_update'),
     
@@ -172,6 +179,8 @@ urlpatterns += [
     path('api/submit-form/', views.submit_form_session, name='submit_form'),
     path('api/get-form-state/', views.get_form_state, name='get_form_state'),
     path('api/save_topic/', views.save_topic, name='save_topic_api'),
+    path('api/questionnaire/import/', views.import_questionnaire, name='import_questionnaire_api'),
+    path('api/order/<str:kind>/<int:pk>/move/', views.move_display_order, name='move_display_order_api'),
     path('api/topics/', views.get_topics, name='get_topics_api'),
     path('api/topics/<int:topic_id>/questions/', views.get_questions, name='get_questions_api'),
     path('api/question/create/', views.create_question, name='create_question_api'),
@@ -0,0 +1,219 @@
+"""
+Utility functions for form answers
+Every answer write goes through AnswerManager so concurrent editors of one form
+cannot silently overwrite each other (optimistic concurrency on answers.version)
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.utils.enhanced_logging import EnhancedSystemLogger
+from .models import Answer
+from .progress import FormProgressManager
+
+
+class AnswerConflict(Exception):
+    """Raised when an answer was changed by someone else since the caller last read it"""
+
+    def __init__(self, question_id, expected_version, current_version, current_response):
+        self.question_id = question_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        self.current_response = current_response
+        super().__init__(
+            f"Answer for question {question_id} is at version {current_version}, "
+            f"expected {expected_version}"
+        )
+
+    def to_dict(self):
+        return {
+            'question_id': self.question_id,
+            'expected_version': self.expected_version,
+            'current_version': self.current_version,
+            'current_answer': self.current_response,
+        }
+
+
+class AnswerManager:
+    """Compare-and-set persistence for answers"""
+
+    @staticmethod
+    def parse_version(value):
+        """Normalize a client supplied version; None/blank/garbage means 'not supplied'"""
+        if value is None or value == '':
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def save_answer(form_id, question_id, response, expected_version=None, logging_context=None):
+        """
+        Create or update a single answer.
+
+        expected_version is the version the client last saw. When it is omitted the
+        version read here is used instead, so a write that lands between our read and
+        our update is still reported rather than lost.
+        When a LoggingContext is given the change is audited (one AuditLog row per
+        answer, so autosave paths leave it out); the old value comes from the row
+        already read for the compare-and-set, so auditing adds no extra SELECT.
+        The form's progress bitmap/counters and answer version are updated in the same
+        transaction.
+        Returns the saved Answer or raises AnswerConflict.
+        """
+        return AnswerManager._compare_and_set(
+            form_id, question_id, expected_version, logging_context,
+            lambda current: {'response': response}
+        )
+
+    @staticmethod
+    def save_sub_answer(form_id, question_id, sub_question_id, value, expected_version=None, logging_context=None):
+        """
+        Set one part of a multi-part answer in Answer.sub_answers (same concurrency rules
+        as save_answer). A blank value removes the part.
+        """
+        def merge(current):
+            sub_answers = dict(current.sub_answers or {}) if current else {}
+            if FormProgressManager.is_answer_value(value):
+                sub_answers[str(sub_question_id)] = value
+            else:
+                sub_answers.pop(str(sub_question_id), None)
+            return {'sub_answers': sub_answers or None}
+
+        return AnswerManager._compare_and_set(
+            form_id, question_id, expected_version, logging_context, merge
+        )
+
+    @staticmethod
+    def _compare_and_set(form_id, question_id, expected_version, logging_context, build_values):
+        """Shared create / version-checked update; build_values(current or None) -> changed fields"""
+        now = timezone.now()
+        fields = ('answer_id', 'form_id', 'question_id', 'version', 'response', 'sub_answers')
+        current = (Answer.objects
+                   .filter(form_id=form_id, question_id=question_id)
+                   .only(*fields)
+                   .first())
+
+        if current is None:
+            values = build_values(None)
+            try:
+                with transaction.atomic():
+                    answer = Answer.objects.create(
+                        form_id=form_id,
+                        question_id=question_id,
+                        answered_at=now,
+                        version=1,
+                        **values
+                    )
+                    if FormProgressManager.is_answered(answer.response, answer.sub_answers):
+                        FormProgressManager.apply_changes(form_id, answered_ids=[question_id])
+                    FormProgressManager.record_write(form_id)
+                AnswerManager._audit(answer, 'create', None, logging_context)
+                return answer
+            except IntegrityError:
+                # Lost the insert race on uniq_answers_form_question
+                current = (Answer.objects
+                           .filter(form_id=form_id, question_id=question_id)
+                           .only(*fields)
+                           .first())
+                if current is None:
+                    raise
+                raise AnswerConflict(question_id, expected_version or 0, current.version, current.response)
+
+        if expected_version is None:
+            expected_version = current.version
+        values = build_values(current)
+        old_response = current.response
+        old_sub_answers = current.sub_answers
+
+        was_answered = FormProgressManager.is_answered(old_response, old_sub_answers)
+        is_answered = FormProgressManager.is_answered(
+            values.get('response', old_response), values.get('sub_answers', old_sub_answers)
+        )
+        with transaction.atomic():
+            updated = Answer.objects.filter(
+                pk=current.pk,
+                version=expected_version
+            ).update(
+                answered_at=now,
+                version=F('version') + 1,
+                **values
+            )
+            if updated and was_answered != is_answered:
+                FormProgressManager.apply_changes(
+                    form_id,
+                    answered_ids=[question_id] if is_answered else (),
+                    unanswered_ids=[question_id] if was_answered else ()
+                )
+            if updated:
+                FormProgressManager.record_write(form_id)
+        if not updated:
+            latest = Answer.objects.filter(pk=current.pk).values('version', 'response').first() or {}
+            raise AnswerConflict(question_id, expected_version, latest.get('version'), latest.get('response'))
+
+        for name, value in values.items():
+            setattr(current, name, value)
+        current.answered_at = now
+        current.version = expected_version + 1
+        if current.response != old_response or current.sub_answers != old_sub_answers:
+            AnswerManager._audit(
+                current, 'update',
+                old_response if 'response' in values else old_sub_answers,
+                logging_context
+            )
+        current.reset_tracked_values()
+        return current
+
+    @staticmethod
+    def parse_legacy_sub_answers(response):
+        """
+        {sub_question_id: value} from a legacy "8375:pap;8376:pew" response, or None when the
+        response is an ordinary value. Like the old reader in backend/main.py, only responses
+        with both ";" and ":" qualify, so values such as "100:1" or "2023:Q1" stay answers.
+        """
+        if not response or ';' not in response or ':' not in response:
+            return None
+        parts = [part for part in response.split(';') if part.strip()]
+        if not parts:
+            return None
+        sub_answers = {}
+        for part in parts:
+            sub_question_id, separator, value = part.partition(':')
+            sub_question_id = sub_question_id.strip()
+            if not separator or not sub_question_id.isdigit():
+                return None
+            if value.strip():
+                sub_answers[sub_question_id] = value.strip()
+        return sub_answers
+
+    @staticmethod
+    def _audit(answer, action, old_value, logging_context):
+        if logging_context is None:
+            return
+        EnhancedSystemLogger.log_answer_change(
+            user=logging_context.user,
+            answer=answer,
+            action=action,
+            old_value=old_value,
+            ip_address=logging_context.ip_address,
+            user_agent=logging_context.user_agent
+        )
+
+    @staticmethod
+    def save_answers(form_id, answers, logging_context=None):
+        """
+        Save several answers for one form.
+        answers is an iterable of (question_id, response, expected_version) tuples.
+        Returns (saved: list[Answer], conflicts: list[AnswerConflict]); other errors propagate.
+        """
+        saved = []
+        conflicts = []
+        for question_id, response, expected_version in answers:
+            try:
+                saved.append(AnswerManager.save_answer(
+                    form_id, question_id, response, expected_version, logging_context
+                ))
+            except AnswerConflict as conflict:
+                conflicts.append(conflict)
+        return saved, conflicts
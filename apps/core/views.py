@@ -1,9 +1,8 @@
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponse, HttpResponseNotModified
 from django.views.decorators.csrf import csrf_exempt
 from django.db import connection, models, transaction
 import redis
 import json
-import bcrypt
 import requests
 import jwt
 import openpyxl
@@ -11,6 +10,10 @@ from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 from io import BytesIO
 import base64
+import logging
+import os
+import tempfile
+import uuid
 from django.conf import settings
 from .models import (
     Category, Topic,
@@ -19,12 +22,25 @@ from .models import (
     AuditTrail, AuditLog
 )
 from apps.utils.logging import SystemLogger
+from .utils import AnswerManager, AnswerConflict
+from .progress import FormProgressManager
+from .schema import QuestionnaireSchema
+from .etags import schema_conditional, form_etag, conditional_response, set_validators
+from .fragments import fragment_context
+from .ordering import DisplayOrder
+from .login_pipeline import PasswordHasher, LoginBusy
+from .rate_limit import check_request, rate_limit
+from .session_registry import SessionRegistry
+from .identity import get_identity
+from .schema_import import bulk_insert_questions, load_questionnaire, QuestionnaireSync, QuestionnaireImportError
 from django.views.decorators.http import require_GET, require_POST, require_http_methods
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from functools import wraps
 from django.shortcuts import render, redirect
+from django.core.exceptions import ObjectDoesNotExist
+from django.urls import reverse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -44,7 +60,7 @@ def session_or_login_required(view_func):
             return view_func(request, *args, **kwargs)
         
         # Check if user is authenticated via session
-        if request.session.get('admin_id'):
+        if get_identity(request).is_authenticated:
             return view_func(request, *args, **kwargs)
         
         # If neither authentication method works, return 403
@@ -54,41 +70,42 @@ def session_or_login_required(view_func):
 def session_required(view_func):
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        if not request.session.get('admin_id'):
+        if not get_identity(request).is_authenticated:
             return JsonResponse({'error': 'Not authenticated'}, status=403)
         return view_func(request, *args, **kwargs)
     return _wrapped_view
 
 def get_current_user_school_id(request):
     """Get the school ID for the current authenticated user"""
-    admin_id = request.session.get('admin_id')
-    if not admin_id:
-        return None
-    
-    try:
-        admin_user = AdminUser.objects.get(admin_id=admin_id)
-        if admin_user.admin_level == 'school' and admin_user.school:
-            # Return the school's primary key (schools.id), not the school_id field
-            # This matches what the forms.school_id foreign key expects
-            return admin_user.school.id
-        return None
-    except AdminUser.DoesNotExist:
-        return None
+    # Resolved once per request (request.identity); this is the school's primary key
+    # (schools.id), not the school_id field, matching the forms.school_id foreign key
+    return get_identity(request).school_id
 
 @session_or_login_required
 def user_form(request):
     # Ensure user has a form created (needed for cross-browser answer retrieval)
     admin_id = request.session.get('admin_id')
     school_id = get_current_user_school_id(request)
+    # All users should now be authenticated via admin_user table
+    # Django authentication is kept as fallback but may not be needed
     
+    context = build_user_form_context(admin_id, school_id)
+    context['active_page'] = 'form'
+    return render(request, 'dashboard/user_form.html', context)
+
+def build_user_form_context(admin_id, school_id, schema=None):
+    """
+    Context for user_form in a fixed number of queries, independent of questionnaire size:
+    the form lookup/creation and one query for its answers. The tree comes from the
+    compiled schema (pass one explicitly to bypass the shared cache, e.g. for a fixture).
+    """
+    form = None
     if admin_id and school_id:
         try:
-            # Get the School object from the school_id
-            school_obj = School.objects.get(id=school_id)
             # For session-based auth, create form using admin_id as user reference
             form, created = Form.objects.get_or_create(
                 user_id=admin_id,  # Use admin_id as user reference
-                school=school_obj,
+                school_id=school_id,
                 defaults={'status': 'draft'}
             )
             if created:
@@ -96,120 +113,43 @@ def user_form(request):
         except Exception as e:
             print(f"Error creating form: {e}")
             pass
-    # All users should now be authenticated via admin_user table
-    # Django authentication is kept as fallback but may not be needed
-    
-    # Get all categories with their completion rates
-    categories = Category.objects.all().order_by('display_order')
-    
-    # Build the complete form structure with all related data
-    form_data = []
-    for category in categories:
-        # Get topics directly for this category (no sub-sections)
-        topics = Topic.objects.filter(category=category).order_by('display_order')
-        
-        topics_data = []
-        for topic in topics:
-            # Get questions and their choices for this topic
-            questions = Question.objects.filter(topic=topic).order_by('display_order')
-            
-            questions_data = []
-            for question in questions:
-                # Get choices if question type is 'choice'
-                choices = []
-                if question.answer_type == 'choice':
-                    choices = list(QuestionChoice.objects.filter(question=question)
-                                .values_list('choice_text', flat=True))
-                
-                # Get user's answer if exists (only for regular questions, not sub-questions)
-                answer_value = None
-                admin_id = request.session.get('admin_id')
-                school_id = get_current_user_school_id(request)
-                
-                if admin_id and school_id:
-                    # Get the School object from the school_id
-                    school_obj = School.objects.get(id=school_id)
-                    # Session-based authentication
-                    answer = Answer.objects.filter(
-                        question=question,
-                        form__user_id=admin_id,
-                        form__school=school_obj
-                    ).first()
-                    answer_value = answer.response if answer else None
-                # All authentication should now be via admin_user table
-                
-                questions_data.append({
-                    'id': question.question_id,
-                    'text': question.question_text,
-                    'type': question.answer_type,
-                    'is_required': question.is_required,
-                    'answer': answer_value,
-                    'choices': choices if choices else None
-                })
-                
-                # Calculate topic completion including sub-questions
-                total_questions = 0
-                answered_questions = 0
-                
-                for q in questions_data:
-                    # Count main question
-                    total_questions += 1
-                    if q['answer']:
-                        answered_questions += 1
-                    
-                    # Sub-questions functionality removed
-                
-                completion_rate = int((answered_questions / total_questions * 100) if total_questions > 0 else 0)
-                
-                topics_data.append({
-                    'id': topic.topic_id,
-                    'name': topic.name,
-                    'questions': questions_data,
-                    'is_completed': completion_rate == 100
-                })
-            
-            # Sub-sections removed - topics are now directly under categories
-        
-        # Calculate category completion rate including sub-questions
-        total_questions = 0
-        answered_questions = 0
-        
-        for topic in topics_data:
-            for q in topic['questions']:
-                # Count main question
-                total_questions += 1
-                if q['answer']:
-                    answered_questions += 1
-                
-                # Sub-questions functionality removed
-        completion_rate = int((answered_questions / total_questions * 100) if total_questions > 0 else 0)
-        
-        form_data.append({
-            'id': category.category_id,
-            'name': category.name,
-            'topics': topics_data,
-            'completion_rate': completion_rate
-        })
     
-    # Calculate overall stats
-    total_questions = sum(len(topic['questions']) 
-                         for category in form_data 
-                         for topic in category['topics'])
+    schema = schema or QuestionnaireSchema.get()
+    answers = {}
+    answered_counts = {}
+    if form:
+        for question_id, response, sub_answers in (Answer.objects.filter(form=form)
+                                                   .values_list('question_id', 'response', 'sub_answers')):
+            category_id = schema.question_categories.get(question_id)
+            if category_id is None:
+                continue
+            answers[question_id] = {'answer': response or '', 'sub_answers': sub_answers or {}}
+            if FormProgressManager.is_answered(response, sub_answers):
+                answered_counts[category_id] = answered_counts.get(category_id, 0) + 1
     
-    completed_forms = len([cat for cat in form_data if cat['completion_rate'] == 100])
-    total_forms = len(form_data)
+    # Only the per-user overlay is built here; the questionnaire markup itself is a cached
+    # template fragment rendered straight from the schema
+    category_progress = {}
+    for category in schema.categories:
+        total = schema.category_totals.get(category['category_id'], 0)
+        answered = answered_counts.get(category['category_id'], 0)
+        category_progress[category['category_id']] = int(answered / total * 100) if total else 0
     
-    overall_completion = int(sum(cat['completion_rate'] for cat in form_data) / len(form_data) if form_data else 0)
+    total_forms = len(category_progress)
+    completed_forms = len([rate for rate in category_progress.values() if rate == 100])
+    overall_completion = int(sum(category_progress.values()) / total_forms if total_forms else 0)
     
     context = {
-        'categories': form_data,
+        'schema': schema,
+        'answers': answers,
+        'category_progress': category_progress,
         'completion_rate': overall_completion,
         'completed_forms': completed_forms,
         'total_forms': total_forms,
-        'total_questions': total_questions
+        'total_questions': len(schema.questions)
     }
-    
-    return render(request, 'dashboard/user_form.html', context)
+    context.update(fragment_context(schema=schema))
+    return context
 
 @login_required
 @require_POST
@@ -250,20 +190,13 @@ def submit_form(request):
             
             form_id = cursor.fetchone()[0]
             
-            # Save each answer
-            for answer_data in answers:
-                question_id = answer_data.get('question_id')
-                answer_value = answer_data.get('answer')
-                
-                if question_id and answer_value:
-                    # Handle regular question answer
-                        cursor.execute("""
-                            INSERT INTO answers (form_id, question_id, response, answered_at)
-                            VALUES (%s, %s, %s, NOW())
-                            ON DUPLICATE KEY UPDATE
-                                response = VALUES(response),
-                                answered_at = NOW()
-                        """, [form_id, question_id, answer_value])
+            # Save each answer (compare-and-set against the version the client last saw)
+            _, conflicts = AnswerManager.save_answers(form_id, [
+                (answer_data.get('question_id'), answer_data.get('answer'),
+                 AnswerManager.parse_version(answer_data.get('version')))
+                for answer_data in answers
+                if answer_data.get('question_id') and answer_data.get('answer')
+            ])
             
             # Update form status if needed
             if data.get('status') == 'completed':
@@ -275,6 +208,11 @@ def submit_form(request):
             
             connection.commit()
         
+        if conflicts:
+            return JsonResponse({
+                'status': 'conflict',
+                'conflicts': [c.to_dict() for c in conflicts]
+            }, status=409)
         return JsonResponse({'status': 'success'})
         
     except Exception as e:
@@ -309,6 +247,8 @@ r = redis.Redis(
     db=getattr(settings, 'REDIS_DB', 0)
 )
 
+logger = logging.getLogger(__name__)
+
 
 @csrf_exempt
 @session_required
@@ -496,36 +436,17 @@ def submit_form_session(request):
                     """, [school_id, status])
                     form_id = cursor.lastrowid
                 
-                # Save each answer
-                for answer_data in answers:
-                    question_id = answer_data.get('question_id')
-                    answer_value = answer_data.get('answer')
-                    
-                    if question_id and answer_value:
-                        # Check if answer already exists
-                        cursor.execute("""
-                            SELECT answer_id FROM answers 
-                            WHERE form_id = %s AND question_id = %s
-                        """, [form_id, question_id])
-                        
-                        existing_answer = cursor.fetchone()
-                        
-                        if existing_answer:
-                            # Update existing answer
-                            cursor.execute("""
-                                UPDATE answers 
-                                SET response = %s, answered_at = NOW()
-                                WHERE answer_id = %s
-                            """, [answer_value, existing_answer[0]])
-                        else:
-                            # Insert new answer
-                            cursor.execute("""
-                                INSERT INTO answers (form_id, question_id, response, answered_at)
-                                VALUES (%s, %s, %s, NOW())
-                            """, [form_id, question_id, answer_value])
-                
                 connection.commit()
             
+            # Save each answer (compare-and-set against the version the client last saw);
+            # autosaves are not audited per answer, the submission is logged below
+            saved, conflicts = AnswerManager.save_answers(form_id, [
+                (answer_data.get('question_id'), answer_data.get('answer'),
+                 AnswerManager.parse_version(answer_data.get('version')))
+                for answer_data in answers
+                if answer_data.get('question_id') and answer_data.get('answer')
+            ])
+            
             # Log successful form submission
             if hasattr(request, 'user') and request.user.is_authenticated:
                 SystemLogger.log_form_submission(
@@ -537,10 +458,20 @@ def submit_form_session(request):
                     success=True
                 )
             
+            if conflicts:
+                return JsonResponse({
+                    'status': 'conflict',
+                    'form_id': form_id,
+                    'answers_saved': len(saved),
+                    'versions': {str(a.question_id): a.version for a in saved},
+                    'conflicts': [c.to_dict() for c in conflicts]
+                }, status=409)
+            
             return JsonResponse({
                 'status': 'success',
                 'form_id': form_id,
-                'answers_saved': len(answers)
+                'answers_saved': len(saved),
+                'versions': {str(a.question_id): a.version for a in saved}
             })
             
         except Exception as e:
@@ -551,30 +482,31 @@ def submit_form_session(request):
     return JsonResponse({'error': 'POST required'}, status=405)
 
 @require_GET
+@schema_conditional
 def get_categories(request):
-    categories = Category.objects.all().order_by('display_order')
     data = [{
-        'category_id': cat.category_id,
-        'name': cat.name,
-        'display_order': cat.display_order
-    } for cat in categories]
+        'category_id': cat['category_id'],
+        'name': cat['name'],
+        'display_order': cat['display_order']
+    } for cat in QuestionnaireSchema.get().categories]
     return JsonResponse(data, safe=False)
 
 @require_GET
+@schema_conditional
 def get_sub_sections(request):
     category_id = request.GET.get('category_id')
     if not category_id or not category_id.isdigit():
         return JsonResponse({'error': 'category_id required and must be a number'}, status=400)
     
     # Sub-sections removed - return topics directly for this category
-    topics = Topic.objects.filter(category_id=category_id).order_by('display_order')
+    category = QuestionnaireSchema.get().get_category(int(category_id))
     data = []
     
-    for topic in topics:
+    for topic in (category['topics'] if category else ()):
         data.append({
-            'topic_id': topic.topic_id,
-            'name': topic.name,
-            'display_order': topic.display_order
+            'topic_id': topic['topic_id'],
+            'name': topic['name'],
+            'display_order': topic['display_order']
         })
     
     return JsonResponse(data, safe=False)
@@ -589,35 +521,29 @@ def submit_topic_form(request):
         name = data.get('name')
         questions = data.get('questions', [])
         status = data.get('status', 'completed')  # default to completed
-        # Determine the next display_order for the topic in this category
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT COALESCE(MAX(display_order), 0) + 1 FROM topics WHERE category_id = %s", [category_id])
-            topic_display_order = cursor.fetchone()[0]
-            cursor.execute(
-                "INSERT INTO topics (category_id, name, display_order) VALUES (%s, %s, %s)",
-                [category_id, name, topic_display_order]
+        # The topic goes after the category's last topic
+        with transaction.atomic():
+            topic = Topic.objects.create(
+                category_id=category_id,
+                name=name,
+                display_order=DisplayOrder.next_order('topic', category_id)
             )
-            topic_id = cursor.lastrowid
-            # Insert questions
-            for q_index, q in enumerate(questions, start=1):
-                cursor.execute(
-                    "INSERT INTO questions (topic_id, question_text, answer_type, is_required, display_order) VALUES (%s, %s, %s, %s, %s)",
-                    [topic_id, q['text'], q['type'], q['required'], q_index]
-                )
-                question_id = cursor.lastrowid
-                # Insert choices if needed
-                if q['type'] == 'choice':
-                    for choice in q.get('choices', []):
-                        cursor.execute(
-                            "INSERT INTO question_choices (question_id, choice_text) VALUES (%s, %s)",
-                            [question_id, choice]
-                        )
+            topic_id = topic.topic_id
+            # Questions and choices go in as chunked multi-row inserts, spaced in the order sent
+            bulk_insert_questions(topic_id, [{
+                'question_text': q['text'],
+                'answer_type': q['type'],
+                'is_required': q['required'],
+                'choices': q.get('choices', []),
+            } for q in questions])
+        FormProgressManager.on_schema_change()
         return JsonResponse({'status': 'success', 'topic_id': topic_id})
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
 @csrf_exempt
 @require_POST
+@rate_limit('login', limit=30, window=60, scopes=('ip',))
 def login_view(request):
     try:
         data = json.loads(request.body.decode())
@@ -646,7 +572,7 @@ def login_view(request):
     # Check admin_user table for authentication
     try:
         admin = AdminUser.objects.get(email=email)
-        if bcrypt.checkpw(password.encode(), admin.password_hash.encode()):
+        if PasswordHasher.verify(password, admin.password_hash):
             if admin.status != 'active':
                 # Log failed login due to inactive account
                 SystemLogger.log_login_attempt(
@@ -665,6 +591,7 @@ def login_view(request):
                 user_agent=user_agent,
                 success=True
             )
+            PasswordHasher.rehash_if_needed(admin, password)
             
             # Update last login
             admin.last_login = timezone.now()
@@ -688,23 +615,8 @@ def login_view(request):
             request.session['email'] = admin.email
             request.session['admin_level'] = admin.admin_level
             request.session.modified = True
-            
-            # Force session save
-            request.session.save()
-            
-            # Verify session was saved
-            from django.contrib.sessions.models import Session
-            try:
-                session_obj = Session.objects.get(session_key=request.session.session_key)
-                print(f"LOGIN DEBUG: Session verified in database")
-            except Session.DoesNotExist:
-                print(f"LOGIN DEBUG: WARNING - Session not found in database!")
-            
-            # Debug logging
-            print(f"LOGIN DEBUG: Set session data for admin_id: {admin.admin_id}")
-            print(f"LOGIN DEBUG: Session key: {request.session.session_key}")
-            print(f"LOGIN DEBUG: Session data: {dict(request.session)}")
-            print(f"LOGIN DEBUG: User type: {user_type}, Redirect: {redirect_url}")
+            # SessionMiddleware persists the session once, when the response goes out
+            SessionRegistry.register(request, admin)
             
             # For browser-based login, redirect directly instead of JSON response
             if request.META.get('HTTP_ACCEPT', '').startswith('text/html'):
@@ -746,6 +658,11 @@ def login_view(request):
                 success=False,
                 failure_reason='Invalid password'
             )
+    except LoginBusy:
+        return JsonResponse(
+            {'success': False, 'error': 'Too many sign-ins right now, please try again'},
+            status=503, headers={'Retry-After': '2'}
+        )
     except AdminUser.DoesNotExist:
         # Log failed login attempt for non-existent user
         SystemLogger.log_login_attempt(
@@ -857,20 +774,8 @@ def manual_login(request):
 
 def get_admin_context(request):
     """Get admin context data for templates"""
-    admin_id = request.session.get('admin_id')
-    if not admin_id:
-        return None
-    
     try:
-        from .admin_utils import AdminUserManager
-        admin_scope = AdminUserManager.get_user_access_scope(admin_id)
-        return {
-            'admin_scope': admin_scope,
-            'admin_id': admin_id,
-            'admin_level': admin_scope.get('admin_level'),
-            'permissions': admin_scope.get('permissions', {}),
-            'coverage': admin_scope.get('coverage', ''),
-        }
+        return get_identity(request).admin_context()
     except Exception:
         return None
 
@@ -902,6 +807,7 @@ def admin_page(request):
             'active_sessions': 0,  # Will be implemented with session management
         }
     })
+    context.update(fragment_context(admin_scope=admin_scope))
     
     return render(request, 'admin/admin.html', context)
 
@@ -1005,7 +911,7 @@ def settings_page(request):
     
     # Get admin's current settings
     try:
-        admin_user = AdminUser.objects.get(admin_id=context['admin_id'])
+        admin_user = get_identity(request).require_admin()
         context.update({
             'admin_user': admin_user,
         })
@@ -1328,56 +1234,28 @@ def api_dashboard_top_schools(request):
 
 @require_GET
 @csrf_exempt
+@schema_conditional
 def get_drafts(request):
-    # Fetch all draft questionnaires grouped by category, topic, with questions and choices
-    with connection.cursor() as cursor:
-        cursor.execute('''
-            SELECT
-                c.category_id, c.name AS category,
-                t.topic_id, t.name AS topic,
-                q.question_id, q.question_text, q.answer_type, q.is_required, q.display_order,
-                qc.choice_text
-            FROM categories c
-            JOIN topics t ON t.category_id = c.category_id
-            JOIN questions q ON q.topic_id = t.topic_id
-            LEFT JOIN question_choices qc ON qc.question_id = q.question_id
-            ORDER BY c.display_order, t.display_order, q.display_order, qc.choice_id
-        ''')
-        rows = cursor.fetchall()
-
-    # Group data by category > topic > questions
+    # All draft questionnaires grouped by category, topic, with questions and choices
+    # (topics without questions are left out, as before)
     drafts = []
-    cat_map = {}
-    for row in rows:
-        cat_id, cat_name, topic_id, topic_name, q_id, q_text, q_type, q_required, q_order, choice_text = row
-        cat_key = (cat_id, cat_name)
-        topic_key = (topic_id, topic_name)
-        if cat_key not in cat_map:
-            cat_map[cat_key] = {}
-        topic_map = cat_map[cat_key]
-        if topic_key not in topic_map:
-            topic_map[topic_key] = {}
-        q_map = topic_map[topic_key]
-        if q_id not in q_map:
-            q_map[q_id] = {
-                'question_id': q_id,
-                'text': q_text,
-                'type': q_type,
-                'required': q_required,
-                'displayOrder': q_order,
-                'choices': []
-            }
-        if choice_text:
-            q_map[q_id]['choices'].append(choice_text)
-
-    for (cat_id, cat_name), topic_map in cat_map.items():
-        for (topic_id, topic_name), q_map in topic_map.items():
+    for category in QuestionnaireSchema.get().categories:
+        for topic in category['topics']:
+            if not topic['questions']:
+                continue
             drafts.append({
-                'category': cat_name,
-                'category_id': cat_id,
-                'topic': topic_name,
-                'topic_id': topic_id,
-                'questions': list(q_map.values())
+                'category': category['name'],
+                'category_id': category['category_id'],
+                'topic': topic['name'],
+                'topic_id': topic['topic_id'],
+                'questions': [{
+                    'question_id': q['question_id'],
+                    'text': q['question_text'],
+                    'type': q['answer_type'],
+                    'required': q['is_required'],
+                    'displayOrder': q['display_order'],
+                    'choices': list(q['choices'])
+                } for q in topic['questions']]
             })
     return JsonResponse(drafts, safe=False)
 
@@ -1389,37 +1267,122 @@ def save_topic(request):
         print('[save_topic] Received data:', data)  # Log the received data to the console
         category_id = data.get('category_id')
         topic_name = data.get('name')
-        topic_display_order = data.get('display_order', 1)
         questions = data.get('questions', [])
         can_skip = data.get('can_skip', False)
         if not (category_id and topic_name and questions):
             return JsonResponse({'success': False, 'error': 'Missing required fields.'}, status=400)
-        with connection.cursor() as cursor:
-            # Insert topic directly using category_id
-            cursor.execute(
-                'INSERT INTO topics (category_id, name, display_order, can_skip) VALUES (%s, %s, %s, %s)',
-                [category_id, topic_name, topic_display_order, can_skip]
+        with transaction.atomic():
+            # Orders are assigned here, not taken from the client: the topic goes after the
+            # category's last topic and its questions are spaced in the order sent
+            topic = Topic.objects.create(
+                category_id=category_id,
+                name=topic_name,
+                display_order=DisplayOrder.next_order('topic', category_id),
+                can_skip=can_skip
             )
-            topic_id = cursor.lastrowid
-            # Insert questions and choices
-            for q in questions:
-                cursor.execute(
-                    'INSERT INTO questions (topic_id, question_text, answer_type, is_required, display_order) VALUES (%s, %s, %s, %s, %s)',
-                    [topic_id, q.get('question_text'), q.get('answer_type'), int(q.get('is_required', False)), q.get('display_order', 1)]
-                )
-                question_id = cursor.lastrowid
-                
-                # Insert question choices if answer_type is 'choice'
-                if q.get('answer_type') == 'choice':
-                    for choice in q.get('choices', []):
-                        cursor.execute(
-                            'INSERT INTO question_choices (question_id, choice_text) VALUES (%s, %s)',
-                            [question_id, choice]
-                        )
+            topic_id = topic.topic_id
+            # Questions and choices go in as chunked multi-row inserts
+            bulk_insert_questions(topic_id, [dict(q, display_order=None) for q in questions])
+        FormProgressManager.on_schema_change()
         return JsonResponse({'success': True, 'topic_id': topic_id})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+@csrf_exempt
+@require_POST
+@session_required
+def move_display_order(request, kind, pk):
+    """
+    Move a category, topic or question (drag and drop in the editor).
+    Body: {"after_id": ..., "before_id": ..., "parent_id": ...}, all optional; only the
+    moved row is rewritten (see apps.core.ordering).
+    """
+    try:
+        data = json.loads(request.body or '{}')
+        _, parent_field = DisplayOrder.resolve(kind)
+        move_kwargs = {'after_id': data.get('after_id'), 'before_id': data.get('before_id')}
+        if parent_field and data.get('parent_id'):
+            move_kwargs['parent_id'] = data['parent_id']
+        
+        # Moving a question to a topic of another category (or a topic to another category)
+        # changes which category its answers count for
+        old_category = None
+        if kind == 'question' and 'parent_id' in move_kwargs:
+            old_category = Question.objects.filter(question_id=pk).values_list('topic__category_id', flat=True).first()
+        elif kind == 'topic' and 'parent_id' in move_kwargs:
+            old_category = Topic.objects.filter(topic_id=pk).values_list('category_id', flat=True).first()
+        
+        display_order, parent_id = DisplayOrder.move(kind, pk, **move_kwargs)
+        
+        moved_question_ids = []
+        if old_category is not None:
+            if kind == 'question':
+                new_category = Topic.objects.filter(topic_id=parent_id).values_list('category_id', flat=True).first()
+                moved_question_ids = [pk] if new_category != old_category else []
+            elif str(parent_id) != str(old_category):
+                moved_question_ids = Question.objects.filter(topic_id=pk).values_list('question_id', flat=True)
+        FormProgressManager.on_schema_change(FormProgressManager.forms_answering(moved_question_ids))
+        return JsonResponse({'success': True, 'display_order': display_order, 'parent_id': parent_id})
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except ObjectDoesNotExist as e:
+        return JsonResponse({'success': False, 'error': str(e) or 'Not found'}, status=404)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+QUESTIONNAIRE_IMPORT_FORMATS = ('json', 'csv', 'xlsx', 'xlsm')
+
+@csrf_exempt
+@require_POST
+@session_required
+def import_questionnaire(request):
+    """
+    Sync the whole questionnaire from an uploaded JSON/XLSX/CSV file.
+    Only the difference to the current tables is written, in one transaction.
+    Central (nationwide) admins only. Form fields: dry_run=1 reports the diff only;
+    delete_missing=1 also deletes what the file leaves out (never by default);
+    allow_answer_loss=1 permits deleting questions that already have answers.
+    """
+    scope = get_identity(request).scope
+    if scope is None or not scope.is_nationwide:
+        return JsonResponse({'success': False, 'error': 'Only central administrators can import the questionnaire'}, status=403)
+    
+    path = None
+    try:
+        upload = request.FILES.get('file')
+        if not upload:
+            return JsonResponse({'success': False, 'error': 'No file uploaded'}, status=400)
+        
+        file_format = os.path.splitext(upload.name)[1].lstrip('.').lower()
+        if file_format not in QUESTIONNAIRE_IMPORT_FORMATS:
+            return JsonResponse({'success': False, 'error': 'Only .json, .xlsx and .csv files can be imported'}, status=400)
+        
+        fd, path = tempfile.mkstemp(suffix=f'.{file_format}', prefix='questionnaire_')
+        with os.fdopen(fd, 'wb') as destination:
+            for chunk in upload.chunks():
+                destination.write(chunk)
+        
+        sync = QuestionnaireSync(
+            load_questionnaire(path, file_format),
+            delete_missing=request.POST.get('delete_missing') == '1',
+            allow_answer_loss=request.POST.get('allow_answer_loss') == '1'
+        )
+        if request.POST.get('dry_run') == '1':
+            return JsonResponse({'success': True, 'dry_run': True, 'changes': sync.compute_plan()})
+        
+        changes = sync.apply()
+        logger.info(f"Questionnaire synced from {upload.name} by admin {scope.admin_id}: {changes}")
+        return JsonResponse({'success': True, 'dry_run': False, 'changes': changes})
+        
+    except QuestionnaireImportError as e:
+        return JsonResponse({'success': False, 'error': str(e), 'errors': e.errors}, status=400)
+    except Exception as e:
+        logger.exception(f"Error in import_questionnaire: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    finally:
+        if path and os.path.exists(path):
+            os.remove(path)
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def create_question(request):
@@ -1429,25 +1392,27 @@ def create_question(request):
         question_text = data.get('question_text')
         answer_type = data.get('answer_type')
         is_required = data.get('is_required', False)
-        display_order = data.get('display_order', 1)
         choices = data.get('choices', [])
         answer_description = data.get('answer_description', '')
         if not (topic_id and question_text and answer_type):
             return JsonResponse({'success': False, 'error': 'Missing required fields.'}, status=400)
         topic = Topic.objects.get(pk=topic_id)
-        question = Question.objects.create(
-            topic=topic,
-            question_text=question_text,
-            answer_type=answer_type,
-            is_required=is_required,
-            display_order=display_order,
-        )
-        if answer_type == 'choice' and choices:
-            for choice in choices:
-                QuestionChoice.objects.create(question=question, choice_text=choice)
+        with transaction.atomic():
+            # Appended after the topic's last question; reorders go through move_display_order
+            question = Question.objects.create(
+                topic=topic,
+                question_text=question_text,
+                answer_type=answer_type,
+                is_required=is_required,
+                display_order=DisplayOrder.next_order('question', topic.topic_id),
+            )
+            if answer_type == 'choice' and choices:
+                for choice in choices:
+                    QuestionChoice.objects.create(question=question, choice_text=choice)
         
         # Sub-questions functionality removed
         
+        FormProgressManager.on_schema_change()
         return JsonResponse({'success': True, 'question_id': question.question_id})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -1461,18 +1426,14 @@ def create_category(request):
         print(f"DEBUG: create_category called with body: {request.body}")
         data = json.loads(request.body)
         name = data.get('name')
-        display_order = data.get('display_order')
         
-        print(f"DEBUG: Parsed data - name: {name}, display_order: {display_order}")
+        print(f"DEBUG: Parsed data - name: {name}")
         
         if not name:
             return JsonResponse({'success': False, 'error': 'Category name is required'}, status=400)
         
-        # Get next display order if not provided
-        if not display_order:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT COALESCE(MAX(display_order), 0) + 1 FROM categories")
-                display_order = cursor.fetchone()[0]
+        # Appended after the last category; reorders go through move_display_order
+        display_order = DisplayOrder.next_order('category')
         
         print(f"DEBUG: About to create category with name: {name}, display_order: {display_order}")
         category = Category.objects.create(
@@ -1486,6 +1447,7 @@ def create_category(request):
         from django.db import transaction
         transaction.commit()
         
+        FormProgressManager.on_schema_change()
         return JsonResponse({'success': True, 'category_id': category.category_id})
     except Exception as e:
         print(f"DEBUG: Error in create_category: {str(e)}")
@@ -1503,19 +1465,15 @@ def create_topic(request):
         data = json.loads(request.body)
         category_id = data.get('category_id')
         name = data.get('name')
-        display_order = data.get('display_order')
         can_skip = data.get('can_skip', False)
         
-        print(f"DEBUG: Parsed data - category_id: {category_id}, name: {name}, display_order: {display_order}, can_skip: {can_skip}")
+        print(f"DEBUG: Parsed data - category_id: {category_id}, name: {name}, can_skip: {can_skip}")
         
         if not category_id or not name:
             return JsonResponse({'success': False, 'error': 'Category ID and name are required'}, status=400)
         
-        # Get next display order if not provided
-        if not display_order:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT COALESCE(MAX(display_order), 0) + 1 FROM topics WHERE category_id = %s", [category_id])
-                display_order = cursor.fetchone()[0]
+        # Appended after the category's last topic; reorders go through move_display_order
+        display_order = DisplayOrder.next_order('topic', category_id)
         
         print(f"DEBUG: About to create topic with category_id: {category_id}, name: {name}, display_order: {display_order}")
         topic = Topic.objects.create(
@@ -1531,6 +1489,7 @@ def create_topic(request):
         from django.db import transaction
         transaction.commit()
         
+        FormProgressManager.on_schema_change()
         return JsonResponse({'success': True, 'topic_id': topic.topic_id})
     except Exception as e:
         print(f"DEBUG: Error in create_topic: {str(e)}")
@@ -1549,6 +1508,7 @@ def update_category(request, category_id):
             return JsonResponse({'success': False, 'error': 'Category name is required'}, status=400)
         
         Category.objects.filter(category_id=category_id).update(name=name)
+        FormProgressManager.on_schema_change()
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -1559,7 +1519,11 @@ def update_category(request, category_id):
 def delete_category(request, category_id):
     """Delete a category and all its topics"""
     try:
+        affected_forms = FormProgressManager.forms_answering(
+            Question.objects.filter(topic__category_id=category_id).values_list('question_id', flat=True)
+        )
         Category.objects.filter(category_id=category_id).delete()
+        FormProgressManager.on_schema_change(affected_forms)
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -1578,6 +1542,7 @@ def update_topic(request, topic_id):
             return JsonResponse({'success': False, 'error': 'Topic name is required'}, status=400)
         
         Topic.objects.filter(topic_id=topic_id).update(name=name, can_skip=can_skip)
+        FormProgressManager.on_schema_change()
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -1588,7 +1553,11 @@ def update_topic(request, topic_id):
 def delete_topic(request, topic_id):
     """Delete a topic and all its questions"""
     try:
+        affected_forms = FormProgressManager.forms_answering(
+            Question.objects.filter(topic_id=topic_id).values_list('question_id', flat=True)
+        )
         Topic.objects.filter(topic_id=topic_id).delete()
+        FormProgressManager.on_schema_change(affected_forms)
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -1610,6 +1579,7 @@ def update_question(request, question_id):
         question.is_required = is_required
         # Keep existing display_order - don't change it
         question.save()
+        FormProgressManager.on_schema_change()
         
         return JsonResponse({'success': True})
     except Exception as e:
@@ -1644,45 +1614,36 @@ def get_question(request, question_id):
 def delete_question(request, question_id):
     from .models import Question, QuestionChoice
     try:
+        affected_forms = FormProgressManager.forms_answering([question_id])
         # Delete choices first (if any)
         QuestionChoice.objects.filter(question_id=question_id).delete()
         deleted, _ = Question.objects.filter(question_id=question_id).delete()
         if deleted == 0:
             return JsonResponse({'success': False, 'error': 'Question not found'}, status=404)
+        FormProgressManager.on_schema_change(affected_forms)
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
-# --- Simple session-based rate limiting for AJAX validation endpoints ---
-def rate_limit_session(request, key, max_requests, window_seconds):
-    if 'rate_limit' not in request.session:
-        request.session['rate_limit'] = {}
-    now = int(timezone.now().timestamp())
-    if key not in request.session['rate_limit']:
-        request.session['rate_limit'][key] = []
-    # Remove expired timestamps
-    request.session['rate_limit'][key] = [ts for ts in request.session['rate_limit'][key] if ts > now - window_seconds]
-    if len(request.session['rate_limit'][key]) >= max_requests:
-        return False
-    request.session['rate_limit'][key].append(now)
-    request.session.modified = True
-    return True
-
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def search_location(request):
     type_ = request.GET.get('type', '')
     query = (request.GET.get('q', '') or '').strip()
-    # Username existence check with session rate limiting
+    # Username existence check, rate limited per session (or IP)
     if type_ == 'username':
-        if not rate_limit_session(request, 'username', 10, 10):
-            return Response({'error': 'Too many requests. Please slow down.'}, status=429)
+        limited = check_request(request, 'search_location:username', 10, 10, scopes=('user',))
+        if not limited:
+            return Response({'error': 'Too many requests. Please slow down.'}, status=429,
+                            headers={'Retry-After': str(max(limited.retry_after, 1))})
         exists = AdminUser.objects.filter(username=query).exists()
         return Response({'usernameExists': exists})
-    # Email existence check with session rate limiting
+    # Email existence check, rate limited per session (or IP)
     if type_ == 'email':
-        if not rate_limit_session(request, 'email', 10, 10):
-            return Response({'error': 'Too many requests. Please slow down.'}, status=429)
+        limited = check_request(request, 'search_location:email', 10, 10, scopes=('user',))
+        if not limited:
+            return Response({'error': 'Too many requests. Please slow down.'}, status=429,
+                            headers={'Retry-After': str(max(limited.retry_after, 1))})
         exists = AdminUser.objects.filter(email=query).exists()
         return Response({'emailExists': exists})
     table_map = {
@@ -1792,39 +1753,27 @@ def signin_page(request):
 # Use get_categories and get_sub_sections instead
 
 @require_GET
-def get_topics(request):
-    category_id = request.GET.get('category_id')
-    if not category_id:
+@schema_conditional
+def get_topics(request, category_id=None):
+    category_id = category_id or request.GET.get('category_id')
+    if not category_id or not str(category_id).isdigit():
         return JsonResponse([], safe=False)
-    with connection.cursor() as cursor:
-        cursor.execute('''
-            SELECT topic_id, name, display_order, category_id
-            FROM topics
-            WHERE category_id = %s
-            ORDER BY display_order
-        ''', [category_id])
-        topics = [
-            {'topic_id': row[0], 'name': row[1], 'display_order': row[2], 'category_id': row[3]}
-            for row in cursor.fetchall()
-        ]
+    category = QuestionnaireSchema.get().get_category(int(category_id))
+    topics = [
+        {'topic_id': t['topic_id'], 'name': t['name'], 'display_order': t['display_order'], 'category_id': t['category_id']}
+        for t in (category['topics'] if category else ())
+    ]
     return JsonResponse(topics, safe=False)
 
 @require_GET
+@schema_conditional
 def get_questions(request, topic_id):
-    with connection.cursor() as cursor:
-        cursor.execute('''
-            SELECT question_id, question_text, answer_type, is_required, display_order
-            FROM questions
-            WHERE topic_id = %s
-            ORDER BY display_order
-        ''', [topic_id])
-        questions = [
-            {'question_id': row[0], 'question_text': row[1], 'answer_type': row[2], 'is_required': row[3], 'display_order': row[4]}
-            for row in cursor.fetchall()
-        ]
-        for q in questions:
-            cursor.execute('SELECT choice_text FROM question_choices WHERE question_id = %s', [q['question_id']])
-            q['choices'] = [row[0] for row in cursor.fetchall()]
+    topic = QuestionnaireSchema.get().topics.get(topic_id)
+    questions = [
+        {'question_id': q['question_id'], 'question_text': q['question_text'], 'answer_type': q['answer_type'],
+         'is_required': q['is_required'], 'display_order': q['display_order'], 'choices': list(q['choices'])}
+        for q in (topic['questions'] if topic else ())
+    ]
     return JsonResponse(questions, safe=False)
 
 def report_page(request):
@@ -1843,7 +1792,7 @@ def user_form_page(request):
     View for the user form page.
     Displays the form with categories, sub-sections, and questions.
     """
-    return render(request, 'dashboard/user_form.html')
+    return user_form(request)
 
 def user_profile_page(request):
     """
@@ -1864,6 +1813,7 @@ def logout_view(request):
     
     # Clear session data for admin users
     if request.session.get('admin_id'):
+        SessionRegistry.unregister(request.session.session_key)
         request.session.flush()  # Clear all session data
     else:
         logout(request)  # Use Django logout for Django authenticated users
@@ -1907,6 +1857,9 @@ def proxy_to_fastapi(request, endpoint):
         
         # Forward the request to FastAPI
         if request.method == 'GET':
+            # Let FastAPI answer revalidations with 304
+            if request.headers.get('If-None-Match'):
+                headers['If-None-Match'] = request.headers['If-None-Match']
             response = requests.get(fastapi_url, headers=headers)
         elif request.method == 'POST':
             # Handle JSON data from request body
@@ -1926,8 +1879,13 @@ def proxy_to_fastapi(request, endpoint):
             return JsonResponse({'error': 'Method not allowed'}, status=405)
         
         # Check if response is successful
+        if response.status_code == 304 and response.headers.get('ETag'):
+            return set_validators(HttpResponseNotModified(), response.headers['ETag'])
         if response.status_code == 200:
-            return JsonResponse(response.json(), status=200, safe=False)
+            proxied = JsonResponse(response.json(), status=200, safe=False)
+            if response.headers.get('ETag'):
+                set_validators(proxied, response.headers['ETag'])
+            return proxied
         else:
             return JsonResponse({'error': f'FastAPI error: {response.status_code}'}, status=response.status_code)
             
@@ -1950,83 +1908,220 @@ def api_dashboard_categories(request):
     """Proxy to FastAPI dashboard categories endpoint."""
     return proxy_to_fastapi(request, '/api/dashboard/categories')
 
+def section_status(total_questions, answered_questions):
+    """Progress fields shared by the section endpoints (status names as the dashboard JS expects)"""
+    progress_percentage = round(answered_questions / total_questions * 100, 1) if total_questions else 0.0
+    if answered_questions == 0:
+        status = 'not-started'
+    elif answered_questions >= total_questions:
+        status = 'completed'
+    else:
+        status = 'in-progress'
+    return {
+        'status': status,
+        'progress_percentage': progress_percentage,
+        'total_questions': total_questions,
+        'answered_questions': answered_questions,
+    }
+
+def build_category_section(category, answers):
+    """
+    One category of the answering UI from the compiled schema.
+    answers is {question_id: (response, version, sub_answers)} for (at least) this category.
+    """
+    questions = []
+    answered_questions = 0
+    for topic in category['topics']:
+        for question in topic['questions']:
+            response, version, sub_answers = answers.get(question['question_id'], (None, None, None))
+            is_answered = FormProgressManager.is_answered(response, sub_answers)
+            if is_answered:
+                answered_questions += 1
+            questions.append({
+                'question_id': question['question_id'],
+                'question_text': question['question_text'],
+                'answer_type': question['answer_type'],
+                'is_required': question['is_required'],
+                'choices': list(question['choices']) if question['answer_type'] == 'choice' else [],
+                'answer': response or "",
+                'answer_version': version if is_answered else None,
+                'sub_answers': sub_answers or {},
+                'is_answered': is_answered,
+                'topic_id': topic['topic_id'],
+                'topic_name': topic['name'],
+                'category_name': category['name']
+            })
+    
+    section = {
+        'category_id': category['category_id'],
+        'category_name': category['name'],
+    }
+    section.update(section_status(len(questions), answered_questions))
+    section['questions'] = questions
+    return section
+
+def load_section_answers(form, question_ids=None):
+    """{question_id: (response, version, sub_answers)} for a form, optionally limited to some questions"""
+    answers = Answer.objects.filter(form=form)
+    if question_ids is not None:
+        answers = answers.filter(question_id__in=question_ids)
+    return {
+        question_id: (response, version, sub_answers)
+        for question_id, response, version, sub_answers
+        in answers.values_list('question_id', 'response', 'version', 'sub_answers')
+    }
+
+def form_section_page(request, form, schema, index):
+    """One category page of the sections API, with a prefetch hint for the next category"""
+    categories = schema.categories
+    category = categories[index]
+    progress = FormProgressManager.get(form.form_id)
+    etag = form_etag(f"form-section:{category['category_id']}", progress)
+    not_modified = conditional_response(request, etag)
+    if not_modified:
+        return not_modified
+    
+    question_ids = [q['question_id'] for topic in category['topics'] for q in topic['questions']]
+    section = build_category_section(category, load_section_answers(form, question_ids))
+    section['page'] = {'index': index + 1, 'count': len(categories)}
+    
+    # The UI usually moves on to the next category; let the client warm it up
+    prefetch = None
+    if index + 1 < len(categories):
+        next_id = categories[index + 1]['category_id']
+        prefetch = {'category_id': next_id, 'url': reverse('api_form_section_detail', args=[next_id])}
+    section['prefetch'] = prefetch
+    
+    response = JsonResponse(section)
+    if prefetch:
+        response['Link'] = f"<{prefetch['url']}>; rel=prefetch"
+    return set_validators(response, etag)
+
 @session_or_login_required
 @csrf_exempt
 def api_form_sections(request):
-    """Get form sections with questions for a user - Django implementation."""
+    """
+    Get form sections with questions for a user - Django implementation.
+    ?page=N returns only the N-th category (see api_form_section_detail).
+    """
     try:
         admin_id = request.session.get('admin_id')
         if not admin_id:
             return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
         
-        admin_user = AdminUser.objects.get(admin_id=admin_id)
+        admin_user = get_identity(request).require_admin()
         
-        # Get categories with their subsections, topics, and questions
-        categories_data = []
-        categories = Category.objects.all().order_by('display_order')
+        # Use the same form creation logic as api_form_answers
+        form = get_or_create_admin_form(admin_user)
+        schema = QuestionnaireSchema.get()
+        
+        if request.GET.get('page'):
+            if not form:
+                return JsonResponse({'error': 'Could not create or find form for user'}, status=500)
+            try:
+                index = int(request.GET['page']) - 1
+            except ValueError:
+                return JsonResponse({'error': 'page must be a number'}, status=400)
+            if not 0 <= index < len(schema.categories):
+                return JsonResponse({'error': 'Page out of range'}, status=404)
+            return form_section_page(request, form, schema, index)
+        
+        etag = None
+        answers = {}
+        if form:
+            # Unchanged schema and answers: let the client reuse its copy
+            etag = form_etag('form-sections', FormProgressManager.get(form.form_id))
+            not_modified = conditional_response(request, etag)
+            if not_modified:
+                return not_modified
+            answers = load_section_answers(form)
+        
+        # Overlay this form's answers on the compiled questionnaire schema
+        categories_data = [build_category_section(category, answers) for category in schema.categories]
+        
+        response = JsonResponse(categories_data, safe=False)
+        if etag:
+            set_validators(response, etag)
+        return response
         
-        for category in categories:
+    except AdminUser.DoesNotExist:
+        return JsonResponse({'error': 'Admin user not found'}, status=404)
+    except Exception as e:
+        print(f"Error in api_form_sections: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+@session_or_login_required
+@require_GET
+def api_form_section_summary(request):
+    """
+    Category list with progress but no questions, for the first paint of the answering UI.
+    Progress comes from the form's counters; questions are loaded per category on demand.
+    """
+    try:
+        admin_id = request.session.get('admin_id')
+        if not admin_id:
+            return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
+        
+        form = get_or_create_admin_form(get_identity(request).require_admin())
+        if not form:
+            return JsonResponse({'error': 'Could not create or find form for user'}, status=500)
+        
+        schema = QuestionnaireSchema.get()
+        progress = FormProgressManager.get(form.form_id)
+        etag = form_etag('form-section-summary', progress)
+        not_modified = conditional_response(request, etag)
+        if not_modified:
+            return not_modified
+        
+        counts = progress.category_counts or {}
+        categories_data = []
+        for category in schema.categories:
             category_data = {
-                'category_id': category.category_id,
-                'category_name': category.name,
-                'status': 'in_progress',  # You can calculate this based on completion
-                'progress_percentage': 0.0,
-                'total_questions': 0,
-                'answered_questions': 0,
-                'questions': []
+                'category_id': category['category_id'],
+                'category_name': category['name'],
+                'url': reverse('api_form_section_detail', args=[category['category_id']]),
             }
-            
-            # Sub-sections removed - get topics directly from category
-            topics = Topic.objects.filter(category=category).order_by('display_order')
-            for topic in topics:
-                questions = Question.objects.filter(topic=topic).order_by('display_order')
-                for question in questions:
-                    # Get existing answer if any
-                    answer_text = ""
-                    try:
-                        # Use the same form creation logic as api_form_answers
-                        form = get_or_create_admin_form(admin_user)
-                        if form:
-                            answer = Answer.objects.filter(form=form, question=question).first()
-                            if answer and answer.response:
-                                answer_text = answer.response
-                    except Exception as e:
-                        print(f"Error getting answer for question {question.question_id}: {e}")
-                        answer_text = ""
-                    
-                    question_data = {
-                        'question_id': question.question_id,
-                        'question_text': question.question_text,
-                        'answer_type': question.answer_type,
-                        'answer': answer_text,
-                        'topic_name': topic.name,
-                        'category_name': category.name
-                    }
-                    category_data['questions'].append(question_data)
-                    category_data['total_questions'] += 1
-                    if answer_text:
-                        category_data['answered_questions'] += 1
-            
-            # Calculate progress
-            if category_data['total_questions'] > 0:
-                category_data['progress_percentage'] = round(
-                    (category_data['answered_questions'] / category_data['total_questions']) * 100, 1
-                )
-                if category_data['progress_percentage'] == 100:
-                    category_data['status'] = 'completed'
-                elif category_data['progress_percentage'] > 0:
-                    category_data['status'] = 'in_progress'
-                else:
-                    category_data['status'] = 'not_started'
-            
+            category_data.update(section_status(
+                schema.category_totals.get(category['category_id'], 0),
+                counts.get(str(category['category_id']), 0)
+            ))
             categories_data.append(category_data)
         
-        return JsonResponse(categories_data, safe=False)
+        response = JsonResponse({
+            'categories': categories_data,
+            'prefetch': categories_data[0]['url'] if categories_data else None
+        })
+        return set_validators(response, etag)
         
     except AdminUser.DoesNotExist:
         return JsonResponse({'error': 'Admin user not found'}, status=404)
     except Exception as e:
-        print(f"Error in api_form_sections: {e}")
+        print(f"Error in api_form_section_summary: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+@session_or_login_required
+@require_GET
+def api_form_section_detail(request, category_id):
+    """One category's topics, questions, choices and answers, plus a prefetch hint for the next one."""
+    try:
+        admin_id = request.session.get('admin_id')
+        if not admin_id:
+            return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
+        
+        schema = QuestionnaireSchema.get()
+        index = next((i for i, c in enumerate(schema.categories) if c['category_id'] == category_id), None)
+        if index is None:
+            return JsonResponse({'error': 'Category not found'}, status=404)
+        
+        form = get_or_create_admin_form(get_identity(request).require_admin())
+        if not form:
+            return JsonResponse({'error': 'Could not create or find form for user'}, status=500)
+        return form_section_page(request, form, schema, index)
+        
+    except AdminUser.DoesNotExist:
+        return JsonResponse({'error': 'Admin user not found'}, status=404)
+    except Exception as e:
+        print(f"Error in api_form_section_detail: {e}")
         return JsonResponse({'error': str(e)}, status=500)
 
 @session_or_login_required
@@ -2038,7 +2133,7 @@ def api_form_submit(request):
         if not admin_id:
             return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
         
-        admin_user = AdminUser.objects.get(admin_id=admin_id)
+        admin_user = get_identity(request).require_admin()
         
         if request.method != 'POST':
             return JsonResponse({'error': 'Method not allowed'}, status=405)
@@ -2057,16 +2152,26 @@ def api_form_submit(request):
         # Process answers
         saved_count = 0
         errors = []
+        conflicts = []
+        versions = {}
         
         # Handle different data formats from JavaScript
         answers_data = {}
+        # question key -> version the client last read (optional)
+        expected_versions = data.get('versions') if isinstance(data.get('versions'), dict) else {}
         
         # Format 1: Single question/answer submission (from form-data-manager.js)
         if 'question_id' in data and 'answer' in data:
             question_id = data.get('question_id')
             answer_value = data.get('answer', '')
-            # Sub-questions functionality removed
-            answers_data[f"question_{question_id}"] = answer_value
+            if data.get('sub_question_id'):
+                # Part of a multi-part answer; stored in the parent answer's sub_answers
+                key = f"sub_{question_id}_{data.get('sub_question_id')}"
+            else:
+                key = f"question_{question_id}"
+            answers_data[key] = answer_value
+            if 'version' in data:
+                expected_versions[key] = data.get('version')
         
         # Format 2: Multiple answers in 'answers' array
         elif 'answers' in data:
@@ -2076,6 +2181,8 @@ def api_form_submit(request):
                     if 'question_id' in answer_item:
                         q_id = answer_item['question_id']
                         answers_data[f"question_{q_id}"] = answer_item.get('answer', '')
+                        if 'version' in answer_item:
+                            expected_versions[f"question_{q_id}"] = answer_item.get('version')
             elif isinstance(answers_list, dict):
                 # Format 3: Answers as key-value pairs
                 answers_data = answers_list
@@ -2083,27 +2190,48 @@ def api_form_submit(request):
         # Save answers
         for key, value in answers_data.items():
             try:
+                if key.startswith('sub_'):
+                    # Blank clears the part, so it is not skipped like whole answers are
+                    _, question_id, sub_question_id = key.split('_', 2)
+                    question_id = int(question_id)
+                    if not Question.objects.filter(question_id=question_id).exists():
+                        raise Question.DoesNotExist(f"Question {question_id} does not exist")
+                    
+                    answer = AnswerManager.save_sub_answer(
+                        form.form_id,
+                        question_id,
+                        int(sub_question_id),
+                        str(value or '').strip()[:500],
+                        AnswerManager.parse_version(expected_versions.get(key))
+                    )
+                    versions[str(question_id)] = answer.version
+                    saved_count += 1
+                    continue
+                
                 # Skip empty values
                 if not value or str(value).strip() == '':
                     continue
                     
                 if key.startswith('question_'):
                     question_id = int(key.replace('question_', ''))
-                    question = Question.objects.get(question_id=question_id)
+                    if not Question.objects.filter(question_id=question_id).exists():
+                        raise Question.DoesNotExist(f"Question {question_id} does not exist")
                     
-                    answer, created = Answer.objects.get_or_create(
-                        form=form,
-                        question=question,
-                        defaults={'response': str(value)[:500]}  # Truncate response if too long
+                    answer = AnswerManager.save_answer(
+                        form.form_id,
+                        question_id,
+                        str(value)[:500],  # Truncate response if too long
+                        AnswerManager.parse_version(
+                            expected_versions.get(key, expected_versions.get(str(question_id)))
+                        )
                     )
-                    if not created:
-                        answer.response = str(value)[:500]
-                        answer.save()
+                    versions[str(question_id)] = answer.version
                     saved_count += 1
                     print(f"Saved answer for question {question_id}: {str(value)[:50]}...")
                     
-                # Sub-questions functionality removed
-                    
+            except AnswerConflict as conflict:
+                conflicts.append(conflict.to_dict())
+                continue
             except (ValueError, Question.DoesNotExist) as e:
                 error_msg = f"Error saving {key}: {str(e)}"
                 errors.append(error_msg)
@@ -2135,11 +2263,25 @@ def api_form_submit(request):
             form.status = 'draft'
         form.save()
         
+        if conflicts:
+            return JsonResponse({
+                'success': False,
+                'error': 'conflict',
+                'message': 'Some answers were changed by another user; reload them before saving again',
+                'saved_count': saved_count,
+                'form_id': form.form_id,
+                'status': form.status,
+                'versions': versions,
+                'conflicts': conflicts,
+                'errors': errors if errors else None
+            }, status=409)
+        
         return JsonResponse({
             'success': True,
             'saved_count': saved_count,
             'form_id': form.form_id,
             'status': form.status,
+            'versions': versions,
             'errors': errors if errors else None
         })
         
@@ -2149,6 +2291,108 @@ def api_form_submit(request):
         print(f"Error in api_form_submit: {e}")
         return JsonResponse({'error': str(e)}, status=500)
 
+OFFLINE_IMPORT_FORMATS = ('csv', 'xlsx', 'xlsm')
+
+# Which form each import task writes to, so only that form's owner can read its status
+OFFLINE_IMPORT_OWNER_KEY = 'offline_import:{}'
+OFFLINE_IMPORT_OWNER_TTL = 7 * 24 * 3600
+
+@session_or_login_required
+@csrf_exempt
+@require_POST
+def api_form_import(request):
+    """Upload an offline-filled XLSX/CSV of answers; the import runs as a Celery task."""
+    try:
+        admin_id = request.session.get('admin_id')
+        if not admin_id:
+            return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
+        
+        admin_user = get_identity(request).require_admin()
+        form = get_or_create_admin_form(admin_user)
+        if not form:
+            return JsonResponse({'error': 'Could not create or find form for user'}, status=500)
+        
+        upload = request.FILES.get('file')
+        if not upload:
+            return JsonResponse({'success': False, 'error': 'No file uploaded'}, status=400)
+        
+        file_format = os.path.splitext(upload.name)[1].lstrip('.').lower()
+        if file_format not in OFFLINE_IMPORT_FORMATS:
+            return JsonResponse({'success': False, 'error': 'Only .xlsx and .csv files can be imported'}, status=400)
+        
+        # Spool the upload to disk chunk by chunk; the worker streams it from there
+        import_dir = getattr(settings, 'OFFLINE_IMPORT_DIR', os.path.join(tempfile.gettempdir(), 'edsight_imports'))
+        os.makedirs(import_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=f'.{file_format}', prefix=f'form_{form.form_id}_', dir=import_dir)
+        with os.fdopen(fd, 'wb') as destination:
+            for chunk in upload.chunks():
+                destination.write(chunk)
+        
+        from .tasks import import_offline_answers
+        # The owner key is written before the task can run, so its status is never
+        # requested (or reported) without one
+        task_id = str(uuid.uuid4())
+        r.setex(OFFLINE_IMPORT_OWNER_KEY.format(task_id), OFFLINE_IMPORT_OWNER_TTL, form.form_id)
+        task = import_offline_answers.apply_async(args=[
+            form.form_id, path, file_format,
+            request.user.id if request.user.is_authenticated else form.user_id
+        ], task_id=task_id)
+        
+        return JsonResponse({
+            'success': True,
+            'task_id': task.id,
+            'form_id': form.form_id,
+            'status_url': f'/api/form/import/{task.id}/'
+        }, status=202)
+        
+    except AdminUser.DoesNotExist:
+        return JsonResponse({'error': 'Admin user not found'}, status=404)
+    except Exception as e:
+        print(f"Error in api_form_import: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+@session_or_login_required
+@require_GET
+def api_form_import_status(request, task_id):
+    """Progress of an offline answer import started by api_form_import (the caller's own imports only)."""
+    try:
+        admin_id = request.session.get('admin_id')
+        if not admin_id:
+            return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
+        
+        owner_form_id = r.get(OFFLINE_IMPORT_OWNER_KEY.format(task_id))
+        form = get_or_create_admin_form(get_identity(request).require_admin())
+        if owner_form_id is None or not form or int(owner_form_id) != form.form_id:
+            return JsonResponse({'success': False, 'error': 'Import not found'}, status=404)
+        
+        from celery.result import AsyncResult
+        result = AsyncResult(task_id)
+        info = result.info if isinstance(result.info, dict) else {}
+        
+        response = {
+            'success': True,
+            'task_id': task_id,
+            'state': result.state,
+            'form_id': info.get('form_id'),
+            'rows_processed': info.get('rows_processed', 0),
+            'total_rows': info.get('total_rows'),
+            'answers_imported': info.get('answers_imported', 0),
+            'rows_skipped': info.get('rows_skipped', 0),
+            'error_count': info.get('error_count', 0),
+            'errors': info.get('errors', []),
+        }
+        if result.state == 'FAILURE':
+            response['success'] = False
+            response['error'] = str(result.info)
+        elif result.state == 'SUCCESS' and info.get('success') is False:
+            response['success'] = False
+            response['error'] = info.get('error')
+        return JsonResponse(response)
+    except AdminUser.DoesNotExist:
+        return JsonResponse({'error': 'Admin user not found'}, status=404)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
 @session_or_login_required
 def api_profile(request):
     """Get user profile with user ID included."""
@@ -2198,7 +2442,7 @@ def api_analytics_data(request):
         admin_id = request.session.get('admin_id')
         if not admin_id:
             return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
-        user_school = AdminUser.objects.get(admin_id=admin_id)
+        user_school = get_identity(request).require_admin()
         
         # Get user's forms
         user_forms = Form.objects.filter(user_id=admin_id)
@@ -2303,7 +2547,7 @@ def api_analytics_date_range(request):
         admin_id = request.session.get('admin_id')
         if not admin_id:
             return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
-        user_school = AdminUser.objects.get(admin_id=admin_id)
+        user_school = get_identity(request).require_admin()
         user_forms = Form.objects.filter(user_id=admin_id)
         
         # Get date range from request
@@ -3146,34 +3390,51 @@ def api_form_answers(request):
         if not admin_id:
             return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
         
-        admin_user = AdminUser.objects.get(admin_id=admin_id)
+        admin_user = get_identity(request).require_admin()
         
         # Get or create form for this admin user
         form = get_or_create_admin_form(admin_user)
         if not form:
             return JsonResponse({'error': 'Could not create or find form for user'}, status=500)
         
-        # Get all answers for this form with proper relationships
-        answers = Answer.objects.filter(form=form).select_related('question')
+        progress = FormProgressManager.get(form.form_id)
+        etag = form_etag(f'form-answers:{form.status}', progress, schema=False)
+        not_modified = conditional_response(request, etag, progress.updated_at)
+        if not_modified:
+            return not_modified
+        
+        # Get all answers for this form
+        answers = Answer.objects.filter(form=form).only(
+            'question_id', 'response', 'sub_answers', 'version', 'answered_at'
+        )
         
         answers_data = {}
         for answer in answers:
+            timestamp = answer.answered_at.isoformat() if answer.answered_at else None
             if answer.response and answer.response.strip():  # Only include non-empty responses
-                if answer.question:
-                    # Regular question answer
-                    answers_data[str(answer.question.question_id)] = {
-                        'value': answer.response,
-                        'timestamp': answer.answered_at.isoformat() if answer.answered_at else None
-                    }
-                # Sub-questions functionality removed
+                # Regular question answer
+                answers_data[str(answer.question_id)] = {
+                    'value': answer.response,
+                    'version': answer.version,
+                    'timestamp': timestamp
+                }
+            # Sub-question answers, keyed by sub_question_id
+            for sub_question_id, sub_value in (answer.sub_answers or {}).items():
+                answers_data[str(sub_question_id)] = {
+                    'value': sub_value,
+                    'question_id': answer.question_id,
+                    'version': answer.version,
+                    'timestamp': timestamp
+                }
         
-        return JsonResponse({
+        response = JsonResponse({
             'success': True,
             'answers': answers_data,
             'form_id': form.form_id,
             'status': form.status,
             'message': f'Loaded {len(answers_data)} saved answers'
         })
+        return set_validators(response, etag, progress.updated_at)
         
     except AdminUser.DoesNotExist:
         return JsonResponse({'error': 'Admin user not found'}, status=404)
@@ -3263,7 +3524,7 @@ def api_security_last_login(request):
         admin_id = request.session.get('admin_id')
         if not admin_id:
             return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
-        user_school = AdminUser.objects.get(admin_id=admin_id)
+        user_school = get_identity(request).require_admin()
         
         # Get last login from AuditTrail or use last_login field
         last_login_data = {
@@ -3284,16 +3545,21 @@ def api_security_last_login(request):
 def api_security_sessions(request):
     """Get active sessions for the current user."""
     try:
-        # For now, return current session info
-        # In a full implementation, you'd track sessions in database
+        admin_id = request.session.get('admin_id')
+        if not admin_id:
+            return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
+        
         sessions = [
             {
-                'id': 'current',
-                'device': request.META.get('HTTP_USER_AGENT', 'Unknown Device'),
+                'id': session['id'],
+                'device': session['user_agent'] or 'Unknown Device',
+                'ip_address': session['ip_address'],
                 'location': 'Unknown Location',
-                'last_activity': datetime.now().isoformat(),
-                'is_current': True
+                'created_at': session['created_at'].isoformat(),
+                'last_activity': session['last_activity'].isoformat(),
+                'is_current': session['is_current']
             }
+            for session in SessionRegistry.active_for(admin_id, request.session.session_key)
         ]
         
         return JsonResponse({'sessions': sessions})
@@ -3310,7 +3576,7 @@ def api_security_login_history(request):
         admin_id = request.session.get('admin_id')
         if not admin_id:
             return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
-        user_school = AdminUser.objects.get(admin_id=admin_id)
+        user_school = get_identity(request).require_admin()
         
         history = [
             {
@@ -3336,8 +3602,11 @@ def api_security_terminate_session(request, session_id):
         return JsonResponse({'error': 'Method not allowed'}, status=405)
     
     try:
-        # In a full implementation, you'd remove the session from database
-        # For now, just return success
+        admin_id = request.session.get('admin_id')
+        if not admin_id:
+            return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
+        if not SessionRegistry.revoke(admin_id, session_id):
+            return JsonResponse({'error': 'Session not found'}, status=404)
         return JsonResponse({'success': True, 'message': 'Session terminated'})
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
@@ -3352,7 +3621,7 @@ def api_audit_logs(request):
         if not admin_id:
             return JsonResponse({'error': 'Not authenticated via admin system'}, status=403)
         
-        admin_user = AdminUser.objects.get(admin_id=admin_id)
+        admin_user = get_identity(request).require_admin()
         
         # Get filter parameters
         log_type = request.GET.get('type', 'all')
@@ -21,6 +21,7 @@ from apps.core.models import (
     Region, Division, District, School, Category, Topic, Question
 )
 from apps.admin_management.utils import require_admin_permission, log_admin_activity
+from apps.core.identity import get_identity
 
 
 def get_admin_context(request):
@@ -70,28 +71,7 @@ def get_admin_context(request):
                 'coverage': 'All regions, divisions, districts, and schools (Development Mode)',
             }
         
-        # TODO: Implement proper admin scope retrieval
-        admin_scope = {
-            'admin_level': 'central',
-            'admin_id': admin_id,
-            'username': 'admin',
-            'permissions': {
-                'can_create_users': True,
-                'can_manage_users': True,
-                'can_set_deadlines': True,
-                'can_approve_submissions': True,
-                'can_view_system_logs': True,
-            },
-            'scope': 'nationwide',
-            'coverage': 'All regions, divisions, districts, and schools',
-        }
-        return {
-            'admin_scope': admin_scope,
-            'admin_id': admin_id,
-            'admin_level': admin_scope.get('admin_level'),
-            'permissions': admin_scope.get('permissions', {}),
-            'coverage': admin_scope.get('coverage', ''),
-        }
+        return get_identity(request).admin_context()
     except Exception:
         return None
 
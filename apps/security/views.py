@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
-from django.contrib.sessions.models import Session
+from asgiref.sync import sync_to_async
 from apps.core.models import UsersSchool, LoginAttempt, AuditLog, AccountLockout
+from apps.core.login_pipeline import PasswordHasher, LoginBusy
+from apps.core.rate_limit import rate_limit_dependency
+from apps.core.session_registry import SessionRegistry
 
 router = APIRouter(prefix="/api/security", tags=["security"])
 
@@ -29,7 +32,7 @@ class AuditLogEntry(BaseModel):
     timestamp: datetime
     ip_address: Optional[str]
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(rate_limit_dependency('security_login', 30, 60, scopes=('ip',)))])
 async def login(request: LoginRequest, req: Request):
     """Enhanced login with security tracking"""
     ip_address = req.client.host
@@ -57,7 +60,7 @@ async def login(request: LoginRequest, req: Request):
             raise HTTPException(status_code=423, detail="Account is locked")
         
         # Authenticate user (implement your authentication logic)
-        if authenticate_user(request.username, request.password):
+        if await authenticate_user(request.username, request.password):
             login_attempt.success = True
             login_attempt.user = user
             login_attempt.save()
@@ -88,45 +91,39 @@ async def login(request: LoginRequest, req: Request):
         raise
 
 @router.get("/sessions")
-async def get_user_sessions(user_id: int):
-    """Get active sessions for user"""
-    sessions = Session.objects.filter(
-        session_data__contains=f'"_auth_user_id":"{user_id}"'
-    )
-    
-    session_list = []
-    for session in sessions:
-        session_data = session.get_decoded()
-        session_list.append(SessionInfo(
-            session_key=session.session_key,
-            ip_address=session_data.get('ip_address', 'Unknown'),
-            user_agent=session_data.get('user_agent', 'Unknown'),
-            created_at=session_data.get('created_at', session.expire_date),
-            last_activity=session.expire_date,
-            is_current=True  # Determine based on current session
-        ))
+async def get_user_sessions(user_id: int, req: Request):
+    """Get active sessions for user (indexed lookup in the admin session registry)"""
+    current_key = req.cookies.get('sessionid')
+    sessions = await sync_to_async(SessionRegistry.active_for)(user_id, current_key)
     
-    return session_list
+    return [
+        SessionInfo(
+            session_key=session['id'],
+            ip_address=session['ip_address'] or 'Unknown',
+            user_agent=session['user_agent'] or 'Unknown',
+            created_at=session['created_at'],
+            last_activity=session['last_activity'],
+            is_current=session['is_current']
+        )
+        for session in sessions
+    ]
 
 @router.delete("/sessions/{session_key}")
 async def terminate_session(session_key: str, user_id: int):
     """Terminate a specific session"""
-    try:
-        session = Session.objects.get(session_key=session_key)
-        session.delete()
-        
-        # Create audit log
-        user = UsersSchool.objects.get(id=user_id)
-        AuditLog.objects.create(
-            user=user,
-            action="SESSION_TERMINATE",
-            resource_type="SESSION",
-            details={"session_key": session_key}
-        )
-        
-        return {"success": True, "message": "Session terminated"}
-    except Session.DoesNotExist:
+    if not await sync_to_async(SessionRegistry.revoke)(user_id, session_key):
         raise HTTPException(status_code=404, detail="Session not found")
+    
+    # Create audit log
+    user = UsersSchool.objects.get(id=user_id)
+    AuditLog.objects.create(
+        user=user,
+        action="SESSION_TERMINATE",
+        resource_type="SESSION",
+        details={"session_id": session_key}
+    )
+    
+    return {"success": True, "message": "Session terminated"}
 
 @router.get("/audit-logs")
 async def get_audit_logs(
@@ -164,13 +161,14 @@ async def get_audit_logs(
         "limit": limit
     }
 
-def authenticate_user(username: str, password: str) -> bool:
-    """Authenticate user with username and password"""
+async def authenticate_user(username: str, password: str) -> bool:
+    """Authenticate user with username and password (bcrypt runs in the login hash pool)"""
     try:
         user = UsersSchool.objects.get(username=username)
-        # Use Django's built-in password verification
-        import bcrypt
-        return bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8'))
+        return await PasswordHasher.averify(password, user.password_hash)
+    except LoginBusy:
+        raise HTTPException(status_code=503, detail="Too many sign-ins right now, please try again",
+                            headers={"Retry-After": "2"})
     except UsersSchool.DoesNotExist:
         return False
     except Exception:
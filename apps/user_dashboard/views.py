@@ -5,6 +5,8 @@ Separate views for each user dashboard page: overview, form, analytics, settings
 from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from apps.core.models import AdminUser
+from apps.core.fragments import fragment_context
+from apps.core.identity import get_identity
 
 
 def get_user_context(request):
@@ -38,10 +40,14 @@ def get_user_context(request):
             return None
     
     try:
-        # Get the AdminUser record
-        admin_user = AdminUser.objects.select_related(
-            'school', 'region', 'division', 'district'
-        ).get(admin_id=admin_id)
+        # Get the AdminUser record (loaded once per request, see apps.core.identity)
+        identity = get_identity(request)
+        if identity.admin_id == admin_id:
+            admin_user = identity.require_admin()
+        else:
+            admin_user = AdminUser.objects.select_related(
+                'school', 'region', 'division', 'district'
+            ).get(admin_id=admin_id)
         
         context = {
             'user': {
@@ -63,6 +69,8 @@ def get_user_context(request):
             'admin_level': admin_user.admin_level,
             'user_type': request.session.get('user_type', 'school_user')
         }
+        # Vary-on values for the cached page chrome (sidebar); user details stay uncached
+        context.update(fragment_context())
         
         return context
         
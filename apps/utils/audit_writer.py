@@ -0,0 +1,323 @@
+"""
+Asynchronous, batched audit-log writer
+Audit rows (AuditLog, AdminActivityLog) are put on a bounded in-process queue and a
+background thread inserts them in batches, every AUDIT_BATCH_SIZE rows or
+AUDIT_FLUSH_SECONDS, whichever comes first, so requests no longer wait for the INSERT.
+If the database is unavailable (or the queue is full) rows are appended to a local
+JSON-lines spill file, which the flusher replays when it starts and after every
+successful flush. A batch the database rejects for any other reason is retried row by
+row and only the offending rows are dropped (logged, counted as rejected), so one bad
+row neither loses its batch nor sticks in the spill file. metrics() reports queue
+depth, drops, rejects and spills for this process.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import InterfaceError, OperationalError, close_old_connections, models, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """One writer per process; all state lives on the class"""
+
+    _queue = None
+    _thread = None
+    _lock = threading.Lock()
+    _spill_lock = threading.Lock()
+    _metrics = {
+        'enqueued': 0,
+        'written': 0,
+        'dropped': 0,
+        'rejected': 0,
+        'spilled': 0,
+        'replayed': 0,
+        'flush_failures': 0,
+        'last_flush_at': None,
+    }
+
+    # --- configuration ---
+
+    @staticmethod
+    def enabled():
+        return getattr(settings, 'AUDIT_ASYNC', True)
+
+    @staticmethod
+    def batch_size():
+        return getattr(settings, 'AUDIT_BATCH_SIZE', 200)
+
+    @staticmethod
+    def flush_seconds():
+        return getattr(settings, 'AUDIT_FLUSH_SECONDS', 1.0)
+
+    @staticmethod
+    def spill_path():
+        return str(getattr(settings, 'AUDIT_SPILL_PATH', os.path.join(settings.BASE_DIR, 'var', 'audit_spill.jsonl')))
+
+    # --- producer side ---
+
+    @classmethod
+    def submit(cls, model, **fields):
+        """
+        Record one row of `model`. Returns immediately; model instances in `fields`
+        are stored by primary key. With AUDIT_ASYNC off the row is inserted inline.
+        """
+        row = cls._row(model, fields)
+        if not cls.enabled():
+            cls._write(model._meta.label, [row])
+            return
+        cls._ensure_started()
+        try:
+            cls._queue.put_nowait((model._meta.label, row))
+            cls._metrics['enqueued'] += 1
+        except queue.Full:
+            # Never block a request on auditing: keep the row on disk instead
+            if not cls._spill([(model._meta.label, row)]):
+                cls._metrics['dropped'] += 1
+
+    @staticmethod
+    def _row(model, fields):
+        row = {}
+        for name, value in fields.items():
+            if isinstance(value, models.Model) or (value is None and name in _fk_names(model)):
+                field = model._meta.get_field(name)
+                row[field.attname] = value.pk if value is not None else None
+            else:
+                row[name] = value
+        # Event time, not flush time (the rows are inserted raw, see _write)
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now_add', False) and row.get(field.attname) is None:
+                row[field.attname] = timezone.now()
+        return row
+
+    # --- flusher ---
+
+    @classmethod
+    def _ensure_started(cls):
+        if cls._thread is not None and cls._thread.is_alive():
+            return
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+            if cls._queue is None:
+                cls._queue = queue.Queue(maxsize=getattr(settings, 'AUDIT_QUEUE_SIZE', 10000))
+                atexit.register(cls.drain)
+            cls._thread = threading.Thread(target=cls._run, name='audit-writer', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        cls.replay_spill()
+        while True:
+            batch = cls._collect()
+            if not batch:
+                continue
+            try:
+                cls._flush(batch)
+            except Exception as e:
+                # Keep the flusher alive whatever happens to one batch
+                cls._metrics['dropped'] += len(batch)
+                logger.exception(f"Audit flush of {len(batch)} rows crashed, rows lost: {e}")
+
+    @classmethod
+    def _collect(cls):
+        """Block for the first row, then gather until the batch is full or the time is up"""
+        batch = [cls._queue.get()]
+        deadline = time.monotonic() + cls.flush_seconds()
+        while len(batch) < cls.batch_size():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(cls._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    @classmethod
+    def _flush(cls, batch):
+        close_old_connections()
+        try:
+            written, unwritten = cls._write_batch(batch)
+        finally:
+            close_old_connections()
+        cls._metrics['written'] += written
+        if unwritten:
+            cls._metrics['flush_failures'] += 1
+            logger.error(f"Audit flush: database unavailable, spilling {len(unwritten)} rows to disk")
+            if not cls._spill(unwritten):
+                cls._metrics['dropped'] += len(unwritten)
+            return
+        cls._metrics['last_flush_at'] = time.time()
+        if os.path.exists(cls.spill_path()):
+            # The database is reachable again
+            cls.replay_spill()
+
+    @classmethod
+    def _write_batch(cls, batch):
+        """
+        Insert (label, row) pairs; returns (rows written, rows to keep for later). The
+        batch goes in as one transaction; if the database rejects it for anything but a
+        connection problem, the rows are retried one at a time and the rejected ones are
+        logged and dropped. After a connection error the remaining rows are handed back.
+        """
+        try:
+            with transaction.atomic():
+                for label, rows in _by_model(batch).items():
+                    cls._write(label, rows)
+            return len(batch), []
+        except (OperationalError, InterfaceError):
+            return 0, batch
+        except Exception as e:
+            logger.warning(f"Audit batch of {len(batch)} rows rejected ({e}), retrying row by row")
+
+        written = 0
+        for index, (label, row) in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    cls._write(label, [row])
+                written += 1
+            except (OperationalError, InterfaceError):
+                return written, batch[index:]
+            except Exception as e:
+                cls._metrics['rejected'] += 1
+                logger.error(f"Dropping audit row the database rejects ({label}: {e}): {str(row)[:500]}")
+        return written, []
+
+    @staticmethod
+    def _write(label, rows):
+        """
+        One multi-row INSERT per batch. Inserted raw so auto_now_add keeps the event
+        time recorded at submit() instead of being restamped with the flush time.
+        """
+        model = apps.get_model(label)
+        fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+        for start in range(0, len(rows), AuditWriter.batch_size()):
+            objs = [model(**row) for row in rows[start:start + AuditWriter.batch_size()]]
+            model._base_manager._insert(objs, fields=fields, raw=True)
+
+    @classmethod
+    def drain(cls):
+        """Write whatever is queued (process exit); a failed write goes to the spill file"""
+        if cls._queue is None:
+            return 0
+        batch = []
+        while True:
+            try:
+                batch.append(cls._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            cls._flush(batch)
+        return len(batch)
+
+    # --- spill file ---
+
+    @classmethod
+    def _spill(cls, batch):
+        path = cls.spill_path()
+        lines = []
+        for label, row in batch:
+            try:
+                lines.append(json.dumps({'model': label, 'row': row}, cls=DjangoJSONEncoder) + '\n')
+            except (TypeError, ValueError) as e:
+                cls._metrics['dropped'] += 1
+                logger.error(f"Audit row for {label} cannot be spilled and is lost ({e}): {str(row)[:500]}")
+        if not lines:
+            return True
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with cls._spill_lock, open(path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.error(f"Audit spill to {path} failed, {len(lines)} rows lost: {e}")
+            return False
+        cls._metrics['spilled'] += len(lines)
+        return True
+
+    @classmethod
+    def replay_spill(cls):
+        """
+        Insert spilled rows. The file is renamed first, so concurrent writers (other
+        threads or worker processes) keep appending to a fresh one; rows left over when
+        the database is unavailable again are spilled back, rows it rejects are dropped
+        (see _write_batch). Returns the number of rows replayed.
+        """
+        path = cls.spill_path()
+        claimed = f"{path}.replay-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with cls._spill_lock:
+                os.rename(path, claimed)
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logger.error(f"Cannot claim audit spill file {path}: {e}")
+            return 0
+
+        batch = []
+        with open(claimed, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    batch.append((entry['model'], entry['row']))
+                except (ValueError, KeyError):
+                    logger.error(f"Skipping corrupt audit spill line: {line[:200]}")
+
+        replayed = 0
+        close_old_connections()
+        try:
+            for start in range(0, len(batch), cls.batch_size()):
+                written, unwritten = cls._write_batch(batch[start:start + cls.batch_size()])
+                replayed += written
+                if unwritten:
+                    logger.error(f"Audit spill replay stopped after {replayed} rows: database unavailable")
+                    cls._spill(unwritten + batch[start + cls.batch_size():])
+                    break
+        finally:
+            close_old_connections()
+            os.remove(claimed)
+        if replayed:
+            cls._metrics['replayed'] += replayed
+            logger.info(f"Replayed {replayed} spilled audit rows")
+        return replayed
+
+    # --- metrics ---
+
+    @classmethod
+    def metrics(cls):
+        data = dict(cls._metrics)
+        data.update({
+            'pid': os.getpid(),
+            'async': cls.enabled(),
+            'queue_depth': cls._queue.qsize() if cls._queue is not None else 0,
+            'queue_capacity': getattr(settings, 'AUDIT_QUEUE_SIZE', 10000),
+            'flusher_alive': bool(cls._thread and cls._thread.is_alive()),
+            'spill_file_bytes': os.path.getsize(cls.spill_path()) if os.path.exists(cls.spill_path()) else 0,
+        })
+        return data
+
+
+def _by_model(batch):
+    by_model = {}
+    for label, row in batch:
+        by_model.setdefault(label, []).append(row)
+    return by_model
+
+
+def _fk_names(model):
+    return {f.name for f in model._meta.concrete_fields if f.is_relation}
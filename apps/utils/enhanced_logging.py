@@ -412,34 +412,19 @@ class EnhancedSystemLogger(SystemLogger):
 
 
 # Django Signals for Automatic Logging
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from apps.core.models import Question, Answer, Form, AdminUser, UsersSchool, School
 
-# Store original values for comparison
-_original_values = {}
-
-@receiver(pre_save, sender=Question)
-def store_original_question(sender, instance, **kwargs):
-    """Store original question data before save"""
-    if instance.pk:
-        try:
-            original = Question.objects.get(pk=instance.pk)
-            _original_values[f'question_{instance.pk}'] = {
-                'question_text': original.question_text,
-                'answer_type': original.answer_type,
-                'is_required': original.is_required,
-                'display_order': original.display_order
-            }
-        except Question.DoesNotExist:
-            pass
+# Original values come from the snapshot TrackedFieldsMixin takes when the row is
+# loaded, so capturing a change never costs an extra SELECT before the save.
 
 @receiver(post_save, sender=Question)
 def log_question_save(sender, instance, created, **kwargs):
     """Automatically log question changes"""
     if hasattr(instance, '_logging_user'):
         action = 'create' if created else 'update'
-        old_data = _original_values.get(f'question_{instance.pk}')
+        old_data = None if created else instance.get_loaded_values()
         new_data = {
             'question_text': instance.question_text,
             'answer_type': instance.answer_type,
@@ -456,10 +441,6 @@ def log_question_save(sender, instance, created, **kwargs):
             ip_address=getattr(instance, '_logging_ip', None),
             user_agent=getattr(instance, '_logging_user_agent', None)
         )
-        
-        # Clean up stored data
-        if f'question_{instance.pk}' in _original_values:
-            del _original_values[f'question_{instance.pk}']
 
 @receiver(post_delete, sender=Question)
 def log_question_delete(sender, instance, **kwargs):
@@ -473,6 +454,22 @@ def log_question_delete(sender, instance, **kwargs):
             user_agent=getattr(instance, '_logging_user_agent', None)
         )
 
+@receiver(post_save, sender=Answer)
+def log_answer_save(sender, instance, created, **kwargs):
+    """Automatically log answer changes made through Model.save()"""
+    if hasattr(instance, '_logging_user'):
+        changes = instance.get_tracked_changes()
+        if not created and 'response' not in changes:
+            return
+        EnhancedSystemLogger.log_answer_change(
+            user=instance._logging_user,
+            answer=instance,
+            action='create' if created else 'update',
+            old_value=changes.get('response', {}).get('old'),
+            ip_address=getattr(instance, '_logging_ip', None),
+            user_agent=getattr(instance, '_logging_user_agent', None)
+        )
+
 # Similar patterns can be implemented for other models...
 
 # Context manager for adding logging context to model operations
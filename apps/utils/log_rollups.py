@@ -0,0 +1,235 @@
+"""
+Pre-aggregated log counts
+The rollup_logs task (every few minutes) re-counts the last LOG_ROLLUP_LOOKBACK_HOURS
+closed hours of audit_logs, admin_activity_log and login_attempts into hourly rows of
+log_rollups/login_rollups, rebuilds the daily rows of the days it touched, and records
+the covered range in Redis. counts() answers "how many, grouped by ..." for any window
+from daily rows for whole days, hourly rows for the remaining hours, and the raw tables
+only for what is not rolled up yet (the partial first hour and the time since the last
+run), so dashboard figures cost the same whatever the log volume.
+Rows written more than the lookback late (e.g. replayed audit spill files) are only
+counted after a backfill (`manage.py rollup_logs --since ...`).
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from apps.core.models import AdminActivityLog, AuditLog, LoginAttempt, LoginRollup, LogRollup
+
+logger = logging.getLogger(__name__)
+
+r = redis.Redis(
+    host=getattr(settings, 'REDIS_HOST', 'localhost'),
+    port=getattr(settings, 'REDIS_PORT', 6379),
+    db=getattr(settings, 'REDIS_DB', 0)
+)
+
+STATE_KEY = 'log_rollup:range'
+
+
+class RollupSpec:
+    """How one raw log table is counted: rollup model, raw model, rollup field -> raw column"""
+
+    __slots__ = ('rollup', 'raw', 'dims', 'where')
+
+    def __init__(self, rollup, raw, dims, where=None):
+        self.rollup = rollup
+        self.raw = raw
+        self.dims = dims
+        self.where = where or {}
+
+
+SPECS = {
+    'audit_log': RollupSpec(LogRollup, AuditLog, {
+        'actor_id': 'user_id', 'action': 'action_type', 'resource_type': 'resource_type',
+        'severity': 'severity', 'success': 'success',
+    }, {'source': 'audit_log'}),
+    'admin_activity': RollupSpec(LogRollup, AdminActivityLog, {
+        'actor_id': 'admin_user_id', 'action': 'action', 'resource_type': 'resource_type',
+    }, {'source': 'admin_activity'}),
+    'login': RollupSpec(LoginRollup, LoginAttempt, {
+        'username': 'username', 'ip_address': 'ip_address', 'success': 'success',
+    }),
+}
+
+
+def floor_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value):
+    floored = floor_hour(value)
+    return floored if floored == value else floored + timedelta(hours=1)
+
+
+def floor_day(value):
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def ceil_day(value):
+    floored = floor_day(value)
+    return floored if floored == value else floored + timedelta(days=1)
+
+
+class LogRollups:
+    """Rollup maintenance and reads (static helpers, state in Redis)"""
+
+    # --- covered range ---
+
+    @staticmethod
+    def covered():
+        """(since, until): the hours rolled up, or None before the first run / without Redis"""
+        try:
+            state = r.hgetall(STATE_KEY)
+        except redis.RedisError as e:
+            logger.warning(f"Log rollup state unavailable, counting raw rows: {e}")
+            return None
+        if b'since' not in state or b'until' not in state:
+            return None
+        return (datetime.fromisoformat(state[b'since'].decode()), datetime.fromisoformat(state[b'until'].decode()))
+
+    @staticmethod
+    def _set_covered(since, until):
+        r.hset(STATE_KEY, mapping={'since': since.isoformat(), 'until': until.isoformat()})
+
+    # --- maintenance ---
+
+    @staticmethod
+    def run(now=None):
+        """
+        Rebuild the last LOG_ROLLUP_LOOKBACK_HOURS closed hours (from the end of the covered
+        range if the previous run is older) and extend the covered range. Returns row counts.
+        """
+        end = floor_hour(now or timezone.now())
+        start = end - timedelta(hours=getattr(settings, 'LOG_ROLLUP_LOOKBACK_HOURS', 3))
+        covered = LogRollups.covered()
+        if covered and covered[1] < start:
+            start = covered[1]
+        written = LogRollups.rebuild(start, end)
+        LogRollups._set_covered(min(covered[0], start) if covered else start, end)
+        return written
+
+    @staticmethod
+    def backfill(since, now=None):
+        """Roll up everything from `since` (day by day) and mark it covered"""
+        end = floor_hour(now or timezone.now())
+        start = floor_hour(since)
+        written = Counter()
+        day = start
+        while day < end:
+            written.update(LogRollups.rebuild(day, min(floor_day(day) + timedelta(days=1), end)))
+            day = floor_day(day) + timedelta(days=1)
+        covered = LogRollups.covered()
+        # The covered range must stay contiguous: an older range ending before `since` is dropped
+        contiguous = covered and covered[1] >= start
+        LogRollups._set_covered(min(covered[0], start) if contiguous else start, end)
+        return dict(written)
+
+    @staticmethod
+    def rebuild(start, end):
+        """Recount hourly rows in [start, end) and the daily rows of the days touched"""
+        written = {}
+        for name, spec in SPECS.items():
+            with transaction.atomic():
+                written[name] = LogRollups._rebuild_hours(spec, start, end)
+                LogRollups._rebuild_days(spec, floor_day(start), ceil_day(end))
+        return written
+
+    @staticmethod
+    def _rebuild_hours(spec, start, end):
+        rows = (
+            spec.raw._base_manager.filter(timestamp__gte=start, timestamp__lt=end)
+            .annotate(hour=TruncHour('timestamp')).values('hour', *spec.dims.values())
+            .annotate(n=Count('pk')).order_by()
+        )
+        objs = [
+            spec.rollup(period='hour', bucket=row['hour'], count=row['n'], **spec.where,
+                        **{field: LogRollups._clean(field, row[column]) for field, column in spec.dims.items()})
+            for row in rows
+        ]
+        spec.rollup.objects.filter(period='hour', bucket__gte=start, bucket__lt=end, **spec.where).delete()
+        spec.rollup.objects.bulk_create(objs, batch_size=1000)
+        return len(objs)
+
+    @staticmethod
+    def _rebuild_days(spec, start, end):
+        rows = (
+            spec.rollup.objects.filter(period='hour', bucket__gte=start, bucket__lt=end, **spec.where)
+            .annotate(day=TruncDay('bucket')).values('day', *spec.dims)
+            .annotate(n=Sum('count')).order_by()
+        )
+        objs = [
+            spec.rollup(period='day', bucket=row['day'], count=row['n'], **spec.where,
+                        **{field: row[field] for field in spec.dims})
+            for row in rows
+        ]
+        spec.rollup.objects.filter(period='day', bucket__gte=start, bucket__lt=end, **spec.where).delete()
+        spec.rollup.objects.bulk_create(objs, batch_size=1000)
+
+    @staticmethod
+    def _clean(field, value):
+        if value is None:
+            return 0 if field == 'actor_id' else ''
+        return value
+
+    # --- reads ---
+
+    @staticmethod
+    def counts(source, start, end, group_by, **filters):
+        """
+        Counter of `source` events in [start, end] keyed by the `group_by` rollup fields
+        (a tuple per key), optionally limited by exact rollup field values (`filters`).
+        """
+        spec = SPECS[source]
+        covered = LogRollups.covered()
+        if covered is None:
+            return LogRollups._raw(spec, start, end, group_by, filters, inclusive=True)
+        rolled_start = max(ceil_hour(start), covered[0])
+        rolled_end = min(floor_hour(end), covered[1])
+        if rolled_end <= rolled_start:
+            return LogRollups._raw(spec, start, end, group_by, filters, inclusive=True)
+
+        counts = Counter()
+        if start < rolled_start:
+            counts.update(LogRollups._raw(spec, start, rolled_start, group_by, filters))
+        first_day, last_day = ceil_day(rolled_start), floor_day(rolled_end)
+        if first_day < last_day:
+            counts.update(LogRollups._rolled(spec, 'hour', rolled_start, first_day, group_by, filters))
+            counts.update(LogRollups._rolled(spec, 'day', first_day, last_day, group_by, filters))
+            counts.update(LogRollups._rolled(spec, 'hour', last_day, rolled_end, group_by, filters))
+        else:
+            counts.update(LogRollups._rolled(spec, 'hour', rolled_start, rolled_end, group_by, filters))
+        counts.update(LogRollups._raw(spec, rolled_end, end, group_by, filters, inclusive=True))
+        return counts
+
+    @staticmethod
+    def _rolled(spec, period, start, end, group_by, filters):
+        if end <= start:
+            return Counter()
+        rows = (
+            spec.rollup.objects.filter(period=period, bucket__gte=start, bucket__lt=end, **spec.where, **filters)
+            .values(*group_by).annotate(n=Sum('count')).order_by()
+        )
+        return Counter({tuple(row[field] for field in group_by): row['n'] for row in rows})
+
+    @staticmethod
+    def _raw(spec, start, end, group_by, filters, inclusive=False):
+        bound = {'timestamp__lte': end} if inclusive else {'timestamp__lt': end}
+        columns = [spec.dims[field] for field in group_by]
+        rows = (
+            spec.raw._base_manager.filter(timestamp__gte=start, **bound,
+                                          **{spec.dims[field]: value for field, value in filters.items()})
+            .values(*columns).annotate(n=Count('pk')).order_by()
+        )
+        counts = Counter()
+        for row in rows:
+            counts[tuple(LogRollups._clean(field, row[column]) for field, column in zip(group_by, columns))] += row['n']
+        return counts
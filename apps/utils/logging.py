@@ -5,7 +5,8 @@ Integrates with the database models for persistent logging
 
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from apps.core.models import LoginAttempt, AuditLog
+from apps.core.models import AuditLog
+from .audit_writer import AuditWriter
 import logging
 
 # Standard Python logging
@@ -16,16 +17,16 @@ class SystemLogger:
     
     @staticmethod
     def log_login_attempt(username, ip_address, user_agent, success=True, failure_reason=None, location=None):
-        """Log login attempt (both successful and failed)"""
+        """Log login attempt (both successful and failed); queued and written in batches"""
+        from apps.core.login_pipeline import LoginAttemptQueue
         try:
-            LoginAttempt.objects.create(
+            LoginAttemptQueue.enqueue(
                 username=username,
                 ip_address=ip_address,
                 user_agent=user_agent,
                 success=success,
                 failure_reason=failure_reason,
                 location=location,
-                timestamp=timezone.now(),
                 is_suspicious=SystemLogger._is_suspicious_login(ip_address, username, success)
             )
             logger.info(f"Login attempt logged: {username} from {ip_address} - {'Success' if success else 'Failed'}")
@@ -36,9 +37,10 @@ class SystemLogger:
     def log_user_activity(user, action_type, resource_type, resource_id=None, description="", 
                          ip_address=None, user_agent=None, success=True, error_message=None, 
                          metadata=None, severity='low'):
-        """Log user activity for audit trail"""
+        """Log user activity for audit trail (queued, written in batches by AuditWriter)"""
         try:
-            AuditLog.objects.create(
+            AuditWriter.submit(
+                AuditLog,
                 user=user,
                 action_type=action_type,
                 resource_type=resource_type,
@@ -148,23 +150,11 @@ class SystemLogger:
     
     @staticmethod
     def _is_suspicious_login(ip_address, username, success):
-        """Determine if a login attempt is suspicious"""
-        # Check for multiple failed attempts from same IP in last hour
-        from datetime import timedelta
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-        
-        recent_failures = LoginAttempt.objects.filter(
-            ip_address=ip_address,
-            success=False,
-            timestamp__gte=one_hour_ago
-        ).count()
-        
-        # Mark as suspicious if:
-        # 1. More than 3 failed attempts from same IP in last hour
-        # 2. Failed attempt with common admin usernames
-        suspicious_usernames = ['admin', 'administrator', 'root', 'test', 'user']
-        
-        return (recent_failures >= 3) or (not success and username.lower() in suspicious_usernames)
+        """Determine if a login attempt is suspicious (Redis sliding window per IP)"""
+        # Suspicious if 3+ failed attempts from the same IP in the last hour, or a
+        # failed attempt with a common admin username
+        from apps.core.login_pipeline import SuspiciousLoginWindow
+        return SuspiciousLoginWindow.record(ip_address, username, success)
     
     @staticmethod
     def get_client_ip(request):
@@ -209,22 +199,16 @@ def log_user_action(action_type, resource_type, description="", severity='low'):
 
 # Context processor for logging statistics (optional)
 def logging_stats(request):
-    """Context processor to add logging statistics to templates"""
+    """Context processor to add logging statistics to templates (read from the log rollups)"""
     if not request.user.is_authenticated:
         return {}
     
     from datetime import timedelta
-    last_24h = timezone.now() - timedelta(days=1)
+    from .log_rollups import LogRollups
+    now = timezone.now()
+    logins = LogRollups.counts('login', now - timedelta(days=1), now, ('success',), username=request.user.username)
     
     return {
-        'user_login_count_24h': LoginAttempt.objects.filter(
-            username=request.user.username,
-            success=True,
-            timestamp__gte=last_24h
-        ).count(),
-        'failed_login_count_24h': LoginAttempt.objects.filter(
-            username=request.user.username,
-            success=False,
-            timestamp__gte=last_24h
-        ).count()
+        'user_login_count_24h': logins[(True,)],
+        'failed_login_count_24h': logins[(False,)],
     }
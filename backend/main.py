@@ -3,7 +3,7 @@ import sys
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 
-from fastapi import FastAPI, HTTPException, Depends, status, Request
+from fastapi import FastAPI, HTTPException, Depends, status, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -22,14 +22,15 @@ django.setup()
 
 # Import Django models for database operations AFTER Django is configured
 from django.conf import settings
-from django.utils import timezone
 from django.db.models import Q
 from django.core.paginator import Paginator
 from django.contrib.auth.hashers import make_password
-from django.contrib.sessions.models import Session
 from django.http import HttpResponse
 from django.contrib.auth.models import User
 import csv
+from apps.core.utils import AnswerManager, AnswerConflict
+from apps.core.etags import etag_matches
+from apps.core.rate_limit import rate_limit_dependency
 
 # Environment variables for microservice endpoints and secrets
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8001")
@@ -116,6 +117,7 @@ class FormSubmission(BaseModel):
     answer: str
     sub_question_id: Optional[int] = None
     user_id: Optional[int] = None
+    version: Optional[int] = None  # answer version the client last read (optimistic concurrency)
 
 # Utility: JWT decode/validate (stateless, no DB call)
 def decode_jwt(token: str) -> dict:
@@ -176,12 +178,11 @@ async def get_current_user(request: Request):
     
     if session_key:
         try:
-            from django.contrib.sessions.models import Session
-            from django.utils import timezone
+            from importlib import import_module
             
-            # Get session from database
-            session = await sync_to_async(Session.objects.get)(session_key=session_key, expire_date__gte=timezone.now())
-            session_data = session.get_decoded()
+            # Load the session through the configured engine (Redis, DB fallback)
+            session_store = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+            session_data = await sync_to_async(session_store.load)()
             admin_id = session_data.get('admin_id')
             
             print(f"DEBUG: Session data: {session_data}")
@@ -189,7 +190,7 @@ async def get_current_user(request: Request):
             
             if admin_id:
                 # Get user data from Django
-                from app.models import AdminUser
+                from apps.core.models import AdminUser
                 admin_user = await sync_to_async(AdminUser.objects.get)(admin_id=admin_id)
                 
                 user_data = {
@@ -221,7 +222,8 @@ async def clear_cache():
 
 # API Gateway Endpoints (all business logic is in microservices)
 
-@app.post("/api/auth/login", response_model=Token)
+@app.post("/api/auth/login", response_model=Token,
+          dependencies=[Depends(rate_limit_dependency('api_login', 30, 60, scopes=('ip',)))])
 async def login(user_credentials: UserLogin):
     """
     Login endpoint - delegates to Auth Service.
@@ -286,74 +288,86 @@ async def get_dashboard_stats(request: Request):
         raise HTTPException(status_code=500, detail=f"Error fetching dashboard stats: {str(e)}")
 
 @app.get("/api/dashboard/categories", response_model=List[CategoryProgress])
-async def get_category_progress(current_user: dict = Depends(get_current_user)):
+async def get_category_progress(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     """
     Get category progress for the authenticated user.
+    Served from the per-form progress counters rather than recounting answers.
     """
     try:
-        from app.models import Form, Answer, Question, Category, AdminUser
-        
         user_id = current_user['id']
-        
-        # Get forms for this user
-        forms = await sync_to_async(list)(Form.objects.filter(user_id=user_id))
-        form_ids = [form.id for form in forms]
-        
-        # Get categories with progress
-        categories = await sync_to_async(list)(Category.objects.all())
-        
-        category_progress = []
-        for category in categories:
-            # Get questions in this category
-            total_questions = await sync_to_async(Question.objects.filter(category=category).count)()
-            
-            # Get answered questions in this category
-            answered_questions = 0
-            if form_ids and total_questions > 0:
-                answered_questions = await sync_to_async(
-                    Answer.objects.filter(
-                        form_id__in=form_ids,
-                        question__category=category
-                    ).exclude(response__isnull=True).exclude(response='').count
-                )()
-            
-            progress_percentage = (answered_questions / total_questions * 100) if total_questions > 0 else 0
-            
-            category_progress.append(CategoryProgress(
-                category_name=category.name,
-                progress_percentage=round(progress_percentage, 2),
-                completed_questions=answered_questions,
-                total_questions=total_questions
-            ))
-        
-        return category_progress
+        etag = await get_user_forms_etag(user_id, 'dashboard-categories')
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return not_modified_response(etag)
+        set_etag_headers(response, etag)
+        return await compute_category_progress(user_id)
     except Exception as e:
         print(f"Error in get_category_progress: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching category progress: {str(e)}")
 
+def not_modified_response(etag: str):
+    """304 for a client that already holds the representation tagged etag."""
+    return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
+
+def set_etag_headers(response: Response, etag: str):
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'private, no-cache'
+
+@sync_to_async
+def get_user_forms_etag(user_id: int, scope: str, schema: bool = True):
+    """ETag over the questionnaire schema and the answer versions of all of a user's forms."""
+    from apps.core.models import Form
+    from apps.core.progress import FormProgressManager
+    from apps.core.etags import form_etag
+    
+    form_ids = Form.objects.filter(user_id=user_id).order_by('form_id').values_list('form_id', flat=True)
+    return form_etag(scope, *[FormProgressManager.get(form_id) for form_id in form_ids], schema=schema)
+
+@sync_to_async
+def compute_category_progress(user_id: int):
+    """Category progress for all of a user's forms from their form_progress rows."""
+    from apps.core.models import Form
+    from apps.core.progress import FormProgressManager
+    from apps.core.schema import QuestionnaireSchema
+    
+    answered = {}
+    for form_id in Form.objects.filter(user_id=user_id).values_list('form_id', flat=True):
+        for category_id, progress in FormProgressManager.category_progress(form_id).items():
+            answered[category_id] = answered.get(category_id, 0) + progress['answered']
+    totals = FormProgressManager.get_category_totals()
+    
+    category_progress = []
+    for category in QuestionnaireSchema.get().categories:
+        category_id, name = category['category_id'], category['name']
+        total_questions = totals.get(category_id, 0)
+        answered_questions = answered.get(category_id, 0)
+        progress_percentage = (answered_questions / total_questions * 100) if total_questions > 0 else 0
+        category_progress.append(CategoryProgress(
+            category_id=category_id,
+            category_name=name,
+            progress_percentage=round(progress_percentage, 2),
+            completed_questions=answered_questions,
+            total_questions=total_questions
+        ))
+    return category_progress
+
 @app.get("/api/dashboard/completion")
 async def get_completion_data(current_user: dict = Depends(get_current_user)):
     """
     Get completion data for the authenticated user.
     """
     try:
-        from app.models import Form, Answer, Question, AdminUser
+        from apps.core.models import Form
+        from apps.core.progress import FormProgressManager
         
         user_id = current_user['id']
         
-        # Get forms for this user
-        forms = await sync_to_async(list)(Form.objects.filter(user_id=user_id))
-        form_ids = [form.id for form in forms]
+        @sync_to_async
+        def load_counts():
+            form_ids = list(Form.objects.filter(user_id=user_id).values_list('form_id', flat=True))
+            answered = sum(FormProgressManager.get(form_id).answered_total for form_id in form_ids)
+            return len(FormProgressManager.get_question_categories()), answered
         
-        # Get total questions
-        total_questions = await sync_to_async(Question.objects.count)()
-        
-        # Get answered questions
-        answered_questions = 0
-        if form_ids:
-            answered_questions = await sync_to_async(
-                Answer.objects.filter(form_id__in=form_ids).exclude(response__isnull=True).exclude(response='').count
-            )()
+        total_questions, answered_questions = await load_counts()
         
         # Calculate completion percentage
         completion_percentage = (answered_questions / total_questions * 100) if total_questions > 0 else 0
@@ -513,8 +527,9 @@ def get_admin_user_by_user(user):
 @sync_to_async
 def get_form_sections(user_id: int):
     """Get form sections with questions for a specific user."""
-    from app.models import Category, SubSection, Topic, Question, SubQuestion, Form, Answer, AdminUser, School
-    from django.db.models import Prefetch
+    from apps.core.models import Form, AdminUser, School
+    from apps.core.progress import FormProgressManager
+    from apps.core.schema import QuestionnaireSchema
     
     try:
         # Get the user's school
@@ -534,79 +549,37 @@ def get_form_sections(user_id: int):
             defaults={'status': 'draft'}
         )
         
-        # Get all categories with their related data in optimized queries
-        categories = Category.objects.prefetch_related(
-            Prefetch(
-                'subsection_set',
-                queryset=SubSection.objects.order_by('display_order').prefetch_related(
-                    Prefetch(
-                        'topic_set',
-                        queryset=Topic.objects.order_by('display_order').prefetch_related(
-                            Prefetch(
-                                'question_set',
-                                queryset=Question.objects.order_by('display_order').prefetch_related(
-                                    Prefetch(
-                                        'subquestion_set',
-                                        queryset=SubQuestion.objects.order_by('display_order')
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            )
-        ).order_by('display_order')
+        # Answered flags come from the form's progress bitmap: one row instead of an EXISTS per question
+        answered_bitmap = FormProgressManager.bitmap_to_int(FormProgressManager.get(form.form_id))
         
         categories_data = []
         
-        for category in categories:
+        # The questionnaire tree comes from the compiled schema cache
+        for category in QuestionnaireSchema.get().categories:
             category_questions = []
             category_total_questions = 0
             category_answered_questions = 0
             
-            # Process sub-sections (already prefetched)
-            for sub_section in category.subsection_set.all():
-                # Process topics (already prefetched)
-                for topic in sub_section.topic_set.all():
-                    # Process questions (already prefetched)
-                    for question in topic.question_set.all():
-                        # Get sub-questions (already prefetched)
-                        sub_questions = question.subquestion_set.all()
-                        
-                        # Check if question is answered
-                        is_answered = Answer.objects.filter(
-                            form=form,
-                            question=question,
-                            response__isnull=False
-                        ).exclude(response='').exists()
-                        
-                        if is_answered:
-                            category_answered_questions += 1
-                        
-                        category_total_questions += 1
-                        
-                        # Prepare sub-questions data
-                        sub_questions_data = [
-                            {
-                                'sub_question_id': sq.sub_question_id,
-                                'sub_question_text': sq.sub_question_text,
-                                'display_order': sq.display_order
-                            }
-                            for sq in sub_questions
-                        ]
-                        
-                        question_data = {
-                            'question_id': question.question_id,
-                            'question_text': question.question_text,
-                            'answer_type': question.answer_type,
-                            'is_required': question.is_required,
-                            'is_answered': is_answered,
-                            'sub_section_name': sub_section.name,
-                            'topic_name': topic.name,
-                            'sub_questions': sub_questions_data
-                        }
-                        
-                        category_questions.append(question_data)
+            for topic in category['topics']:
+                for question in topic['questions']:
+                    is_answered = FormProgressManager.is_question_answered(answered_bitmap, question['question_id'])
+                    
+                    if is_answered:
+                        category_answered_questions += 1
+                    
+                    category_total_questions += 1
+                    
+                    question_data = {
+                        'question_id': question['question_id'],
+                        'question_text': question['question_text'],
+                        'answer_type': question['answer_type'],
+                        'is_required': question['is_required'],
+                        'is_answered': is_answered,
+                        'topic_name': topic['name'],
+                        'sub_questions': []  # Sub-questions functionality removed
+                    }
+                    
+                    category_questions.append(question_data)
             
             # Calculate category progress
             progress_percentage = (category_answered_questions / category_total_questions * 100) if category_total_questions > 0 else 0
@@ -620,8 +593,8 @@ def get_form_sections(user_id: int):
                 status = 'in-progress'
             
             categories_data.append({
-                'category_id': category.category_id,
-                'category_name': category.name,
+                'category_id': category['category_id'],
+                'category_name': category['name'],
                 'status': status,
                 'progress_percentage': round(progress_percentage, 1),
                 'total_questions': category_total_questions,
@@ -636,9 +609,10 @@ def get_form_sections(user_id: int):
         return []
 
 @sync_to_async
-def submit_form_answer(user_id: int, question_id: int, answer: str, sub_question_id: Optional[int] = None):
-    """Submit a form answer for a user."""
-    from app.models import Answer, Form, Question, SubQuestion, AdminUser, School
+def submit_form_answer(user_id: int, question_id: int, answer: str, sub_question_id: Optional[int] = None,
+                       expected_version: Optional[int] = None):
+    """Submit a form answer for a user. Raises AnswerConflict if the answer changed since expected_version."""
+    from apps.core.models import Form, Question, AdminUser, School
     
     try:
         # Get the user's school
@@ -658,41 +632,19 @@ def submit_form_answer(user_id: int, question_id: int, answer: str, sub_question
             defaults={'status': 'draft'}
         )
         
-        # Check if it's a sub-question
+        if not Question.objects.filter(question_id=question_id).exists():
+            return False
         if sub_question_id:
-            try:
-                sub_question = SubQuestion.objects.get(sub_question_id=sub_question_id)
-                # Create or update answer for sub-question
-                answer_obj, created = Answer.objects.get_or_create(
-                    form=form,
-                    question_id=question_id,
-                    sub_question=sub_question,
-                    defaults={'response': answer, 'answered_at': datetime.now()}
-                )
-                if not created:
-                    answer_obj.response = answer
-                    answer_obj.answered_at = datetime.now()
-                    answer_obj.save()
-            except SubQuestion.DoesNotExist:
-                return False
+            # Sub-question answers live in the parent answer's sub_answers JSON
+            AnswerManager.save_sub_answer(form.form_id, question_id, sub_question_id, answer, expected_version)
         else:
-            try:
-                question = Question.objects.get(question_id=question_id)
-                # Create or update answer for regular question
-                answer_obj, created = Answer.objects.get_or_create(
-                    form=form,
-                    question=question,
-                    defaults={'response': answer, 'answered_at': datetime.now()}
-                )
-                if not created:
-                    answer_obj.response = answer
-                    answer_obj.answered_at = datetime.now()
-                    answer_obj.save()
-            except Question.DoesNotExist:
-                return False
+            # Create or compare-and-set update answer for regular question
+            AnswerManager.save_answer(form.form_id, question_id, answer, expected_version)
         
         return True
         
+    except AnswerConflict:
+        raise
     except Exception as e:
         print(f"Error submitting form answer: {e}")
         return False
@@ -772,22 +724,25 @@ async def get_last_login(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/security/sessions")
-async def get_user_sessions(current_user: dict = Depends(get_current_user)):
+async def get_user_sessions(request: Request, current_user: dict = Depends(get_current_user)):
     """Get active sessions for the current user."""
     try:
-        from django.contrib.sessions.models import Session
-        from django.contrib.auth.models import User
-        
-        user = User.objects.get(id=current_user['id'])
-        sessions = Session.objects.filter(expire_date__gte=timezone.now())
+        from apps.core.session_registry import SessionRegistry
         
-        session_data = []
-        for session in sessions:
-            if session.get_decoded().get('_auth_user_id') == str(user.id):
-                session_data.append({
-                    "session_key": session.session_key,
-                    "created_at": session.expire_date.isoformat()
-                })
+        sessions = await sync_to_async(SessionRegistry.active_for)(
+            current_user['id'], request.cookies.get('sessionid')
+        )
+        session_data = [
+            {
+                "session_key": session['id'],
+                "ip_address": session['ip_address'],
+                "user_agent": session['user_agent'],
+                "created_at": session['created_at'].isoformat(),
+                "last_activity": session['last_activity'].isoformat(),
+                "is_current": session['is_current']
+            }
+            for session in sessions
+        ]
         
         return {"success": True, "sessions": session_data}
     except Exception as e:
@@ -820,9 +775,13 @@ async def get_login_history(current_user: dict = Depends(get_current_user)):
 async def terminate_session(session_id: str, current_user: dict = Depends(get_current_user)):
     """Terminate a specific session."""
     try:
-        from django.contrib.sessions.models import Session
-        Session.objects.filter(session_key=session_id).delete()
+        from apps.core.session_registry import SessionRegistry
+        # Only the caller's own sessions can be terminated
+        if not await sync_to_async(SessionRegistry.revoke)(current_user['id'], session_id):
+            raise HTTPException(status_code=404, detail="Session not found")
         return {"success": True, "message": "Session terminated successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1542,27 +1501,36 @@ async def get_user_dashboard(current_user: User = Depends(get_current_user)):
     }
 
 @app.get("/api/form/sections")
-async def get_form_sections_endpoint(current_user: User = Depends(get_current_user)):
+async def get_form_sections_endpoint(request: Request, response: Response,
+                                     current_user: User = Depends(get_current_user)):
     """Get form sections with questions for the authenticated user."""
     try:
-        # Get user-specific cached data
+        # The ETag covers the questionnaire schema and the user's answer versions
+        etag = await get_user_forms_etag(current_user.id, 'form-sections')
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return not_modified_response(etag)
+        
+        # Get user-specific cached data; entries built for another ETag are stale
         cache_key = f"form_sections_user_{current_user.id}"
-        cached_data = get_cached_data(cache_key)
-        if cached_data:
-            return cached_data
+        cached_data = await get_cached_data(cache_key)
+        if cached_data and cached_data.get('etag') == etag:
+            set_etag_headers(response, etag)
+            return cached_data['sections']
         
         # Get fresh data from database for this specific user
         sections_data = await get_form_sections(current_user.id)
         
-        # Cache the result for this user
-        set_cached_data(cache_key, sections_data)
+        # Tagged with the state read before building, so a concurrent write only costs a refetch
+        await set_cached_data(cache_key, {'etag': etag, 'sections': sections_data})
+        set_etag_headers(response, etag)
         
         return sections_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/form/answers")
-async def get_saved_answers(current_user: User = Depends(get_current_user)):
+async def get_saved_answers(request: Request, response: Response,
+                            current_user: User = Depends(get_current_user)):
     """Get all saved answers for the current user."""
     try:
         # Get the authenticated user's school information
@@ -1570,7 +1538,12 @@ async def get_saved_answers(current_user: User = Depends(get_current_user)):
         if not admin_user:
             raise HTTPException(status_code=404, detail="User school information not found")
         
+        etag = await get_user_forms_etag(current_user.id, 'form-answers', schema=False)
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return not_modified_response(etag)
+        
         answers = await get_user_answers(current_user.id)
+        set_etag_headers(response, etag)
         return {"success": True, "answers": answers}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1751,7 +1724,11 @@ async def submit_form_answer_endpoint(submission: FormSubmission, current_user:
             raise HTTPException(status_code=404, detail="User school information not found")
         
         # Submit the answer using the authenticated user
-        result = await submit_form_answer(current_user.id, submission.question_id, submission.answer, submission.sub_question_id)
+        try:
+            result = await submit_form_answer(current_user.id, submission.question_id, submission.answer,
+                                              submission.sub_question_id, submission.version)
+        except AnswerConflict as conflict:
+            raise HTTPException(status_code=409, detail=conflict.to_dict())
         
         if result:
             # Clear user-specific cache since data has changed
@@ -1766,6 +1743,8 @@ async def submit_form_answer_endpoint(submission: FormSubmission, current_user:
                 return {"success": False, "message": f"Failed to save answer (database error). Question type: {question_type}"}
             else:
                 return {"success": False, "message": f"Question with question_id={submission.question_id} does not exist"}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in submit_form_answer_endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1785,7 +1764,7 @@ def get_admin_user_by_user_id(user_id: int):
 @sync_to_async
 def get_user_answers(user_id: int):
     """Get all saved answers for a user."""
-    from app.models import Answer, Form, Question, SubQuestion, AdminUser
+    from apps.core.models import Answer, Form, AdminUser, School
     
     try:
         # Get the user's school
@@ -1807,63 +1786,40 @@ def get_user_answers(user_id: int):
         if created:
             print(f"Created new form {form.form_id} for user {user_id} during answer retrieval")
         
-        # Get all answers for this user's form, including sub-question relationships
-        answers = Answer.objects.filter(form=form).select_related('question', 'sub_question')
+        answers = (Answer.objects.filter(form=form)
+                   .only('question_id', 'response', 'sub_answers', 'version', 'answered_at'))
         
         # Convert to dictionary format
         result = {}
         for answer in answers:
             response_value = answer.response
+            timestamp = answer.answered_at.isoformat() if answer.answered_at else None
+
+            # Sub-question answers are keyed by sub_question_id
+            for sub_question_id, sub_value in (answer.sub_answers or {}).items():
+                if sub_value is not None and str(sub_value).strip() != '':
+                    result[str(sub_question_id)] = {
+                        'value': sub_value,
+                        'question_id': answer.question_id,
+                        'version': answer.version,
+                        'timestamp': timestamp,
+                        'saveState': 'database'
+                    }
 
-            # If this row corresponds to a sub-question, key by sub_question_id
-            if getattr(answer, 'sub_question_id', None) or getattr(answer, 'sub_question', None):
-                sub_q_id = None
-                try:
-                    sub_q_id = str(answer.sub_question.sub_question_id)
-                except Exception:
-                    # Fallback: some ORMs expose sub_question_id directly
-                    try:
-                        sub_q_id = str(answer.sub_question_id)
-                    except Exception:
-                        sub_q_id = None
-                if sub_q_id:
-                    if response_value and str(response_value).strip() != '':
-                        result[sub_q_id] = {
-                            'value': response_value,
-                            'timestamp': answer.answered_at.isoformat() if answer.answered_at else None,
-                            'saveState': 'database'
-                        }
-                    continue
-
-            # Handle sub-question answers stored in concatenated format in the parent question response
-            if response_value and ';' in response_value and ':' in response_value:
-                sub_answers = response_value.split(';')
-                for sub_answer in sub_answers:
-                    if ':' in sub_answer:
-                        sub_parts = sub_answer.split(':', 1)
-                        if len(sub_parts) == 2:
-                            sub_question_id = sub_parts[0].strip()
-                            sub_answer_value = sub_parts[1].strip()
-                            if sub_answer_value and sub_answer_value != '':
-                                result[sub_question_id] = {
-                                    'value': sub_answer_value,
-                                    'timestamp': answer.answered_at.isoformat() if answer.answered_at else None,
-                                    'saveState': 'database'
-                                }
-                            else:
-                                if sub_question_id in result:
-                                    del result[sub_question_id]
+            # A legacy "id:value;" string kept next to its migrated sub_answers is not a value
+            if answer.sub_answers and AnswerManager.parse_legacy_sub_answers(response_value) is not None:
                 continue
 
             # Regular question answer: key by question_id
-            question_id_str = str(answer.question.question_id)
+            question_id_str = str(answer.question_id)
             if response_value and str(response_value).strip() != '':
                 # Guard: avoid echoing question id as value
                 if str(response_value) == question_id_str:
                     continue
                 result[question_id_str] = {
                     'value': response_value,
-                    'timestamp': answer.answered_at.isoformat() if answer.answered_at else None,
+                    'version': answer.version,
+                    'timestamp': timestamp,
                     'saveState': 'database'
                 }
         
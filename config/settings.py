@@ -73,6 +73,8 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     "django_browser_reload.middleware.BrowserReloadMiddleware",
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # request.identity: the session's admin, school and scope, loaded lazily once per request
+    'apps.core.identity.IdentityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -170,6 +172,105 @@ CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', f"redis://{REDIS_HOST}:{
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}")
 CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False').lower() in ('1','true','yes')
 
+# Periodic maintenance, run by the celery-beat service (`celery -A app beat`); schedules
+# are in seconds. Every task is idempotent, so a missed or repeated run is harmless
+CELERY_BEAT_SCHEDULE = {
+    'rollup-logs': {
+        'task': 'apps.core.tasks.rollup_logs',
+        'schedule': 300.0,
+    },
+    'prune-session-registry': {
+        'task': 'apps.core.tasks.prune_session_registry',
+        'schedule': 3600.0,
+    },
+    'maintain-log-partitions': {
+        'task': 'apps.core.tasks.maintain_log_partitions',
+        'schedule': 24 * 3600.0,
+    },
+}
+
+# Offline answer import (XLSX/CSV uploads are spooled here and streamed by a Celery task)
+OFFLINE_IMPORT_DIR = os.environ.get('OFFLINE_IMPORT_DIR', os.path.join(BASE_DIR, 'tmp', 'imports'))
+OFFLINE_IMPORT_CHUNK_SIZE = int(os.environ.get('OFFLINE_IMPORT_CHUNK_SIZE', '2000'))
+
+# Compiled questionnaire schema (apps.core.schema): how long a process trusts its copy
+# before re-reading the schema generation from Redis
+SCHEMA_VERSION_CHECK_SECONDS = float(os.environ.get('SCHEMA_VERSION_CHECK_SECONDS', '1'))
+
+# Server-rendered template fragments (apps.core.fragments): seconds a cached fragment lives.
+# Keys already change with the schema version, admin scope and language; 0 disables caching
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', '3600'))
+
+# Questionnaire import (apps.core.schema_import): rows per bulk INSERT/UPDATE/DELETE statement
+SCHEMA_IMPORT_CHUNK_SIZE = int(os.environ.get('SCHEMA_IMPORT_CHUNK_SIZE', '1000'))
+
+# Sparse display_order (apps.core.ordering): siblings are numbered this far apart, and a
+# background rebalance of a group is queued once neighbours get closer than the minimum
+DISPLAY_ORDER_GAP = 1024
+DISPLAY_ORDER_MIN_GAP = 8
+
+# Login pipeline (apps.core.login_pipeline): bcrypt worker threads per process, extra
+# verifications allowed to wait for one, and how long a login waits for a slot before
+# getting a 503. Login attempts are written in batches at most LOGIN_LOG_FLUSH_SECONDS late
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', '4'))
+LOGIN_HASH_QUEUE = int(os.environ.get('LOGIN_HASH_QUEUE', '16'))
+LOGIN_HASH_WAIT_SECONDS = 2
+LOGIN_LOG_BATCH_SIZE = 200
+LOGIN_LOG_FLUSH_SECONDS = 5
+
+# bcrypt cost for admin passwords. Pick it with `manage.py calibrate_password_hash`: the
+# highest cost whose verification stays under PASSWORD_HASH_TARGET_MS on the production
+# CPU budget. Stored hashes with another cost are rehashed on the next successful login
+PASSWORD_HASH_ROUNDS = int(os.environ.get('PASSWORD_HASH_ROUNDS', '12'))
+PASSWORD_HASH_TARGET_MS = int(os.environ.get('PASSWORD_HASH_TARGET_MS', '250'))
+
+# Cached admin access scopes (apps.admin_management.scope); saving an AdminUser drops its entry
+ADMIN_SCOPE_CACHE_SECONDS = 900
+
+# Audit writer (apps.utils.audit_writer): AuditLog/AdminActivityLog rows are queued and
+# inserted in batches by a background thread. Rows that cannot be queued or written go to
+# AUDIT_SPILL_PATH and are replayed later. AUDIT_ASYNC = False writes them inline again.
+AUDIT_ASYNC = True
+AUDIT_QUEUE_SIZE = 10000
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_SECONDS = 1.0
+AUDIT_SPILL_PATH = BASE_DIR / 'var' / 'audit_spill.jsonl'
+
+# Logs page summary figures (apps.admin_management.log_queries) are cached this long
+LOGS_SUMMARY_CACHE_SECONDS = 30
+
+# Log CSV export (apps.admin_management.log_export): days of logs read per query and rows
+# per database fetch / response chunk
+LOG_EXPORT_CHUNK_DAYS = 1
+LOG_EXPORT_BATCH_SIZE = 2000
+
+# Log search (apps.admin_management.log_search): use the ngram FULLTEXT indexes on MySQL.
+# LOG_SEARCH_NGRAM_SIZE must match the server's ngram_token_size
+LOG_SEARCH_FULLTEXT = True
+LOG_SEARCH_NGRAM_SIZE = 2
+
+# Log table partitions (apps.core.log_partitions, `manage.py manage_log_partitions`):
+# empty future months kept ready, whether expired months are exchanged into archive
+# tables before being dropped, and the retention used when no DataRetentionPolicy
+# lists a table (None keeps everything). Unpartitioned log tables (those with a
+# FULLTEXT search index) delete expired rows LOG_PURGE_BATCH_SIZE at a time
+LOG_PARTITION_MONTHS_AHEAD = 3
+LOG_PARTITION_ARCHIVE = False
+LOG_RETENTION_DAYS = None
+LOG_PURGE_BATCH_SIZE = 5000
+
+# Log rollups (apps.utils.log_rollups, rollup_logs task): closed hours recounted on each
+# run, which also picks up rows written late by the batched audit writer
+LOG_ROLLUP_LOOKBACK_HOURS = 3
+
+# Rate limiting (apps.core.rate_limit): proxies whose X-Real-IP / X-Forwarded-For are
+# believed when keying buckets by client IP (comma-separated CIDRs; nginx in docker
+# connects from the compose network)
+RATE_LIMIT_TRUSTED_PROXIES = [
+    network.strip() for network in
+    os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '127.0.0.1/32,::1/128').split(',') if network.strip()
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -179,10 +280,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOW_ALL_ORIGINS = True
 
 # Session settings for proper authentication
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Redis-backed sessions (apps.core.redis_sessions). SESSION_SAVE_EVERY_REQUEST keeps the
+# sliding cookie expiry; the engine only writes when session data changed and refreshes
+# the Redis TTL at most once per SESSION_TOUCH_INTERVAL seconds
+SESSION_ENGINE = 'apps.core.redis_sessions'
 SESSION_COOKIE_NAME = 'sessionid'
 SESSION_COOKIE_AGE = 1209600  # 2 weeks
 SESSION_SAVE_EVERY_REQUEST = True
+SESSION_TOUCH_INTERVAL = int(os.environ.get('SESSION_TOUCH_INTERVAL', '300'))
+# Read sessions still stored in django_session (moving them to Redis) during the migration
+SESSION_REDIS_DB_FALLBACK = os.environ.get('SESSION_REDIS_DB_FALLBACK', 'True') == 'True'
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS